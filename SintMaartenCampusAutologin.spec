@@ -16,6 +16,8 @@ hidden_imports = [
 ]
 hidden_imports += collect_submodules('selenium')
 hidden_imports += collect_submodules('webdriver_manager')
+# site_data_policy praat rechtstreeks met de CDP-websocket van Chrome.
+hidden_imports += collect_submodules('websocket')
 hidden_imports = list(dict.fromkeys(hidden_imports))
 
 a = Analysis(
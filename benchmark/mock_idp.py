@@ -0,0 +1,449 @@
+"""
+Offline mock-identiteitsprovider voor de login-benchmark.
+
+Eén Flask-app (HTTPS, zelfondertekend certificaat) die de DOM nabootst waar
+de loginflows op steunen:
+- Microsoft (login.microsoftonline.com): loginfmt/i0116 -> idSIButton9 ->
+  passwd/i0118 -> idSIButton9 -> "Blijf aangemeld?" (idBtn_Back), met
+  optionele account-picker (#otherTile) en MFA-tussenscherm; de e-mailpagina
+  bevat, zoals de echte, een verborgen off-screen passwd-veld;
+- de portals (admin.microsoft.com, intune.microsoft.com, portal.azure.com,
+  admin.google.com): sturen zonder sessie door naar hun IdP, met de
+  portal-URL in de query van de loginpagina (redirect_uri/continue), zoals
+  de echte IdP's; de formulieren behouden die query;
+- Google (accounts.google.com): identifierId/#identifierNext ->
+  Passwd/#passwordNext, met een verborgen hiddenPassword-veld op de
+  identifierpagina, optioneel doorgestuurd naar Microsoft (SSO);
+- Smartschool (*.smartschool.be/login) en Easy4U (easy4u.nl/admin/login).
+
+Chrome bereikt de mock onder de echte hostnamen via --host-resolver-rules
+(zie `host_resolver_rules`; run_benchmark voegt die vlag toe aan de Chrome-opties);
+alle andere hosts zijn onbereikbaar, zodat er nooit een echte server geraakt
+wordt. Latency, account-picker, MFA, "Blijf aangemeld?" en SSO zijn
+instelbaar via MockConfig.
+
+Los draaien (bv. om een flow met de hand te bekijken):
+    python benchmark/mock_idp.py --port 8443 --latency 0.2 --mfa
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+from flask import Flask, make_response, redirect, request
+from werkzeug.serving import make_server
+
+MICROSOFT_LOGIN_HOST = "login.microsoftonline.com"
+GOOGLE_LOGIN_HOST = "accounts.google.com"
+
+# Portal-host -> titel; zonder sessie stuurt de portal door naar zijn IdP.
+PORTAL_HOSTS = {
+    "admin.microsoft.com": "Microsoft 365 admin center",
+    "intune.microsoft.com": "Microsoft Intune admin center",
+    "portal.azure.com": "Microsoft Azure",
+    "admin.google.com": "Google Admin",
+}
+
+# Hosts die naar de mock omgeleid worden (host-resolver-rules syntax, wildcards toegestaan).
+MOCK_HOSTS = [
+    MICROSOFT_LOGIN_HOST,
+    GOOGLE_LOGIN_HOST,
+    *PORTAL_HOSTS,
+    "*.smartschool.be",
+    "easy4u.nl",
+]
+
+SESSION_COOKIE = "mock_session"
+MS_ACCOUNTS_COOKIE = "mock_ms_accounts"
+# Account dat de picker altijd toont, naast eerder aangemelde accounts.
+PICKER_DEFAULT_ACCOUNT = "vorige.gebruiker@example.org"
+
+
+class MockConfig:
+    """Instellingen van de mock; mag tijdens het draaien aangepast worden."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        account_picker: bool = False,
+        mfa: bool = False,
+        kmsi: bool = True,
+        honour_login_hint: bool = False,
+        google_sso: bool = False,
+    ) -> None:
+        # Vertraging (seconden) per request, plus willekeurig 0..jitter erbovenop.
+        self.latency = latency
+        self.jitter = jitter
+        # Microsoft toont eerst een account-picker (vereist "Use another account").
+        self.account_picker = account_picker
+        # Na het wachtwoord volgt een MFA-scherm (de flow moet dan stoppen als "manual").
+        self.mfa = mfa
+        # "Blijf aangemeld?"-scherm na het aanmelden.
+        self.kmsi = kmsi
+        # login_hint (Microsoft) / Email= (Google) slaat de e-mailstap over.
+        # Standaard uit: dat de echte portals de hint doorgeven is niet
+        # geverifieerd, dus de flows moeten ook zonder hint het e-mailveld typen.
+        self.honour_login_hint = honour_login_hint
+        # Google stuurt na de identifier door naar Microsoft (federatie).
+        self.google_sso = google_sso
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def host_resolver_rules(address: str) -> str:
+    """Chrome --host-resolver-rules: mock-hosts naar `address` (host:poort), de rest onbereikbaar."""
+    rules = [f"MAP {host} {address}" for host in MOCK_HOSTS]
+    rules.append("MAP * ~NOTFOUND")
+    return ", ".join(rules)
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title></head><body>{body}</body></html>"
+    )
+
+
+def _action(path: str) -> str:
+    """Formulier-action die de query van de pagina behoudt (redirect_uri/continue blijven in de URL)."""
+    query = request.query_string.decode("latin-1")
+    return f"/{path}?{query}" if query else f"/{path}"
+
+
+def _hidden(**fields: str) -> str:
+    return "".join(
+        f"<input type='hidden' name='{name}' value='{html.escape(value or '', quote=True)}'>"
+        for name, value in fields.items()
+    )
+
+
+def _request_host() -> str:
+    return (request.host or "").split(":", 1)[0].lower()
+
+
+def _finish_url(host: str, user: str) -> str:
+    return f"https://{host}/__mock/auth?{urlencode({'user': user})}"
+
+
+# --- Microsoft ----------------------------------------------------------------
+
+def _ms_email_page(return_host: str) -> str:
+    return _page("Sign in to your account", f"""
+<form method='post' action='{_action("email")}'>
+  <div role='heading'>Sign in</div>
+  <input type='email' name='loginfmt' id='i0116' placeholder='Email, phone, or Skype'>
+  <input type='password' name='passwd' tabindex='-1' aria-hidden='true' style='position:absolute;left:-9999px;top:-9999px'>
+  {_hidden(redirect=return_host)}
+  <input type='submit' id='idSIButton9' value='Next'>
+</form>""")
+
+
+def _ms_password_page(return_host: str, email: str) -> str:
+    return _page("Sign in to your account", f"""
+<form method='post' action='{_action("password")}'>
+  <div id='displayName'>{html.escape(email)}</div>
+  <div role='heading'>Enter password</div>
+  <input type='password' name='passwd' id='i0118' placeholder='Password'>
+  {_hidden(redirect=return_host, email=email)}
+  <input type='submit' id='idSIButton9' value='Sign in'>
+</form>""")
+
+
+def _ms_picker_page(return_host: str, accounts: list[str]) -> str:
+    query = urlencode({"redirect": return_host, "redirect_uri": f"https://{return_host}/", "picked": "1"})
+    tiles = "".join(
+        f"<div class='table' role='button'>{html.escape(account)}</div>" for account in accounts
+    )
+    return _page("Pick an account", f"""
+<div role='heading'>Pick an account</div>
+{tiles}
+<div id='otherTile' role='button' onclick="location.href='/?{query}'">Use another account</div>""")
+
+
+def _ms_mfa_page(return_host: str, email: str) -> str:
+    return _page("Approve sign in request", f"""
+<form method='post' action='{_action("mfa")}'>
+  <div role='heading' id='idDiv_SAOTCAS_Title'>Approve sign in request</div>
+  <p>Open your Authenticator app and enter the number shown to sign in.</p>
+  <input type='text' name='otc' placeholder='Enter code'>
+  {_hidden(redirect=return_host, email=email)}
+  <input type='submit' id='idSubmit_SAOTCC_Continue' value='Verify'>
+</form>""")
+
+
+def _ms_kmsi_page(return_host: str, email: str) -> str:
+    return _page("Stay signed in?", f"""
+<form method='post' action='{_action("kmsi")}'>
+  <div role='heading'>Stay signed in?</div>
+  {_hidden(redirect=return_host, email=email)}
+  <input type='submit' id='idBtn_Back' name='kmsi' value='No'>
+  <input type='submit' id='idSIButton9' name='kmsi' value='Yes'>
+</form>""")
+
+
+def _ms_finish(return_host: str, email: str):
+    response = redirect(_finish_url(return_host, email))
+    known = [a for a in (request.cookies.get(MS_ACCOUNTS_COOKIE) or "").split("|") if a]
+    if email and email not in known:
+        known.append(email)
+    response.set_cookie(MS_ACCOUNTS_COOKIE, "|".join(known), secure=True)
+    return response
+
+
+def _microsoft(config: MockConfig, path: str):
+    form = request.form
+    return_host = form.get("redirect") or request.args.get("redirect") or "admin.microsoft.com"
+    email = form.get("email") or ""
+
+    if request.method == "POST" and path == "email":
+        return _ms_password_page(return_host, (form.get("loginfmt") or "").strip())
+    if request.method == "POST" and path == "password":
+        if config.mfa:
+            return _ms_mfa_page(return_host, email)
+        return _ms_kmsi_page(return_host, email) if config.kmsi else _ms_finish(return_host, email)
+    if request.method == "POST" and path == "mfa":
+        return _ms_kmsi_page(return_host, email) if config.kmsi else _ms_finish(return_host, email)
+    if request.method == "POST" and path == "kmsi":
+        return _ms_finish(return_host, email)
+
+    login_hint = (request.args.get("login_hint") or "").strip()
+    if config.account_picker and not request.args.get("picked"):
+        accounts = [a for a in (request.cookies.get(MS_ACCOUNTS_COOKIE) or "").split("|") if a]
+        return _ms_picker_page(return_host, accounts or [PICKER_DEFAULT_ACCOUNT])
+    if login_hint and config.honour_login_hint:
+        return _ms_password_page(return_host, login_hint)
+    return _ms_email_page(return_host)
+
+
+# --- Google -------------------------------------------------------------------
+
+def _google_identifier_page() -> str:
+    return _page("Sign in - Google Accounts", f"""
+<form method='post' action='{_action("identifier")}'>
+  <h1>Sign in</h1>
+  <input type='email' id='identifierId' name='identifier' autocomplete='username'>
+  <input type='password' name='hiddenPassword' tabindex='-1' aria-hidden='true' style='position:absolute;opacity:0;width:1px;height:1px'>
+  <div id='identifierNext'><button type='submit'><span>Next</span></button></div>
+</form>""")
+
+
+def _google_password_page(email: str) -> str:
+    return _page("Sign in - Google Accounts", f"""
+<form method='post' action='{_action("challenge")}'>
+  <h1>Welcome</h1>
+  <div>{html.escape(email)}</div>
+  <input type='password' name='Passwd' autocomplete='current-password'>
+  {_hidden(email=email)}
+  <div id='passwordNext'><button type='submit'><span>Next</span></button></div>
+</form>""")
+
+
+def _google_mfa_page(email: str) -> str:
+    return _page("2-Step Verification", f"""
+<form method='post' action='{_action("verify")}'>
+  <h1>2-Step Verification</h1>
+  <p>Enter code from your authenticator app.</p>
+  <input type='tel' name='totpPin'>
+  {_hidden(email=email)}
+  <div id='totpNext'><button type='submit'><span>Next</span></button></div>
+</form>""")
+
+
+def _google_after_identifier(config: MockConfig, email: str):
+    if config.google_sso:
+        query = urlencode({
+            "redirect": "admin.google.com",
+            "login_hint": email,
+            "redirect_uri": "https://admin.google.com/",
+        })
+        return redirect(f"https://{MICROSOFT_LOGIN_HOST}/?{query}")
+    return _google_password_page(email)
+
+
+def _google(config: MockConfig, path: str):
+    form = request.form
+    if request.method == "POST" and path == "identifier":
+        return _google_after_identifier(config, (form.get("identifier") or "").strip())
+    if request.method == "POST" and path == "challenge":
+        if config.mfa:
+            return _google_mfa_page(form.get("email") or "")
+        return redirect(_finish_url("admin.google.com", form.get("email") or ""))
+    if request.method == "POST" and path == "verify":
+        return redirect(_finish_url("admin.google.com", form.get("email") or ""))
+
+    email = (request.args.get("Email") or "").strip()
+    if email and config.honour_login_hint:
+        return _google_after_identifier(config, email)
+    return _google_identifier_page()
+
+
+# --- Portals, Smartschool, Easy4U ------------------------------------------------
+
+def _start_session(user: str, target: str = "/"):
+    response = redirect(target)
+    response.set_cookie(SESSION_COOKIE, user or "anoniem", secure=True)
+    return response
+
+
+def _portal(host: str):
+    if request.cookies.get(SESSION_COOKIE):
+        return _page(PORTAL_HOSTS[host], f"<h1>{PORTAL_HOSTS[host]}</h1><p>Welkom, {html.escape(request.cookies[SESSION_COOKIE])}.</p>")
+    if host == "admin.google.com":
+        query = urlencode({"continue": "https://admin.google.com/", "service": "CPanel"})
+        return redirect(f"https://{GOOGLE_LOGIN_HOST}/ServiceLogin?{query}")
+    # Zoals bij de echte IdP staat de portal-URL in de query van de loginpagina:
+    # een substring-test op de portal-host zou de loginpagina als ingelogd zien.
+    query = {"redirect": host, "redirect_uri": f"https://{host}/"}
+    if request.args.get("login_hint"):
+        query["login_hint"] = request.args["login_hint"]
+    return redirect(f"https://{MICROSOFT_LOGIN_HOST}/?{urlencode(query)}")
+
+
+def _smartschool(host: str, path: str):
+    if request.method == "POST" and path == "login":
+        return _start_session(request.form.get("login") or "")
+    if path == "login":
+        ms_query = urlencode({"redirect": host})
+        return _page("Smartschool", f"""
+<form method='post' action='/login'>
+  <input type='text' name='login' placeholder='Gebruikersnaam'>
+  <input type='password' name='password' placeholder='Wachtwoord'>
+  <button type='submit'>Aanmelden</button>
+</form>
+<a href='https://{MICROSOFT_LOGIN_HOST}/?{ms_query}'>Aanmelden met Microsoft</a>""")
+    if not request.cookies.get(SESSION_COOKIE):
+        return redirect("/login")
+    return _page("Smartschool", "<h1>Startpagina</h1>")
+
+
+def _easy4u(path: str):
+    if path == "admin/login":
+        if request.method == "POST":
+            return _start_session(request.form.get("email") or "", "/admin/")
+        return _page("Easy4U", """
+<form method='post' action='/admin/login'>
+  <input type='text' name='email' placeholder='E-mailadres'>
+  <input type='password' name='password' placeholder='Wachtwoord'>
+  <input type='submit' value='Inloggen'>
+</form>""")
+    if not request.cookies.get(SESSION_COOKIE):
+        return redirect("/admin/login?referrer=%2Fadmin%2F")
+    return _page("Easy4U", "<h1>Easy4U admin</h1>")
+
+
+def create_app(config: MockConfig | None = None) -> Flask:
+    """Flask-app die op basis van de Host-header de juiste site speelt."""
+    config = config or MockConfig()
+    app = Flask(__name__)
+    app.config["MOCK_CONFIG"] = config
+
+    @app.before_request
+    def _latency():
+        if request.path == "/favicon.ico":
+            return make_response("", 404)
+        delay = config.latency + (random.uniform(0, config.jitter) if config.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        return None
+
+    @app.route("/", defaults={"path": ""}, methods=["GET", "POST"])
+    @app.route("/<path:path>", methods=["GET", "POST"])
+    def _dispatch(path: str):
+        host = _request_host()
+        path = path.strip("/")
+        if path == "__mock/auth":
+            return _start_session(request.args.get("user") or "")
+        if host == MICROSOFT_LOGIN_HOST:
+            return _microsoft(config, path)
+        if host == GOOGLE_LOGIN_HOST:
+            return _google(config, path)
+        if host in PORTAL_HOSTS:
+            return _portal(host)
+        if host.endswith(".smartschool.be"):
+            return _smartschool(host, path)
+        if host == "easy4u.nl":
+            return _easy4u(path)
+        return make_response(f"Onbekende host voor de mock: {html.escape(host)}", 404)
+
+    return app
+
+
+class MockIdP:
+    """De mock als HTTPS-server in een achtergrondthread."""
+
+    def __init__(self, config: MockConfig | None = None, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or MockConfig()
+        self._server = make_server(host, port, create_app(self.config), threaded=True, ssl_context="adhoc")
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        return f"{self._server.host}:{self._server.server_port}"
+
+    def host_resolver_rules(self) -> str:
+        return host_resolver_rules(self.address)
+
+    def start(self) -> "MockIdP":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-idp")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline mock-IdP voor de login-benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    add_config_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """MockConfig-opties als CLI-argumenten (gedeeld met de benchmark runner)."""
+    parser.add_argument("--latency", type=float, default=0.0, help="vertraging per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra willekeurige vertraging 0..jitter (s)")
+    parser.add_argument("--account-picker", action="store_true", help="Microsoft toont eerst een account-picker")
+    parser.add_argument("--mfa", action="store_true", help="MFA-scherm na het wachtwoord")
+    parser.add_argument("--no-kmsi", action="store_true", help="geen 'Blijf aangemeld?'-scherm")
+    parser.add_argument("--login-hint", action="store_true", help="login_hint/Email= honoreren (wachtwoordstap meteen)")
+    parser.add_argument("--google-sso", action="store_true", help="Google stuurt door naar Microsoft")
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        account_picker=args.account_picker,
+        mfa=args.mfa,
+        kmsi=not args.no_kmsi,
+        honour_login_hint=args.login_hint,
+        google_sso=args.google_sso,
+    )
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    mock = MockIdP(config_from_args(args), host=args.host, port=args.port).start()
+    print(f"Mock-IdP draait op https://{mock.address}")
+    print("Chrome-vlaggen om de loginhosts naar de mock te sturen:")
+    print(f"  --host-resolver-rules={mock.host_resolver_rules()} --ignore-certificate-errors")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
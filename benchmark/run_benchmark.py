@@ -0,0 +1,229 @@
+"""
+End-to-end login-benchmark tegen de offline mock-IdP.
+
+Start de mock (benchmark/mock_idp.py), laat Chrome via --host-resolver-rules
+de echte loginhosts op de mock uitkomen en voert elke `login_*` functie uit
+als login-job. Die vlag en --ignore-certificate-errors (de mock heeft geen
+geldig certificaat) worden enkel hier, in dit proces, aan de Chrome-opties
+toegevoegd: de applicatie zelf kent geen omleiding. Uit de job-events
+(SESSION_CREATED, FLOW_STEP email, GOOGLE_PASSWORD_FILLED, ...) volgen de
+tijden per stap; de totale tijd loopt van de start van de job tot het einde
+van de loginfunctie.
+
+De benchmark draait in een eigen tijdelijke datamap (AUTOLOGIN_DATA_DIR) met
+een eigen sleutel (CREDENTIALS_MASTER_PASSWORD): echte credentials, profielen
+en cookies van de gebruiker worden niet aangeraakt.
+
+Voorbeelden:
+    python benchmark/run_benchmark.py
+    python benchmark/run_benchmark.py --services microsoft_admin,google_admin --runs 5 --latency 0.15
+    python benchmark/run_benchmark.py --account-picker --mfa --json resultaten.json
+    python benchmark/run_benchmark.py --warm   # sessies tussen runs openhouden
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from importlib import import_module
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+from benchmark.mock_idp import MockIdP, add_config_arguments, config_from_args
+
+BENCHMARK_PASSWORD = "Benchmark-Wachtwoord-1"
+
+# service -> (module, loginfunctie, credentials in de tijdelijke kluis, account voor de job)
+SERVICES = {
+    "microsoft_admin": (
+        "src.auto_login.auto_microsoft_admin_login",
+        "login_microsoft_admin",
+        {"url": "https://admin.microsoft.com", "email": "m365.admin@example.org"},
+    ),
+    "intune_admin": (
+        "src.auto_login.auto_intune_admin_login",
+        "login_intune_admin",
+        {"url": "https://intune.microsoft.com", "email": "intune.admin@example.org"},
+    ),
+    "azure_admin": (
+        "src.auto_login.auto_azure_admin_login",
+        "login_azure_admin",
+        {"url": "https://portal.azure.com", "email": "azure.admin@example.org"},
+    ),
+    "google_admin": (
+        "src.auto_login.auto_google_admin_login",
+        "login_google_admin",
+        {"url": "https://admin.google.com", "email": "google.admin@example.org"},
+    ),
+    "smartschool": (
+        "src.auto_login.auto_smartschool_login",
+        "login_smartschool_via_microsoft",
+        {"username": "benchmark.gebruiker"},
+    ),
+    "smartschool_admin": (
+        "src.auto_login.auto_smartschool_login",
+        "login_smartschool_admin_via_microsoft",
+        {"email": "smartschool.admin@example.org"},
+    ),
+    "easy4u": (
+        "src.auto_login.auto_easy4u_login",
+        "login_easy4u",
+        {"url": "https://easy4u.nl/admin/", "email": "easy4u.admin@example.org"},
+    ),
+}
+
+_JOB_TIMEOUT = 180.0
+
+
+def _redirect_chrome_to_mock(browser_session, resolver_rules: str) -> None:
+    """Voeg de mock-omleiding toe aan elke Chrome die de tool in dit proces start."""
+    build_options = browser_session._build_options
+
+    def _build_options_for_mock(**kwargs):
+        options = build_options(**kwargs)
+        options.add_argument(f"--host-resolver-rules={resolver_rules}")
+        options.add_argument("--ignore-certificate-errors")
+        return options
+
+    browser_session._build_options = _build_options_for_mock
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Login-benchmark tegen de offline mock-IdP.")
+    parser.add_argument("--services", default=",".join(SERVICES), help="komma-gescheiden services")
+    parser.add_argument("--runs", type=int, default=3, help="aantal runs per service")
+    parser.add_argument("--warm", action="store_true", help="browsersessies tussen runs niet sluiten")
+    parser.add_argument("--json", dest="json_path", help="ruwe resultaten als JSON wegschrijven")
+    parser.add_argument("--keep-data", action="store_true", help="tijdelijke datamap niet opruimen")
+    add_config_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def _step_key(event: dict) -> str:
+    # FLOW_STEP-events krijgen de stapnaam erbij; foutmeldingen in detail horen niet in de sleutel.
+    if event["event"].startswith("FLOW_"):
+        return f"{event['event']} {event.get('detail') or ''}".strip()
+    return event["event"]
+
+
+def _measure(job) -> dict:
+    events = [e for e in job.events if e["event"] not in ("STATE_QUEUED", "STATE_RUNNING")]
+    started = job.started_at or job.created_at
+    steps = []
+    previous = started
+    for event in events:
+        steps.append({"step": _step_key(event), "at": event["at"] - started, "delta": event["at"] - previous})
+        previous = event["at"]
+    finished = job.finished_at or time.time()
+    return {"state": job.state, "error": job.error, "total": finished - started, "steps": steps}
+
+
+def _run_once(login_jobs, service: str, func, account_id: str) -> dict:
+    job, _ = login_jobs.start_login_job(service, func, account_id)
+    deadline = time.monotonic() + _JOB_TIMEOUT
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return _measure(job)
+
+
+def _fmt(seconds: float) -> str:
+    return f"{seconds:6.2f}s"
+
+
+def _report(results: dict[str, list[dict]]) -> None:
+    print()
+    print(f"{'service':<20}{'runs':>5}  {'mediaan':>8}{'min':>8}{'max':>8}  status")
+    for service, runs in results.items():
+        totals = [run["total"] for run in runs]
+        states = {}
+        for run in runs:
+            states[run["state"]] = states.get(run["state"], 0) + 1
+        status = ", ".join(f"{state} x{count}" for state, count in states.items())
+        print(
+            f"{service:<20}{len(runs):>5}  {_fmt(statistics.median(totals)):>8}"
+            f"{_fmt(min(totals)):>8}{_fmt(max(totals)):>8}  {status}"
+        )
+        # Mediaan per stap (tijd sinds het vorige event), in volgorde van eerste voorkomen.
+        per_step: dict[str, list[float]] = {}
+        for run in runs:
+            for step in run["steps"]:
+                per_step.setdefault(step["step"], []).append(step["delta"])
+        for step, deltas in per_step.items():
+            print(f"    {step:<44} +{statistics.median(deltas):.2f}s")
+        for run in runs:
+            if run["error"]:
+                print(f"    fout: {run['error']}")
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    services = [s.strip() for s in args.services.split(",") if s.strip()]
+    unknown = [s for s in services if s not in SERVICES]
+    if unknown:
+        print(f"Onbekende service(s): {', '.join(unknown)}")
+        return 2
+
+    # Geen regel per request van de mock tussen de resultaten.
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    data_dir = Path(tempfile.mkdtemp(prefix="autologin-benchmark-"))
+    if not args.keep_data:
+        # Vóór de imports van src.* registreren: loopt dan ná hun eigen exit-opruiming.
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    mock = MockIdP(config_from_args(args)).start()
+    # Vóór de eerste import van src.*: de loginmodules lezen de datamap bij het importeren.
+    os.environ["AUTOLOGIN_DATA_DIR"] = str(data_dir)
+    os.environ["CREDENTIALS_MASTER_PASSWORD"] = "autologin-benchmark"
+    if mock.config.honour_login_hint:
+        # De Microsoft-hint is opt-in; zonder deze vlag meet --login-hint enkel Google.
+        os.environ["AUTO_LOGIN_MICROSOFT_LOGIN_HINT"] = "1"
+    print(f"Mock-IdP op https://{mock.address} ({mock.config.to_dict()})")
+    print(f"Datamap: {data_dir}")
+
+    from src.auto_login import browser_session
+    from src.auto_login.browser_session import quit_all_sessions
+    from src.core import login_jobs
+    from src.core.credentials_manager import save_encrypted_credentials
+
+    _redirect_chrome_to_mock(browser_session, mock.host_resolver_rules())
+
+    credentials = {
+        service: {**SERVICES[service][2], "password": BENCHMARK_PASSWORD} for service in services
+    }
+    save_encrypted_credentials(credentials, data_dir / "credentials.json", data_dir)
+
+    results: dict[str, list[dict]] = {}
+    try:
+        for service in services:
+            module_name, func_name, creds = SERVICES[service]
+            func = getattr(import_module(module_name), func_name)
+            account_id = creds.get("email") or creds.get("username") or ""
+            for run in range(args.runs):
+                result = _run_once(login_jobs, service, func, account_id)
+                results.setdefault(service, []).append(result)
+                print(f"{service} run {run + 1}/{args.runs}: {result['state']} in {result['total']:.2f}s")
+                if not args.warm:
+                    quit_all_sessions()
+    finally:
+        quit_all_sessions()
+        mock.stop()
+
+    _report(results)
+    if args.json_path:
+        payload = {"config": mock.config.to_dict(), "warm": args.warm, "results": results}
+        Path(args.json_path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"Resultaten weggeschreven naar {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
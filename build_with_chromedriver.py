@@ -15,7 +15,7 @@ def main():
     print("Build script voor Sint Maarten Campus Autologin Tool v2.0.4")
     print("=" * 60)
     print("[OK] webdriver_manager staat in requirements.txt")
-    print("[OK] ChromeDriverManager is geintegreerd in browser_session.py")
+    print("[OK] ChromeDriverManager is geintegreerd in chromedriver_resolver.py (pad wordt gecachet)")
     print("[OK] ChromeDriver wordt automatisch gedownload bij eerste use")
     print("=" * 60)
 
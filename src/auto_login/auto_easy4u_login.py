@@ -7,14 +7,16 @@ import os
 import sys
 from pathlib import Path
 
+from selenium.webdriver.common.by import By
+
 # Add parent directory to path for imports
 SCRIPTS_DIR = Path(__file__).parent.parent.parent
 if str(SCRIPTS_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPTS_DIR))
 
-from src.core.credentials_manager import get_credential, get_data_dir
+from src.core.credentials_manager import get_data_dir
 from src.auto_login.browser_session import open_url_for_service
-from src.auto_login.input_utils import clear_and_human_type
+from src.auto_login.flow_engine import ACTION_TYPE, ACTION_WAIT, FLOW_FAILED, FlowStep, get_credential_or_fail, run_flow
 
 DATA_DIR = get_data_dir()
 CREDENTIALS_FILE = DATA_DIR / "credentials.json"
@@ -22,15 +24,34 @@ CREDENTIALS_FILE = DATA_DIR / "credentials.json"
 LOGIN_URL = "https://easy4u.nl/admin/login?referrer=%2Fadmin%2F"
 
 
-def get_credential_or_fail(service: str, field: str) -> str:
-    """Haal credential op uit encrypted storage."""
-    value = get_credential(service, field, DATA_DIR, CREDENTIALS_FILE)
-    if not value or value.strip() == "":
-        raise RuntimeError(
-            f"Credentials ontbreken: {field} voor {service} is niet ingevuld.\n"
-            "Ga naar de web interface of desktop app om je credentials in te stellen."
-        )
-    return value
+
+# E-mail -> wachtwoord -> inloggen -> wachten tot de loginpagina verlaten is.
+EASY4U_LOGIN_STEPS = [
+    FlowStep(
+        "email",
+        [(By.CSS_SELECTOR, "input:not([type='password']):not([type='submit']):not([type='hidden'])")],
+        action=ACTION_TYPE,
+        value="email",
+        timeout=20,
+    ),
+    FlowStep("password", [(By.CSS_SELECTOR, "input[type='password']")], action=ACTION_TYPE, value="password", timeout=5),
+    FlowStep(
+        "submit",
+        [
+            (By.CSS_SELECTOR, "input[type='submit']"),
+            (By.XPATH, "//button[contains(translate(., 'INLOGGEN', 'inloggen'), 'inloggen')]"),
+        ],
+        timeout=5,
+    ),
+    FlowStep(
+        "admin",
+        action=ACTION_WAIT,
+        # De loginpagina zelf staat onder /admin/login: enkel het verlaten van /login telt.
+        until=lambda d: "/login" not in d.current_url,
+        timeout=15,
+        optional=True,
+    ),
+]
 
 
 def _login_selenium_chrome() -> None:
@@ -49,36 +70,17 @@ def _login_selenium_chrome() -> None:
     email = get_credential_or_fail("easy4u", "email")
     password = get_credential_or_fail("easy4u", "password")
 
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-
     try:
         driver = open_url_for_service("easy4u", LOGIN_URL, new_tab=True, account_id=email)
-        wait = WebDriverWait(driver, 20)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input:not([type='password']):not([type='submit']):not([type='hidden'])")))
-
-        email_input = driver.find_element(
-            By.CSS_SELECTOR,
-            "input:not([type='password']):not([type='submit']):not([type='hidden'])",
-        )
-        clear_and_human_type(email_input, email)
-
-        pwd_input = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-        clear_and_human_type(pwd_input, password)
-
-        try:
-            login_btn = driver.find_element(By.CSS_SELECTOR, "input[type='submit']")
-        except Exception:
-            login_btn = driver.find_element(
-                By.XPATH,
-                "//button[contains(translate(., 'INLOGGEN', 'inloggen'), 'inloggen')]",
-            )
-        login_btn.click()
-
-        WebDriverWait(driver, 15).until(
-            lambda d: "/login" not in d.current_url or "admin" in d.current_url
+        result = run_flow(
+            driver,
+            EASY4U_LOGIN_STEPS,
+            service="easy4u",
+            values={"email": email, "password": password},
         )
+        if result.status == FLOW_FAILED:
+            raise RuntimeError(f"Easy4U loginpagina: stap '{result.step}' niet gevonden.")
+
         url = driver.current_url
         if "/admin" in url and "/login" not in url:
             pass
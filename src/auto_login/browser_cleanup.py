@@ -5,10 +5,15 @@ Doel:
 - Wis tool-profielen/cookies bij afsluiten van de applicatie.
 - Ook als er nog Chrome vensters open staan die door de tool zijn gestart.
 
+Bij het afsluiten wordt niets synchroon gewist: de profielmappen worden
+atomisch naar een prullenbakmap hernoemd en een losgekoppeld proces met lage
+prioriteit ruimt ze op (wat overblijft, ruimt de profiel-janitor bij de
+volgende start op).
+
 Veiligheid:
 - We raken enkel profielen aan onder de tool DATA_DIR (chrome_user_data*).
-- We proberen enkel chrome.exe processen te sluiten waarvan de CommandLine
-  een van onze tool-profielpaden bevat.
+- We sluiten enkel processen die de tool zelf startte (geregistreerde PID's)
+  of Chrome processen waarvan de CommandLine een van onze tool-profielpaden bevat.
 """
 from __future__ import annotations
 
@@ -18,13 +23,15 @@ import shutil
 import subprocess
 import sys
 from pathlib import Path
+from uuid import uuid4
 
 from src.core.credentials_manager import get_data_dir
+from src.core.env_utils import is_truthy
+from src.core.process_cleanup import register_detached_pid
+from src.core.process_tracker import find_processes_by_cmdline, kill_process_trees, kill_tracked_processes_checked
 from src.core.shutdown import register_shutdown_callback
 
-
-def _is_truthy(value: str | None) -> bool:
-    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+TRASH_DIRNAME = "browser_trash"
 
 
 def _data_dir() -> Path:
@@ -57,14 +64,21 @@ def _powershell_json(command: str) -> object:
 
 def _kill_tool_chrome_processes(profile_dirs: list[Path]) -> int:
     """
-    Kill enkel chrome.exe processen die een tool user-data-dir bevatten.
+    Kill enkel Chrome processen van de tool: de bij het starten
+    geregistreerde procesbomen. Enkel als er wezen kunnen zijn (niets
+    geregistreerd, bv. na een crash van een vorige run, of een geregistreerde
+    PID die niet meer hetzelfde proces is) volgt de trage scan naar Chrome's
+    met een tool user-data-dir in hun commandoregel.
     """
-    if sys.platform != "win32":
-        return 0
+    killed, orphans_possible = kill_tracked_processes_checked()
 
-    needles = {str(p).lower() for p in profile_dirs}
-    if not needles:
-        return 0
+    needles = [str(p).lower() for p in profile_dirs]
+    if not needles or not orphans_possible:
+        return killed
+
+    if sys.platform != "win32":
+        # Lichte /proc-doorloop; op andere platformen enkel de geregistreerde processen.
+        return killed + kill_process_trees(find_processes_by_cmdline(needles))
 
     procs = _powershell_json(
         "Get-CimInstance Win32_Process -Filter \"Name='chrome.exe'\" "
@@ -74,28 +88,29 @@ def _kill_tool_chrome_processes(profile_dirs: list[Path]) -> int:
     if isinstance(procs, dict):
         procs = [procs]
     if not isinstance(procs, list):
-        return 0
+        return killed
 
-    killed = 0
+    orphans = []
     for p in procs:
         try:
-            pid = int(p.get("ProcessId"))
             cmd = str(p.get("CommandLine") or "").lower()
-            if not cmd:
-                continue
-            if any(needle in cmd for needle in needles):
-                subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], check=False)
-                killed += 1
+            if cmd and any(needle in cmd for needle in needles):
+                orphans.append(int(p.get("ProcessId")))
         except Exception:
             continue
 
-    return killed
+    # Eén taskkill voor alle PID's in plaats van één per proces.
+    return killed + kill_process_trees(orphans)
 
 
-def clear_browser_data(*, force_kill: bool = True) -> dict:
+def clear_browser_data(*, force_kill: bool = True, include_cookie_vault: bool = True) -> dict:
     """
-    Wis alle tool browserprofielen.
+    Wis alle tool browserprofielen (en standaard ook de cookie-kluis).
     """
+    if include_cookie_vault:
+        from src.auto_login.cookie_vault import clear_cookie_vault
+        clear_cookie_vault()
+
     profile_dirs = _candidate_profile_dirs()
     if not profile_dirs:
         return {"success": True, "message": "Geen tool browserprofielen gevonden om te wissen.", "deleted": 0, "killed": 0}
@@ -129,14 +144,102 @@ def clear_browser_data(*, force_kill: bool = True) -> dict:
     }
 
 
+def trash_dir() -> Path:
+    return _data_dir() / TRASH_DIRNAME
+
+
+def move_to_trash(paths: list[Path]) -> tuple[list[Path], list[Path]]:
+    """
+    Hernoem mappen atomisch naar de prullenbakmap (zelfde schijf, dus geen
+    kopie). Geeft (verplaatst, niet gelukt) terug; dat laatste meestal omdat
+    een Chrome de map op Windows nog open heeft.
+    """
+    trash = trash_dir()
+    try:
+        trash.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        return [], list(paths)
+    moved: list[Path] = []
+    failed: list[Path] = []
+    for p in paths:
+        target = trash / f"{p.name}-{uuid4().hex[:8]}"
+        try:
+            os.replace(p, target)
+            moved.append(target)
+        except FileNotFoundError:
+            continue
+        except Exception:
+            failed.append(p)
+    return moved, failed
+
+
+def _ps_quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _spawn_detached_cleaner(paths: list[Path], kill_needles: list[Path]) -> bool:
+    """
+    Start een losgekoppeld proces met lage prioriteit dat (op Windows) eerst
+    achtergebleven tool-Chrome's sluit en daarna de mappen wist. Wacht er niet op.
+    """
+    if not paths:
+        return True
+    try:
+        if sys.platform == "win32":
+            needles = ",".join(_ps_quote(str(p).lower()) for p in kill_needles)
+            targets = ",".join(_ps_quote(str(p)) for p in paths)
+            script = (
+                f"$needles = @({needles}); $targets = @({targets}); "
+                "if ($needles.Count -gt 0) { "
+                "Get-CimInstance Win32_Process -Filter \"Name='chrome.exe'\" | ForEach-Object { "
+                "$cmd = ([string]$_.CommandLine).ToLowerInvariant(); "
+                "foreach ($n in $needles) { if ($cmd.Contains($n)) { "
+                "Stop-Process -Id $_.ProcessId -Force -ErrorAction SilentlyContinue; break } } } "
+                "Start-Sleep -Seconds 1 }; "
+                "foreach ($t in $targets) { Remove-Item -LiteralPath $t -Recurse -Force -ErrorAction SilentlyContinue }"
+            )
+            flags = (
+                subprocess.CREATE_NO_WINDOW
+                | subprocess.CREATE_NEW_PROCESS_GROUP
+                | subprocess.IDLE_PRIORITY_CLASS
+            )
+            proc = subprocess.Popen(
+                ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", script],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=flags,
+                close_fds=True,
+            )
+        else:
+            nice = shutil.which("nice")
+            command = ([nice, "-n", "19"] if nice else []) + ["rm", "-rf", "--"] + [str(p) for p in paths]
+            proc = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+                close_fds=True,
+            )
+    except Exception:
+        return False
+    register_detached_pid(proc.pid)
+    return True
+
+
 def _cleanup_on_exit() -> None:
     # Default: altijd wissen bij exit, tenzij expliciet uitgeschakeld.
-    if _is_truthy(os.environ.get("AUTO_LOGIN_PERSIST_PROFILE")):
+    if is_truthy(os.environ.get("AUTO_LOGIN_PERSIST_PROFILE")):
         return
     try:
-        clear_browser_data(force_kill=True)
+        # De (opt-in) cookie-kluis moet een herstart net overleven, dus enkel profielen.
+        profile_dirs = _candidate_profile_dirs()
+        moved, failed = move_to_trash(profile_dirs)
+        # Niet-verplaatste mappen wist de opruimer ter plaatse (na het sluiten van hun Chrome).
+        _spawn_detached_cleaner(moved + failed, kill_needles=profile_dirs)
     except Exception:
-        # No hard-fail on exit.
+        # No hard-fail on exit; de profiel-janitor ruimt de prullenbak bij de volgende start op.
         pass
 
 
@@ -11,16 +11,25 @@ import hashlib
 import logging
 import os
 import threading
+import time
+import weakref
 from pathlib import Path
 from uuid import uuid4
 
 from selenium import webdriver
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 
+from src.auto_login.chromedriver_resolver import invalidate_chromedriver_path, resolve_chromedriver_path
+from src.auto_login.profile_janitor import release_profile, track_profile
+from src.auto_login.resource_policy import apply_resource_policy, page_load_strategy
+from src.auto_login.site_data_policy import CLEAR_BEFORE_NAVIGATION, apply_site_data_policy
 from src.core.credentials_manager import get_data_dir
-from src.core.shutdown import register_shutdown_callback
+from src.core.env_utils import get_int_env, is_truthy, parse_csv_set
+from src.core.login_jobs import JOB_MANUAL, JOB_SUCCEEDED, add_job_settle_callback, attach_job_driver, driver_in_use, record_job_event
+from src.core.process_tracker import kill_process_trees, kill_tracked_processes, track_process, untrack_process
+from src.core.security_utils import url_on_host
+from src.core.shutdown import register_shutdown_callback, shutdown_event, start_thread
 from src.auto_login import browser_cleanup  # noqa: F401  (registers central shutdown cleanup)
 
 logger = logging.getLogger(__name__)
@@ -28,6 +37,47 @@ logger = logging.getLogger(__name__)
 _DRIVER_LOCK = threading.Lock()
 _SHARED_DRIVER: webdriver.Chrome | None = None
 
+# Pool van voorgestarte geïsoleerde incognito drivers voor geharde admin-logins.
+_POOL_LOCK = threading.Lock()
+# pageLoadStrategy -> warme drivers: de strategie ligt vast bij het starten van
+# Chrome, dus elke strategie heeft een eigen pool.
+_WARM_POOLS: dict[str, list[webdriver.Chrome]] = {}
+_POOL_REFILL = threading.Event()
+_POOL_THREAD: threading.Thread | None = None
+# Opt-in: een warme Chrome kost geheugen, ook als er nooit een geharde login volgt.
+_DEFAULT_WARM_POOL_SIZE = 0
+# Strategieën die de refill-thread gevuld houdt.
+_POOL_STRATEGIES: set[str] = set()
+_MAX_WARM_POOL_SIZE = 4
+
+# Eén geharde Chrome die elke admin-portal in een eigen browser context host.
+_CONTEXT_LOCK = threading.Lock()
+_CONTEXT_HOST: webdriver.Chrome | None = None
+
+# Registry van alle open browsersessies (gedeeld, geïsoleerd, account, context).
+_SESSIONS_LOCK = threading.Lock()
+_SESSIONS: dict[str, "BrowserSession"] = {}
+_DEFAULT_MAX_SESSIONS = 6
+
+# Liveness-cache: driver -> monotonic tijdstip van de laatste geslaagde controle.
+_LIVENESS_LOCK = threading.Lock()
+_LIVENESS: "weakref.WeakKeyDictionary[webdriver.Chrome, float]" = weakref.WeakKeyDictionary()
+_HEARTBEAT_THREAD: threading.Thread | None = None
+_DEFAULT_LIVENESS_TTL = 10.0
+
+# Geïsoleerd profiel per driver, zodat de janitor het na quit meteen kan wissen.
+_PROFILE_DIRS: "weakref.WeakKeyDictionary[webdriver.Chrome, Path]" = weakref.WeakKeyDictionary()
+# Geregistreerde PID's (chromedriver, Chrome) per driver voor de process tracker.
+_DRIVER_PIDS: "weakref.WeakKeyDictionary[webdriver.Chrome, list[int]]" = weakref.WeakKeyDictionary()
+# Browser context van drivers die aan de gedeelde geharde Chrome gekoppeld zijn.
+_DRIVER_CONTEXTS: "weakref.WeakKeyDictionary[webdriver.Chrome, str]" = weakref.WeakKeyDictionary()
+
+# Foutmeldingen van chromedriver die op een versie-mismatch met Chrome wijzen.
+_VERSION_MISMATCH_MARKERS = ("only supports Chrome version", "This version of ChromeDriver")
+
+# Aanmeldpagina's (IdP) waarop een login op MFA/captcha kan wachten.
+_SIGN_IN_HOSTS = ("login.microsoftonline.com", "login.live.com", "accounts.google.com")
+
 _HARDENED_ADMIN_SERVICES = {
     "microsoft_admin",
     "intune_admin",
@@ -36,17 +86,6 @@ _HARDENED_ADMIN_SERVICES = {
 }
 
 
-def _is_truthy(value: str | None) -> bool:
-    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
-
-
-def _parse_csv_set(value: str | None) -> set[str]:
-    if not value:
-        return set()
-    parts = [p.strip() for p in str(value).split(",")]
-    return {p for p in parts if p}
-
-
 def _default_user_data_dir() -> Path:
     data_dir = Path(get_data_dir())
     default_profile_dir = data_dir / "chrome_user_data"
@@ -79,8 +118,10 @@ def _build_options(
     incognito: bool = False,
     user_data_dir: str | None = None,
     profile_directory: str | None = None,
+    load_strategy: str | None = None,
 ) -> webdriver.ChromeOptions:
     options = webdriver.ChromeOptions()
+    options.page_load_strategy = load_strategy or page_load_strategy()
     options.add_argument("--start-maximized")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--disable-sync")
@@ -99,7 +140,7 @@ def _build_options(
         },
     )
 
-    if _is_truthy(os.environ.get("AUTO_LOGIN_DETACH")):
+    if is_truthy(os.environ.get("AUTO_LOGIN_DETACH")):
         options.add_experimental_option("detach", True)
 
     if user_data_dir is None:
@@ -117,11 +158,72 @@ def _build_options(
     return options
 
 
-def _driver_is_alive(driver: webdriver.Chrome | None) -> bool:
+def liveness_ttl() -> float:
+    """
+    Hoe lang (seconden) een geslaagde liveness-controle geldig blijft
+    (AUTO_LOGIN_LIVENESS_TTL, 0 = elke keer volledig controleren).
+    """
+    try:
+        return max(0.0, float(os.environ.get("AUTO_LOGIN_LIVENESS_TTL", "").strip()))
+    except Exception:
+        return _DEFAULT_LIVENESS_TTL
+
+
+def _chromedriver_running(driver: webdriver.Chrome) -> bool:
+    """Lokale controle zonder WebDriver-aanroep: draait het chromedriver-proces nog?"""
+    try:
+        process = driver.service.process
+    except Exception:
+        # Geen eigen proces (bv. remote driver): niets te zeggen.
+        return True
+    if process is None:
+        return True
+    try:
+        return process.poll() is None
+    except Exception:
+        return True
+
+
+def _mark_alive(driver: webdriver.Chrome) -> None:
+    with _LIVENESS_LOCK:
+        _LIVENESS[driver] = time.monotonic()
+
+
+def _forget_liveness(driver: webdriver.Chrome | None) -> None:
     if driver is None:
+        return
+    with _LIVENESS_LOCK:
+        _LIVENESS.pop(driver, None)
+
+
+def _liveness_fresh(driver: webdriver.Chrome) -> bool:
+    ttl = liveness_ttl()
+    if ttl <= 0:
         return False
+    with _LIVENESS_LOCK:
+        checked_at = _LIVENESS.get(driver)
+    return checked_at is not None and time.monotonic() - checked_at < ttl
+
+
+def _own_window_handles(driver: webdriver.Chrome) -> list[str]:
+    """
+    Vensters van deze driver. Een aan een browser context gekoppelde driver
+    ziet ook de vensters van andere contexts (andere logins): enkel die van de
+    eigen context tellen (Target.getTargets; het window handle is de target-id).
+    """
+    handles = driver.window_handles
+    context_id = _DRIVER_CONTEXTS.get(driver)
+    if not context_id:
+        return handles
+    targets = driver.execute_cdp_cmd("Target.getTargets", {}).get("targetInfos", [])
+    own = {t.get("targetId") for t in targets if t.get("browserContextId") == context_id}
+    return [handle for handle in handles if handle in own]
+
+
+def _probe_driver(driver: webdriver.Chrome) -> bool:
+    """Volledige controle via WebDriver; zet de driver op een open venster indien nodig."""
     try:
-        handles = driver.window_handles
+        handles = _own_window_handles(driver)
         if not handles:
             return False
         try:
@@ -136,24 +238,193 @@ def _driver_is_alive(driver: webdriver.Chrome | None) -> bool:
         return False
 
 
-def _new_driver(*, incognito: bool = False, user_data_dir: str | None = None, profile_directory: str | None = None) -> webdriver.Chrome:
-    service = ChromeService(executable_path=ChromeDriverManager().install())
-    return webdriver.Chrome(
-        options=_build_options(
-            incognito=incognito,
-            user_data_dir=user_data_dir,
-            profile_directory=profile_directory,
-        ),
-        service=service,
+def _driver_is_alive(driver: webdriver.Chrome | None) -> bool:
+    """
+    Leeft de driver nog? Een recente geslaagde controle (van een eerdere
+    aanroep of de heartbeat) wordt hergebruikt, zodat het gewone pad geen
+    extra WebDriver-aanroepen kost; enkel het chromedriver-proces wordt lokaal
+    nagekeken.
+    """
+    if driver is None:
+        return False
+    if not _chromedriver_running(driver):
+        _forget_liveness(driver)
+        return False
+    if _liveness_fresh(driver):
+        return True
+    if _probe_driver(driver):
+        _mark_alive(driver)
+        return True
+    _forget_liveness(driver)
+    return False
+
+
+def _heartbeat_targets() -> list[webdriver.Chrome]:
+    with _SESSIONS_LOCK:
+        drivers = [s.driver for s in _SESSIONS.values()]
+    host = _CONTEXT_HOST
+    if host is not None:
+        drivers.append(host)
+    return drivers
+
+
+def _heartbeat_loop() -> None:
+    while not shutdown_event.is_set():
+        ttl = liveness_ttl()
+        # Ruim binnen de geldigheid verversen; bij ttl 0 is er niets te cachen.
+        shutdown_event.wait(ttl / 2 if ttl > 0 else 5.0)
+        if shutdown_event.is_set() or ttl <= 0:
+            continue
+        for driver in _heartbeat_targets():
+            if not _chromedriver_running(driver):
+                _forget_liveness(driver)
+                continue
+            try:
+                # Lichte aanroepen zonder neveneffecten (geen vensterwissel tijdens een flow);
+                # voor een browser context tellen enkel de eigen vensters.
+                alive = bool(_own_window_handles(driver))
+            except Exception:
+                alive = False
+            if alive:
+                _mark_alive(driver)
+            else:
+                _forget_liveness(driver)
+
+
+def _start_heartbeat() -> None:
+    """Start (eenmalig) de achtergrondthread die de liveness-cache vers houdt."""
+    global _HEARTBEAT_THREAD
+    if liveness_ttl() <= 0 or shutdown_event.is_set():
+        return
+    with _LIVENESS_LOCK:
+        if _HEARTBEAT_THREAD is None or not _HEARTBEAT_THREAD.is_alive():
+            _HEARTBEAT_THREAD = threading.Thread(target=_heartbeat_loop, daemon=True, name="browser-heartbeat")
+            start_thread(_HEARTBEAT_THREAD)
+
+
+def _new_driver(
+    *,
+    incognito: bool = False,
+    user_data_dir: str | None = None,
+    profile_directory: str | None = None,
+    service: str | None = None,
+    load_strategy: str | None = None,
+) -> webdriver.Chrome:
+    options = _build_options(
+        incognito=incognito,
+        user_data_dir=user_data_dir,
+        profile_directory=profile_directory,
+        load_strategy=load_strategy or page_load_strategy(service),
     )
+    return _start_chrome(options)
+
+
+def _is_version_mismatch(exc: SessionNotCreatedException) -> bool:
+    """Enkel een chromedriver/Chrome versie-mismatch; een vergrendeld profiel of gecrashte Chrome niet."""
+    message = str(getattr(exc, "msg", None) or exc)
+    return any(marker in message for marker in _VERSION_MISMATCH_MARKERS)
+
+
+def _start_chrome(options: webdriver.ChromeOptions) -> webdriver.Chrome:
+    try:
+        chrome_service = ChromeService(executable_path=resolve_chromedriver_path())
+        driver = webdriver.Chrome(options=options, service=chrome_service)
+    except SessionNotCreatedException as exc:
+        if not _is_version_mismatch(exc):
+            raise
+        # Versie-mismatch na een Chrome-update: chromedriver opnieuw bepalen.
+        invalidate_chromedriver_path()
+        chrome_service = ChromeService(executable_path=resolve_chromedriver_path(force=True))
+        driver = webdriver.Chrome(options=options, service=chrome_service)
+    # Een via debuggerAddress gekoppelde driver deelt de Chrome van de host: enkel zijn chromedriver volgen.
+    _track_driver_processes(driver, include_browser=not options.debugger_address)
+    return driver
+
+
+def _track_driver_processes(driver: webdriver.Chrome, *, include_browser: bool = True) -> None:
+    pids = []
+    try:
+        pid = int(driver.service.process.pid)
+        track_process(pid, "chromedriver")
+        pids.append(pid)
+    except Exception:
+        pass
+    if include_browser:
+        try:
+            info = driver.execute_cdp_cmd("SystemInfo.getProcessInfo", {})
+            for process in info.get("processInfo", []):
+                if process.get("type") == "browser":
+                    track_process(int(process["id"]), "chrome")
+                    pids.append(int(process["id"]))
+        except Exception:
+            # Oudere Chrome: de browser hangt onder chromedriver en valt mee in diens procesboom.
+            pass
+    _DRIVER_PIDS[driver] = pids
+
+
+def _new_isolated_driver(
+    *,
+    incognito: bool,
+    service: str | None = None,
+    load_strategy: str | None = None,
+) -> webdriver.Chrome:
+    """Start Chrome op een vers geïsoleerd profiel; de janitor wist het zodra Chrome weg is."""
+    isolated_dir = _isolated_user_data_dir(incognito=incognito)
+    try:
+        driver = _new_driver(
+            incognito=incognito,
+            user_data_dir=str(isolated_dir),
+            profile_directory="",
+            service=service,
+            load_strategy=load_strategy,
+        )
+    except Exception:
+        release_profile(isolated_dir)
+        raise
+    _PROFILE_DIRS[driver] = isolated_dir
+    track_profile(isolated_dir, lambda: _browser_running(driver))
+    return driver
+
+
+def _browser_running(driver: webdriver.Chrome) -> bool:
+    """Probe voor de janitor: zonder vensterwissel, zodat een lopende flow niet gestoord wordt."""
+    if not _chromedriver_running(driver):
+        return False
+    if _liveness_fresh(driver):
+        return True
+    try:
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+def _quit_driver(driver: webdriver.Chrome | None) -> None:
+    """Sluit een driver en geef zijn geïsoleerde profiel (indien aanwezig) vrij."""
+    if driver is None:
+        return
+    _forget_liveness(driver)
+    try:
+        driver.quit()
+        quit_ok = True
+    except Exception:
+        quit_ok = False
+    # Enkel PID's die nog bij dezelfde processen horen (geen hergebruikte PID's).
+    pids = [pid for pid in _DRIVER_PIDS.pop(driver, []) if untrack_process(pid)]
+    if not quit_ok:
+        # Driver reageert niet meer: zijn processen rechtstreeks sluiten.
+        kill_process_trees(pids)
+    release_profile(_PROFILE_DIRS.pop(driver, None))
+    _DRIVER_CONTEXTS.pop(driver, None)
 
 
 def _open_new_tab(driver: webdriver.Chrome, url: str) -> None:
     try:
         driver.switch_to.new_window("tab")
     except Exception:
+        before = set(driver.window_handles)
         driver.execute_script("window.open('about:blank', '_blank');")
-        driver.switch_to.window(driver.window_handles[-1])
+        opened = [handle for handle in _own_window_handles(driver) if handle not in before]
+        driver.switch_to.window(opened[-1] if opened else _own_window_handles(driver)[-1])
     driver.get(url)
 
 
@@ -161,27 +432,211 @@ def _log_session_event(event: str, session_type: str) -> None:
     message = f"{event} {session_type}"
     logger.info(message)
     print(message)
+    record_job_event(event, session_type)
+
+
+class BrowserSession:
+    """Eén door de tool geopende browsersessie."""
+
+    def __init__(
+        self,
+        driver: webdriver.Chrome,
+        kind: str,
+        service: str | None = None,
+        account_id: str | None = None,
+        context_id: str | None = None,
+        fresh_profile: bool = False,
+    ) -> None:
+        self.id = uuid4().hex
+        self.driver = driver
+        self.kind = kind
+        self.service = service
+        self.account_id = account_id
+        self.context_id = context_id
+        # Vers profiel (geïsoleerd, context of nieuw accountprofiel): geen site-data om te wissen.
+        self.fresh_profile = fresh_profile
+        self.launched_at = time.time()
+        self.last_used = self.launched_at
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "service": self.service or "",
+            "account": self.account_id or "",
+            "launched_at": self.launched_at,
+            "last_used": self.last_used,
+            "busy": driver_in_use(self.driver),
+        }
+
+
+def max_sessions() -> int:
+    """Maximaal aantal gelijktijdige browsersessies (AUTO_LOGIN_MAX_SESSIONS, 0 = onbeperkt)."""
+    return max(0, get_int_env("AUTO_LOGIN_MAX_SESSIONS", _DEFAULT_MAX_SESSIONS))
+
+
+def _register_session(
+    driver: webdriver.Chrome,
+    kind: str,
+    service: str | None = None,
+    context_id: str | None = None,
+    *,
+    fresh_profile: bool = False,
+) -> BrowserSession:
+    session = BrowserSession(driver, kind, service=service, context_id=context_id, fresh_profile=fresh_profile)
+    with _SESSIONS_LOCK:
+        _SESSIONS[session.id] = session
+    _mark_alive(driver)
+    _start_heartbeat()
+    return session
+
+
+def _find_session(driver: webdriver.Chrome) -> BrowserSession | None:
+    with _SESSIONS_LOCK:
+        return next((s for s in _SESSIONS.values() if s.driver is driver), None)
+
+
+def profile_is_fresh(driver: webdriver.Chrome) -> bool:
+    """True als de sessie op een vers profiel draait (onbekende drivers tellen als hergebruikt)."""
+    session = _find_session(driver)
+    return bool(session and session.fresh_profile)
+
+
+def clear_service_site_data(driver: webdriver.Chrome, service: str) -> bool:
+    """Pas de site-data policy van de service toe op een open sessie; True als er gewist werd."""
+    return apply_site_data_policy(driver, service, fresh_profile=profile_is_fresh(driver))
+
+
+def touch_session(driver: webdriver.Chrome) -> None:
+    """
+    Markeer een sessie als net gebruikt (voor LRU-eviction): bij openen,
+    hergebruik, focussen en wanneer de login-job die haar gebruikt afloopt.
+    """
+    session = _find_session(driver)
+    if session is not None:
+        session.last_used = time.time()
+
+
+def _close_session(session: BrowserSession, event: str = "SESSION_QUIT") -> None:
+    """Enige weg om een sessie te laten vallen: profiel, PID's en liveness worden mee opgeruimd."""
+    global _SHARED_DRIVER
+    with _SESSIONS_LOCK:
+        _SESSIONS.pop(session.id, None)
+    if session.kind == "normal":
+        with _DRIVER_LOCK:
+            if _SHARED_DRIVER is session.driver:
+                _SHARED_DRIVER = None
+    if session.context_id:
+        host = _CONTEXT_HOST
+        try:
+            # Sluit de vensters van de context en wist zijn cookies/storage.
+            if host is not None:
+                host.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": session.context_id})
+        except Exception:
+            pass
+    _quit_driver(session.driver)
+    _log_session_event(event, session.kind)
+
+
+def _drop_dead_shared_driver() -> None:
+    """Ruim een gedeelde driver op waarvan de browser weg is (sessie, profiel en PID's)."""
+    global _SHARED_DRIVER
+    with _DRIVER_LOCK:
+        driver = _SHARED_DRIVER
+    # Probe buiten de lock (kan WebDriver-round-trips kosten); daarna nagaan of
+    # een andere thread de driver intussen niet al verving of opruimde.
+    if driver is None or _driver_is_alive(driver):
+        return
+    with _DRIVER_LOCK:
+        if _SHARED_DRIVER is not driver:
+            return
+        _SHARED_DRIVER = None
+    session = _find_session(driver)
+    if session is not None:
+        _close_session(session, "SESSION_LOST")
+    else:
+        _quit_driver(driver)
+
+
+def _make_room_for_session() -> None:
+    """
+    Houd het aantal sessies onder AUTO_LOGIN_MAX_SESSIONS: sluit eerst dode
+    sessies, dan de langst ongebruikte sessie zonder lopende login.
+    """
+    limit = max_sessions()
+    if limit <= 0:
+        return
+    with _SESSIONS_LOCK:
+        sessions = sorted(_SESSIONS.values(), key=lambda s: s.last_used)
+    if len(sessions) < limit:
+        return
+
+    for session in [s for s in sessions if not _driver_is_alive(s.driver)]:
+        _close_session(session, "SESSION_LOST")
+        sessions.remove(session)
+
+    while len(sessions) >= limit:
+        idle = next((s for s in sessions if not driver_in_use(s.driver)), None)
+        if idle is None:
+            logger.warning("Maximum van %s browsersessies bereikt, maar alle sessies zijn bezig.", limit)
+            return
+        sessions.remove(idle)
+        _log_session_event("SESSION_EVICTED", f"{idle.kind} {idle.service or ''}".strip())
+        _close_session(idle)
+
+
+def list_sessions() -> list[dict]:
+    """Open browsersessies (dode sessies worden meteen opgeruimd)."""
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+    result = []
+    for session in sessions:
+        if _driver_is_alive(session.driver):
+            result.append(session.to_dict())
+        else:
+            _close_session(session, "SESSION_LOST")
+    return sorted(result, key=lambda s: s["launched_at"])
+
+
+def close_session(session_id: str) -> bool:
+    """Sluit één browsersessie; False als die niet (meer) bestaat."""
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(session_id)
+    if session is None:
+        return False
+    _close_session(session)
+    return True
 
 
 def incognito_for_service(service: str) -> bool:
-    if _is_truthy(os.environ.get("AUTO_LOGIN_INCOGNITO")):
+    if is_truthy(os.environ.get("AUTO_LOGIN_INCOGNITO")):
         return True
-    incognito = _parse_csv_set(os.environ.get("AUTO_LOGIN_INCOGNITO_SERVICES"))
+    incognito = parse_csv_set(os.environ.get("AUTO_LOGIN_INCOGNITO_SERVICES"))
     return service in incognito
 
 
 def hardened_admin_session(service: str) -> bool:
-    return service in _HARDENED_ADMIN_SERVICES and not _is_truthy(os.environ.get("AUTO_LOGIN_DISABLE_ADMIN_HARDENING"))
+    return service in _HARDENED_ADMIN_SERVICES and not is_truthy(os.environ.get("AUTO_LOGIN_DISABLE_ADMIN_HARDENING"))
 
 
 def get_shared_driver() -> webdriver.Chrome:
     """Return the reusable normal Chrome driver, creating it if needed."""
     global _SHARED_DRIVER
     with _DRIVER_LOCK:
-        if _driver_is_alive(_SHARED_DRIVER):
-            _log_session_event("SESSION_REUSED", "normal")
+        driver = _SHARED_DRIVER
+    # Liveness buiten de lock: een verlopen cache mag andere logins niet laten wachten.
+    if _driver_is_alive(driver):
+        _log_session_event("SESSION_REUSED", "normal")
+        return driver
+
+    # Buiten de lock: eviction en opruimen sluiten zelf de gedeelde sessie.
+    _drop_dead_shared_driver()
+    _make_room_for_session()
+    with _DRIVER_LOCK:
+        # Nog gezet: door _drop_dead_shared_driver levend bevonden of net door
+        # een andere thread gestart.
+        if _SHARED_DRIVER is not None:
             return _SHARED_DRIVER
-
         try:
             _SHARED_DRIVER = _new_driver()
         except WebDriverException as e:
@@ -190,6 +645,7 @@ def get_shared_driver() -> webdriver.Chrome:
                 "Sluit Chrome-vensters die door de tool zijn geopend en probeer opnieuw."
             ) from e
 
+        _register_session(_SHARED_DRIVER, "normal")
         _log_session_event("SESSION_CREATED", "normal")
         return _SHARED_DRIVER
 
@@ -197,30 +653,236 @@ def get_shared_driver() -> webdriver.Chrome:
 def open_url_in_shared_session(url: str, *, new_tab: bool = True) -> webdriver.Chrome:
     """Open a URL in the reusable normal Chrome session."""
     driver = get_shared_driver()
-    if new_tab and _driver_is_alive(driver):
+    if new_tab:
         try:
             _open_new_tab(driver, url)
         except Exception:
+            # Het actieve tabblad kan intussen gesloten zijn: volledig controleren
+            # (zet de driver op een open venster) en opnieuw proberen.
+            _forget_liveness(driver)
+            if _driver_is_alive(driver):
+                try:
+                    _open_new_tab(driver, url)
+                    return driver
+                except Exception:
+                    pass
             driver.get(url)
     else:
         driver.get(url)
     return driver
 
 
-def open_url_in_isolated_session(url: str, *, incognito: bool = False) -> webdriver.Chrome:
+def warm_pool_size() -> int:
+    """Aantal voorgestarte incognito drivers per pageLoadStrategy (AUTO_LOGIN_WARM_POOL_SIZE, standaard 0 = uit)."""
+    size = get_int_env("AUTO_LOGIN_WARM_POOL_SIZE", _DEFAULT_WARM_POOL_SIZE)
+    return max(0, min(size, _MAX_WARM_POOL_SIZE))
+
+
+def _new_warm_driver(strategy: str) -> webdriver.Chrome:
+    driver = _new_isolated_driver(incognito=True, load_strategy=strategy)
+    try:
+        # Wachtende vensters uit de weg houden tot ze uitgedeeld worden.
+        driver.minimize_window()
+    except Exception:
+        pass
+    return driver
+
+
+def _refill_warm_pool() -> None:
+    while not shutdown_event.is_set():
+        _POOL_REFILL.wait(timeout=1.0)
+        if shutdown_event.is_set():
+            break
+        _POOL_REFILL.clear()
+
+        while not shutdown_event.is_set():
+            with _POOL_LOCK:
+                strategy = next(
+                    (
+                        strategy
+                        for strategy in sorted(_POOL_STRATEGIES)
+                        if len(_WARM_POOLS.get(strategy, [])) < warm_pool_size()
+                    ),
+                    None,
+                )
+            if strategy is None:
+                break
+            try:
+                driver = _new_warm_driver(strategy)
+            except Exception as exc:
+                logger.warning("Kon warme Chrome-sessie niet starten: %s", exc)
+                break
+
+            with _POOL_LOCK:
+                if not shutdown_event.is_set():
+                    _WARM_POOLS.setdefault(strategy, []).append(driver)
+                    driver = None
+            if driver is not None:
+                _quit_driver(driver)
+                break
+            _log_session_event("SESSION_PREWARMED", "isolated-incognito")
+
+
+def start_driver_pool(service: str | None = None) -> None:
+    """
+    Start (eenmalig) de achtergrondthread die de warme pools gevuld houdt.
+    Zonder `service` (bij het opstarten) wordt de pool van de geharde
+    admin-logins gevuld; met `service` komt ook de pool van diens
+    pageLoadStrategy erbij. Bestaande pools blijven staan.
+    """
+    global _POOL_THREAD
+    if warm_pool_size() <= 0 or shutdown_event.is_set():
+        return
+    services = [service] if service else sorted(_HARDENED_ADMIN_SERVICES)
+    with _POOL_LOCK:
+        _POOL_STRATEGIES.update(page_load_strategy(name) for name in services)
+        if _POOL_THREAD is None or not _POOL_THREAD.is_alive():
+            _POOL_THREAD = threading.Thread(target=_refill_warm_pool, daemon=True, name="browser-warm-pool")
+            start_thread(_POOL_THREAD)
+    _POOL_REFILL.set()
+
+
+def _take_warm_driver(service: str | None = None) -> webdriver.Chrome | None:
+    """Een warme driver met dezelfde pageLoadStrategy als de service, of None."""
+    strategy = page_load_strategy(service)
+    while True:
+        with _POOL_LOCK:
+            pool = _WARM_POOLS.get(strategy)
+            driver = pool.pop(0) if pool else None
+        if driver is None:
+            return None
+        if _driver_is_alive(driver):
+            try:
+                driver.maximize_window()
+            except Exception:
+                pass
+            return driver
+        _quit_driver(driver)
+
+
+def _drain_warm_pool() -> None:
+    with _POOL_LOCK:
+        drivers = [driver for pool in _WARM_POOLS.values() for driver in pool]
+        _WARM_POOLS.clear()
+    for driver in drivers:
+        _quit_driver(driver)
+
+
+def open_url_in_isolated_session(url: str, *, incognito: bool = False, service: str | None = None) -> webdriver.Chrome:
     """Open a URL in a fresh isolated Chrome instance."""
-    isolated_dir = _isolated_user_data_dir(incognito=incognito)
-    driver = _new_driver(incognito=incognito, user_data_dir=str(isolated_dir), profile_directory="")
-    _log_session_event("SESSION_CREATED", "isolated-incognito" if incognito else "isolated")
+    _make_room_for_session()
+    kind = "isolated-incognito" if incognito else "isolated"
+    driver = _take_warm_driver(service) if incognito and warm_pool_size() > 0 else None
+    if driver is not None:
+        _log_session_event("SESSION_CREATED", "isolated-incognito-warm")
+    else:
+        driver = _new_isolated_driver(incognito=incognito, service=service)
+        _log_session_event("SESSION_CREATED", kind)
+    _register_session(driver, kind, service, fresh_profile=True)
+    if incognito:
+        # Pool bijvullen zodat de volgende geharde login meteen een warme driver krijgt.
+        start_driver_pool(service)
+    apply_resource_policy(driver, service)
+    driver.get(url)
+    return driver
+
+
+def admin_isolation_mode() -> str:
+    """
+    "process" (standaard): elke geharde admin-login een eigen Chrome.
+    "context": één Chrome, elke login in een eigen incognito browser context.
+    """
+    mode = (os.environ.get("AUTO_LOGIN_ADMIN_ISOLATION") or "").strip().lower()
+    return "context" if mode == "context" else "process"
+
+
+def _get_context_host() -> webdriver.Chrome:
+    global _CONTEXT_HOST
+    with _CONTEXT_LOCK:
+        if _CONTEXT_HOST is not None and _driver_is_alive(_CONTEXT_HOST):
+            return _CONTEXT_HOST
+        _CONTEXT_HOST = _new_isolated_driver(incognito=False)
+        try:
+            # Het lege startvenster van de host is niet nodig.
+            _CONTEXT_HOST.minimize_window()
+        except Exception:
+            pass
+        _mark_alive(_CONTEXT_HOST)
+        _log_session_event("SESSION_CREATED", "context-host")
+        return _CONTEXT_HOST
+
+
+def open_url_in_browser_context(url: str, *, service: str | None = None) -> webdriver.Chrome:
+    """
+    Open a URL in a new incognito browser context of the shared hardened
+    Chrome. Every context has its own cookies/storage (same isolation as a
+    separate incognito Chrome); a second chromedriver session attaches to the
+    same browser so each login keeps its own WebDriver "current window".
+    """
+    _make_room_for_session()
+    host = _get_context_host()
+    context_id = host.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+    driver = None
+    try:
+        target_id = host.execute_cdp_cmd(
+            "Target.createTarget",
+            {"url": "about:blank", "browserContextId": context_id, "newWindow": True},
+        )["targetId"]
+        options = webdriver.ChromeOptions()
+        options.debugger_address = host.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        options.page_load_strategy = page_load_strategy(service)
+        driver = _start_chrome(options)
+        _DRIVER_CONTEXTS[driver] = context_id
+        driver.switch_to.window(target_id)
+    except Exception:
+        # Geen sessie om de context later op te ruimen: nu sluiten (vensters, cookies, storage).
+        try:
+            host.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception:
+            pass
+        _quit_driver(driver)
+        raise
+    try:
+        driver.maximize_window()
+    except Exception:
+        pass
+    _register_session(driver, "browser-context", service, context_id=context_id, fresh_profile=True)
+    _log_session_event("SESSION_CREATED", "browser-context")
+
+    apply_resource_policy(driver, service)
     driver.get(url)
     return driver
 
 
+def _quit_context_host() -> None:
+    global _CONTEXT_HOST
+    with _CONTEXT_LOCK:
+        host = _CONTEXT_HOST
+        _CONTEXT_HOST = None
+    _quit_driver(host)
+
+
+def _open_hardened_admin_session(url: str, service: str) -> webdriver.Chrome:
+    if admin_isolation_mode() == "context":
+        try:
+            return open_url_in_browser_context(url, service=service)
+        except Exception as exc:
+            # Bv. oudere Chrome/chromedriver zonder context-ondersteuning via CDP.
+            logger.warning("Browser context niet beschikbaar, aparte Chrome wordt gestart: %s", exc)
+    return open_url_in_isolated_session(url, incognito=True, service=service)
+
+
 def open_url_in_account_session(service: str, url: str, account_id: str, *, incognito: bool = False) -> webdriver.Chrome:
     """Open a URL in a stable isolated Chrome profile for one account."""
+    _make_room_for_session()
     profile_dir = _account_profile_dir(service, account_id)
-    driver = _new_driver(incognito=incognito, user_data_dir=str(profile_dir), profile_directory="")
+    # Chrome maakt "Default" aan bij het eerste gebruik van een profiel.
+    fresh_profile = not (profile_dir / "Default").exists()
+    driver = _new_driver(incognito=incognito, user_data_dir=str(profile_dir), profile_directory="", service=service)
+    _register_session(driver, "account", service, fresh_profile=fresh_profile)
     _log_session_event("SESSION_CREATED", f"account-{service}")
+    apply_resource_policy(driver, service)
+    apply_site_data_policy(driver, service, fresh_profile=fresh_profile, moment=CLEAR_BEFORE_NAVIGATION)
     driver.get(url)
     return driver
 
@@ -236,7 +898,7 @@ def _requires_account_isolation(service: str) -> bool:
     }
 
 
-def open_url_for_service(
+def _open_url_for_service(
     service: str,
     url: str,
     *,
@@ -244,20 +906,12 @@ def open_url_for_service(
     account_id: str | None = None,
     incognito: bool | None = None,
 ) -> webdriver.Chrome:
-    """
-    Open a URL according to the service strategy.
-
-    Admin portals default to fresh isolated incognito sessions. Account-sensitive
-    services get per-account profiles when not using explicit incognito.
-    """
-    global _SHARED_DRIVER
-
     if hardened_admin_session(service):
-        return open_url_in_isolated_session(url, incognito=True)
+        return _open_hardened_admin_session(url, service)
 
     use_incognito = incognito_for_service(service) if incognito is None else incognito
     if use_incognito:
-        return open_url_in_isolated_session(url, incognito=True)
+        return open_url_in_isolated_session(url, incognito=True, service=service)
 
     if account_id and _requires_account_isolation(service):
         return open_url_in_account_session(service, url, account_id, incognito=False)
@@ -266,21 +920,90 @@ def open_url_for_service(
         return open_url_in_shared_session(url, new_tab=new_tab)
     except Exception:
         with _DRIVER_LOCK:
-            _SHARED_DRIVER = None
+            # Gecachte liveness kan achterlopen op een net gesloten browser.
+            _forget_liveness(_SHARED_DRIVER)
+        _drop_dead_shared_driver()
         return open_url_in_shared_session(url, new_tab=new_tab)
 
 
+def open_url_for_service(
+    service: str,
+    url: str,
+    *,
+    new_tab: bool = True,
+    account_id: str | None = None,
+    incognito: bool | None = None,
+) -> webdriver.Chrome:
+    """
+    Open a URL according to the service strategy.
+
+    Admin portals default to fresh isolated incognito sessions. Account-sensitive
+    services get per-account profiles when not using explicit incognito.
+    """
+    driver = _open_url_for_service(service, url, new_tab=new_tab, account_id=account_id, incognito=incognito)
+    session = _find_session(driver)
+    if session is not None:
+        touch_session(driver)
+        if session.kind != "normal":
+            session.account_id = account_id
+    # Koppel het venster aan de lopende login-job zodat een tweede klik het kan focussen.
+    try:
+        handle = driver.current_window_handle
+    except Exception:
+        attach_job_driver(driver)
+    else:
+        attach_job_driver(driver, handle, lambda: _login_window_state(driver, handle))
+    # Einde van de login telt als laatste gebruik, niet het openen.
+    add_job_settle_callback(lambda _state: touch_session(driver))
+    return driver
+
+
+def _login_window_state(driver: webdriver.Chrome, window_handle: str) -> str | None:
+    """
+    Jobstatus van een loginvenster na afloop van de loginfunctie: JOB_MANUAL
+    zolang het nog op een aanmeldpagina staat (MFA/captcha), JOB_SUCCEEDED als
+    het verder is (portaal), None als het venster weg is. Leest de URL via
+    Target.getTargets (target-id = window handle), zonder van venster te wisselen.
+    """
+    targets = driver.execute_cdp_cmd("Target.getTargets", {}).get("targetInfos", [])
+    target = next((t for t in targets if t.get("targetId") == window_handle), None)
+    if target is None:
+        return None
+    return JOB_MANUAL if url_on_host(target.get("url"), *_SIGN_IN_HOSTS) else JOB_SUCCEEDED
+
+
+def focus_driver_window(driver: webdriver.Chrome | None, window_handle: str | None = None) -> bool:
+    """Breng het browservenster van een lopende login naar voren; False als het weg is."""
+    if not _driver_is_alive(driver):
+        return False
+    try:
+        if window_handle and window_handle in driver.window_handles:
+            driver.switch_to.window(window_handle)
+        # Minimaliseren + maximaliseren is de enige betrouwbare manier om het venster naar voren te halen.
+        driver.minimize_window()
+        driver.maximize_window()
+        touch_session(driver)
+        return True
+    except Exception:
+        return False
+
+
 def quit_all_sessions() -> None:
     global _SHARED_DRIVER
+    _drain_warm_pool()
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+    for session in sessions:
+        _close_session(session)
+    _quit_context_host()
     with _DRIVER_LOCK:
         driver = _SHARED_DRIVER
         _SHARED_DRIVER = None
     if driver is not None:
-        try:
-            driver.quit()
-            _log_session_event("SESSION_QUIT", "normal")
-        except Exception:
-            pass
+        _quit_driver(driver)
+        _log_session_event("SESSION_QUIT", "normal")
+    # Wees-processen (bv. een Chrome die quit overleefde) rechtstreeks via hun PID sluiten.
+    kill_tracked_processes()
 
 
 register_shutdown_callback("browser_sessions", quit_all_sessions)
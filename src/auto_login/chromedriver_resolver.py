@@ -0,0 +1,213 @@
+"""
+Eenmalige resolutie van het chromedriver pad.
+
+ChromeDriverManager().install() doet versie-detectie, bestandscontroles en
+soms een netwerk-lookup. Dat gebeurt hier één keer (in een achtergrondthread
+bij opstart); het resultaat wordt samen met de Chrome-versie in de datamap
+bewaard. Volgende starts valideren enkel via stat en de Chrome-versie, zodat
+herhaalde logins en offline starts webdriver_manager volledig overslaan.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from src.core.credentials_manager import get_data_dir, write_json_atomic
+from src.core.shutdown import start_thread
+
+logger = logging.getLogger(__name__)
+
+_CACHE_FILENAME = "chromedriver_cache.json"
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+_RESOLVE_LOCK = threading.Lock()
+_RESOLVED_PATH: str | None = None
+# Lopende resolutie (gezet zolang één thread detecteert/downloadt) en of die geforceerd is.
+_INFLIGHT: threading.Event | None = None
+_INFLIGHT_FORCED = False
+_RESOLVER_THREAD: threading.Thread | None = None
+
+
+def _cache_file() -> Path:
+    return Path(get_data_dir()) / _CACHE_FILENAME
+
+
+def _major(version: str | None) -> str:
+    return (version or "").split(".", 1)[0]
+
+
+def _chrome_version_from_registry() -> str | None:
+    try:
+        import winreg
+    except ImportError:
+        return None
+    for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            with winreg.OpenKey(hive, r"Software\Google\Chrome\BLBeacon") as key:
+                value, _ = winreg.QueryValueEx(key, "version")
+                if value:
+                    return str(value)
+        except OSError:
+            continue
+    return None
+
+
+def _chrome_version_from_binary() -> str | None:
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        binary = shutil.which(name)
+        if not binary:
+            continue
+        try:
+            out = subprocess.run(
+                [binary, "--version"],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                check=False,
+            ).stdout
+        except Exception:
+            continue
+        match = _VERSION_RE.search(out or "")
+        if match:
+            return match.group(0)
+    return None
+
+
+def detect_chrome_version() -> str | None:
+    """Geïnstalleerde Chrome-versie, of None als die niet goedkoop te bepalen is."""
+    if sys.platform == "win32":
+        return _chrome_version_from_registry()
+    return _chrome_version_from_binary()
+
+
+def _load_cache() -> dict:
+    try:
+        with open(_cache_file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _cached_path_if_valid(chrome_version: str | None) -> str | None:
+    cache = _load_cache()
+    driver_path = cache.get("driver_path")
+    if not driver_path:
+        return None
+    try:
+        st = os.stat(driver_path)
+    except OSError:
+        return None
+    if st.st_size != cache.get("driver_size"):
+        return None
+    # Onbekende Chrome-versie (bv. detectie faalt): vertrouw de cache.
+    if chrome_version and _major(chrome_version) != _major(cache.get("chrome_version")):
+        return None
+    return driver_path
+
+
+def _install() -> str:
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def _persist(driver_path: str, chrome_version: str | None) -> None:
+    try:
+        write_json_atomic(
+            _cache_file(),
+            {
+                "driver_path": driver_path,
+                "driver_size": os.stat(driver_path).st_size,
+                "chrome_version": chrome_version or "",
+            },
+        )
+    except Exception as exc:
+        logger.warning("Kon chromedriver cache niet bewaren: %s", exc)
+
+
+def _resolve(force: bool) -> str:
+    chrome_version = detect_chrome_version()
+    driver_path = None if force else _cached_path_if_valid(chrome_version)
+    if driver_path:
+        logger.info("CHROMEDRIVER_CACHED %s", driver_path)
+        return driver_path
+    driver_path = _install()
+    _persist(driver_path, chrome_version)
+    logger.info("CHROMEDRIVER_RESOLVED %s", driver_path)
+    return driver_path
+
+
+def resolve_chromedriver_path(*, force: bool = False) -> str:
+    """
+    Geef het chromedriver pad terug; webdriver_manager wordt enkel gebruikt
+    als er geen geldige cache is of de Chrome-versie gewijzigd is.
+
+    Er loopt hoogstens één resolutie tegelijk: andere aanroepers wachten op
+    dezelfde in-flight resolutie in plaats van zelf te downloaden. De lock
+    wordt enkel vastgehouden om die resolutie te claimen en het resultaat te
+    publiceren, nooit tijdens versiedetectie of download.
+    """
+    global _RESOLVED_PATH, _INFLIGHT, _INFLIGHT_FORCED
+    while True:
+        with _RESOLVE_LOCK:
+            if _RESOLVED_PATH and not force:
+                return _RESOLVED_PATH
+            inflight = _INFLIGHT
+            owner = inflight is None
+            if owner:
+                inflight = _INFLIGHT = threading.Event()
+                _INFLIGHT_FORCED = force
+            else:
+                # Een geforceerde aanvraag neemt enkel een geforceerde resolutie over.
+                accept = _INFLIGHT_FORCED or not force
+
+        if not owner:
+            inflight.wait()
+            with _RESOLVE_LOCK:
+                if _RESOLVED_PATH and accept:
+                    return _RESOLVED_PATH
+            # Mislukt of niet geforceerd: opnieuw proberen (en zo nodig zelf resolven).
+            continue
+
+        driver_path = None
+        try:
+            driver_path = _resolve(force)
+            return driver_path
+        finally:
+            with _RESOLVE_LOCK:
+                if driver_path:
+                    _RESOLVED_PATH = driver_path
+                _INFLIGHT = None
+            inflight.set()
+
+
+def invalidate_chromedriver_path() -> None:
+    """Vergeet het in-process pad (bv. na een versie-mismatch bij het starten)."""
+    global _RESOLVED_PATH
+    with _RESOLVE_LOCK:
+        _RESOLVED_PATH = None
+
+
+def _resolve_in_background() -> None:
+    try:
+        resolve_chromedriver_path()
+    except Exception as exc:
+        logger.warning("Chromedriver kon niet vooraf bepaald worden: %s", exc)
+
+
+def start_chromedriver_resolver() -> None:
+    """Bepaal het chromedriver pad eenmalig in de achtergrond bij opstart."""
+    global _RESOLVER_THREAD
+    with _RESOLVE_LOCK:
+        if _RESOLVED_PATH or (_RESOLVER_THREAD is not None and _RESOLVER_THREAD.is_alive()):
+            return
+        _RESOLVER_THREAD = threading.Thread(target=_resolve_in_background, daemon=True, name="chromedriver-resolver")
+        start_thread(_RESOLVER_THREAD)
@@ -0,0 +1,264 @@
+"""
+Versleutelde cookie-kluis om volledige logins over te slaan (opt-in).
+
+Zodra de browser na de login stabiel op de portal-host staat (ook als de
+gebruiker eerst nog MFA afrondde), worden de cookies via
+CDP `Network.getAllCookies` opgehaald en met de bestaande Fernet-sleutel
+versleuteld in cookie_vault.json in de datamap bewaard, met een vervaltijd.
+Bij de volgende login voor dezelfde service/account worden ze vóór de eerste
+navigatie (op about:blank) via `Network.setCookies` teruggezet en volstaat één lichte controle (komt de
+portal-URL zonder omweg langs de loginpagina binnen?). Faalt die controle,
+dan wordt de kluis-entry verwijderd en loopt de volledige flow.
+
+Configuratie:
+- AUTO_LOGIN_COOKIE_VAULT=1 schakelt de kluis in (standaard uit)
+- AUTO_LOGIN_COOKIE_VAULT_SERVICES: optioneel beperken, bv. "azure_admin,intune_admin"
+- AUTO_LOGIN_COOKIE_VAULT_TTL_HOURS: maximale bewaartijd (standaard 8 uur)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.core.credentials_manager import get_data_dir, get_fernet, write_json_atomic
+from src.core.env_utils import is_truthy, parse_csv_set
+from src.core.login_jobs import record_job_event
+from src.core.security_utils import url_on_host
+from src.core.shutdown import shutdown_event, start_thread
+
+logger = logging.getLogger(__name__)
+
+# Zelfde scripts_dir als de web interface: bij de legacy key file in de projectmap
+# encrypteert de kluis zo met dezelfde sleutel als credentials.json.
+SCRIPTS_DIR = Path(__file__).parent.parent.parent
+
+_VAULT_FILENAME = "cookie_vault.json"
+_DEFAULT_TTL_HOURS = 8.0
+_PROBE_TIMEOUT = 8.0
+_PROBE_STABLE_SECONDS = 2.0
+# Hoe lang na de start van de login op de portal gewacht wordt om cookies te bewaren (MFA inbegrepen).
+_CAPTURE_WINDOW = 15 * 60
+_CAPTURE_POLL = 1.0
+
+# Host waarop de service na een geslaagde login uitkomt.
+SERVICE_AUTHENTICATED_HOSTS = {
+    "microsoft_admin": "admin.microsoft.com",
+    "intune_admin": "intune.microsoft.com",
+    "azure_admin": "portal.azure.com",
+    "google_admin": "admin.google.com",
+}
+
+# Velden die Network.setCookies accepteert (getAllCookies geeft er meer terug).
+_COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+_lock = threading.Lock()
+
+
+def _ttl_seconds() -> float:
+    try:
+        hours = float(os.environ.get("AUTO_LOGIN_COOKIE_VAULT_TTL_HOURS", "").strip())
+        if hours > 0:
+            return hours * 3600
+    except Exception:
+        pass
+    return _DEFAULT_TTL_HOURS * 3600
+
+
+def vault_enabled(service: str) -> bool:
+    if service not in SERVICE_AUTHENTICATED_HOSTS:
+        return False
+    if not is_truthy(os.environ.get("AUTO_LOGIN_COOKIE_VAULT")):
+        return False
+    services = parse_csv_set(os.environ.get("AUTO_LOGIN_COOKIE_VAULT_SERVICES"))
+    return not services or service in services
+
+
+def _vault_file() -> Path:
+    return Path(get_data_dir()) / _VAULT_FILENAME
+
+
+def _entry_key(service: str, account_id: str) -> str:
+    digest = hashlib.sha256((account_id or "").strip().lower().encode("utf-8")).hexdigest()[:16]
+    return f"{service}:{digest}"
+
+
+def _load_vault() -> dict:
+    try:
+        with open(_vault_file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_vault(data: dict) -> None:
+    try:
+        write_json_atomic(_vault_file(), data)
+    except Exception as exc:
+        logger.warning("Kon cookie-kluis niet bewaren: %s", exc)
+
+
+def _forget(service: str, account_id: str) -> None:
+    with _lock:
+        data = _load_vault()
+        if data.pop(_entry_key(service, account_id), None) is not None:
+            _save_vault(data)
+
+
+def clear_cookie_vault() -> bool:
+    """Verwijder alle bewaarde sessies; True als er een kluisbestand was."""
+    with _lock:
+        try:
+            _vault_file().unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as exc:
+            logger.warning("Kon cookie-kluis niet verwijderen: %s", exc)
+            return False
+
+
+def _on_authenticated_host(driver, service: str) -> bool:
+    try:
+        return url_on_host(driver.current_url, SERVICE_AUTHENTICATED_HOSTS[service])
+    except Exception:
+        return False
+
+
+def _restorable_cookies(cookies: list[dict], now: float) -> list[dict]:
+    result = []
+    for cookie in cookies:
+        if not cookie.get("name") or not cookie.get("domain"):
+            continue
+        expires = cookie.get("expires")
+        is_session = cookie.get("session") or not expires or expires < 0
+        if not is_session and expires <= now:
+            continue
+        clean = {field: cookie[field] for field in _COOKIE_FIELDS if field in cookie}
+        if is_session:
+            clean.pop("expires", None)
+        result.append(clean)
+    return result
+
+
+def capture_session(driver, service: str, account_id: str) -> bool:
+    """Bewaar de cookies van een ingelogde browser versleuteld in de kluis."""
+    if not vault_enabled(service) or not _on_authenticated_host(driver, service):
+        return False
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    except Exception as exc:
+        logger.debug("Kon cookies niet ophalen: %s", exc)
+        return False
+
+    now = time.time()
+    cookies = _restorable_cookies(cookies, now)
+    if not cookies:
+        return False
+    token = get_fernet(SCRIPTS_DIR).encrypt(json.dumps(cookies).encode("utf-8")).decode("utf-8")
+    with _lock:
+        data = _load_vault()
+        data[_entry_key(service, account_id)] = {
+            "cookies": token,
+            "saved_at": now,
+            "expires_at": now + _ttl_seconds(),
+        }
+        _save_vault(data)
+    logger.info("COOKIE_VAULT_SAVED %s (%d cookies)", service, len(cookies))
+    return True
+
+
+def _load_cookies(service: str, account_id: str) -> list[dict] | None:
+    with _lock:
+        entry = _load_vault().get(_entry_key(service, account_id))
+    if not isinstance(entry, dict):
+        return None
+    if float(entry.get("expires_at", 0)) <= time.time():
+        _forget(service, account_id)
+        return None
+    try:
+        raw = get_fernet(SCRIPTS_DIR).decrypt(entry["cookies"].encode("utf-8"))
+        return _restorable_cookies(json.loads(raw), time.time())
+    except Exception as exc:
+        # Andere sleutel (bv. na key-migratie) of corrupte entry.
+        logger.warning("Cookie-kluis entry onbruikbaar voor %s: %s", service, exc)
+        _forget(service, account_id)
+        return None
+
+
+def _capture_when_authenticated(driver, service: str, account_id: str) -> None:
+    """
+    Bewaar de cookies zodra de browser stabiel op de portal-host staat, los van
+    de jobstatus: ook een login die op handmatige MFA wachtte, telt mee.
+    """
+    def _watch() -> None:
+        deadline = time.monotonic() + _CAPTURE_WINDOW
+        on_host_since = None
+        while time.monotonic() < deadline and not shutdown_event.is_set():
+            try:
+                on_host = _on_authenticated_host(driver, service) and bool(driver.window_handles)
+            except Exception:
+                # Browser gesloten.
+                return
+            if on_host:
+                on_host_since = on_host_since or time.monotonic()
+                if time.monotonic() - on_host_since >= _PROBE_STABLE_SECONDS:
+                    capture_session(driver, service, account_id)
+                    return
+            else:
+                on_host_since = None
+            shutdown_event.wait(_CAPTURE_POLL)
+
+    start_thread(threading.Thread(target=_watch, daemon=True, name=f"cookie-vault-{service}"))
+
+
+def restore_session(driver, service: str, account_id: str, url: str) -> bool:
+    """
+    Probeer de login over te slaan met bewaarde cookies. Roep dit op vóór de
+    eerste navigatie (sessie op about:blank geopend): de cookies staan er dan
+    voor het eerste request en de loginpagina wordt niet voor niets geladen.
+    True als de portal meteen ingelogd opent; anders False (de flow gaat dan
+    gewoon verder en de cookies worden na de login opnieuw bewaard).
+    """
+    if not vault_enabled(service) or not account_id:
+        return False
+    _capture_when_authenticated(driver, service, account_id)
+
+    cookies = _load_cookies(service, account_id)
+    if not cookies:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        driver.get(url)
+    except Exception as exc:
+        logger.debug("Kon cookies niet terugzetten: %s", exc)
+        return False
+
+    # Lichte probe: enkel de URL, geen DOM. Sommige portals (Azure) laden eerst
+    # en sturen pas via JS door naar de loginpagina, dus de URL moet even stabiel blijven.
+    deadline = time.monotonic() + _PROBE_TIMEOUT
+    on_host_since = None
+    while time.monotonic() < deadline and not shutdown_event.is_set():
+        try:
+            current = driver.current_url
+        except Exception:
+            break
+        if url_on_host(current, "login.microsoftonline.com", "accounts.google.com"):
+            break
+        if url_on_host(current, SERVICE_AUTHENTICATED_HOSTS[service]):
+            on_host_since = on_host_since or time.monotonic()
+            if time.monotonic() - on_host_since >= _PROBE_STABLE_SECONDS:
+                record_job_event("FLOW_SESSION_RESTORED", service)
+                print(f"FLOW_SESSION_RESTORED {service}")
+                return True
+        else:
+            on_host_since = None
+        shutdown_event.wait(0.25)
+
+    _forget(service, account_id)
+    return False
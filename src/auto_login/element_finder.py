@@ -0,0 +1,182 @@
+"""
+Gedeelde multi-selector resolver voor login flows.
+
+Loginpagina's hebben vaak meerdere mogelijke selectors voor hetzelfde veld.
+In plaats van elke selector achter elkaar een eigen WebDriverWait te geven
+(bij een foute eerste selector kost dat meteen de volledige timeout), worden
+alle kandidaten per poll in één JS-aanroep geëvalueerd. De eerste selector in
+de lijst met een zichtbaar (en bruikbaar) element wint, binnen één deadline.
+
+Met `learn_key` ("service:stap") krijgen geleerde winnaars voorrang binnen
+hun specificiteitsgroep (zie selector_stats) en wordt de winnaar geregistreerd.
+"""
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from src.auto_login.page_state import VISIBLE_JS
+from src.auto_login.selector_stats import get_selector_stats
+from src.core.shutdown import shutdown_event
+
+DEFAULT_POLL = 0.2
+
+# By-strategieën die rechtstreeks in JS opgezocht kunnen worden.
+_JS_KINDS = {
+    By.CSS_SELECTOR: "css",
+    By.XPATH: "xpath",
+    By.ID: "id",
+    By.NAME: "name",
+    By.CLASS_NAME: "class",
+    By.TAG_NAME: "tag",
+}
+
+# Geeft alle bruikbare matches in selectorvolgorde terug ([index, element]),
+# zodat Python de winnaar nog met is_displayed() kan bevestigen.
+_RESOLVE_SCRIPT = VISIBLE_JS + """
+const [candidates, requireVisible, requireEnabled] = arguments;
+const usable = (el) => {
+    if (requireEnabled && (el.disabled || el.getAttribute('aria-disabled') === 'true')) return false;
+    return !requireVisible || isVisible(el);
+};
+const lookup = (kind, value) => {
+    switch (kind) {
+        case 'css': return Array.from(document.querySelectorAll(value));
+        case 'id': { const el = document.getElementById(value); return el ? [el] : []; }
+        case 'name': return Array.from(document.getElementsByName(value));
+        case 'class': return Array.from(document.getElementsByClassName(value));
+        case 'tag': return Array.from(document.getElementsByTagName(value));
+        case 'xpath': {
+            const result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+            return nodes;
+        }
+    }
+    return [];
+};
+const matches = [];
+for (let i = 0; i < candidates.length; i++) {
+    let elements = [];
+    try { elements = lookup(candidates[i][0], candidates[i][1]); } catch (e) { continue; }
+    for (const el of elements) {
+        if (el instanceof Element && usable(el)) matches.push([i, el]);
+    }
+}
+return matches;
+"""
+
+
+def _usable(element, *, visible: bool, enabled: bool) -> bool:
+    try:
+        if visible and not element.is_displayed():
+            return False
+        return not enabled or element.is_enabled()
+    except Exception:
+        return False
+
+
+def _resolve_once(driver, selectors, *, visible: bool, enabled: bool):
+    """Eén poll: geef (index, element) van de eerste bruikbare match, of None."""
+    js_candidates = [(_JS_KINDS[by], value) for by, value in selectors if by in _JS_KINDS]
+    if len(js_candidates) == len(selectors):
+        try:
+            matches = driver.execute_script(_RESOLVE_SCRIPT, js_candidates, visible, enabled) or []
+        except Exception:
+            matches = []
+        for index, element in matches:
+            # JS filtert al streng; is_displayed() is de laatste controle (meestal maar één call).
+            if not visible or _usable(element, visible=True, enabled=False):
+                return int(index), element
+        return None
+
+    # Selectors die JS niet kent (bv. LINK_TEXT): klassiek via find_elements.
+    for index, (by, value) in enumerate(selectors):
+        try:
+            for element in driver.find_elements(by, value):
+                if _usable(element, visible=visible, enabled=enabled):
+                    return index, element
+        except Exception:
+            continue
+    return None
+
+
+def learned_order(learn_key: str | None, selectors) -> list:
+    """Selectors met de geleerde winnaars van `learn_key` vooraan (binnen hun specificiteitsgroep)."""
+    selectors = list(selectors)
+    if not learn_key:
+        return selectors
+    return get_selector_stats().order(learn_key, selectors)
+
+
+def record_learned_win(learn_key: str | None, selector) -> None:
+    """Registreer dat `selector` (by, value) won onder `learn_key`."""
+    if learn_key:
+        get_selector_stats().record_win(learn_key, *selector)
+
+
+def resolve_first(driver, selectors, *, visible: bool = True, enabled: bool = True):
+    """
+    Eén poll zonder wachten: (index, element) van de eerste bruikbare selector
+    in lijstvolgorde, of None. Voor executors die zelf hun wachtlus beheren.
+    """
+    return _resolve_once(driver, list(selectors), visible=visible, enabled=enabled)
+
+
+def find_first(
+    driver,
+    selectors,
+    *,
+    timeout: float = 30,
+    visible: bool = True,
+    enabled: bool = True,
+    poll: float = DEFAULT_POLL,
+    learn_key: str | None = None,
+):
+    """
+    Wacht tot een van de selectors een bruikbaar element oplevert en geef het
+    eerste (in lijstvolgorde) terug. `selectors`: list[tuple[By, selector]].
+    Gooit TimeoutException na `timeout` seconden in totaal.
+    """
+    selectors = list(selectors)
+    if not selectors:
+        raise TimeoutException("Geen selector opgegeven.")
+    selectors = learned_order(learn_key, selectors)
+
+    deadline = time.monotonic() + max(0.0, float(timeout))
+    while True:
+        found = _resolve_once(driver, selectors, visible=visible, enabled=enabled)
+        if found:
+            record_learned_win(learn_key, selectors[found[0]])
+            return found[1]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or shutdown_event.is_set():
+            break
+        shutdown_event.wait(min(poll, remaining))
+
+    tried = ", ".join(value for _, value in selectors)
+    raise TimeoutException(f"Geen van de selectors gevonden binnen {timeout}s: {tried}")
+
+
+def find_first_or_none(driver, selectors, *, timeout: float = 0, **kwargs):
+    """Zoals find_first, maar geeft None terug in plaats van een TimeoutException."""
+    try:
+        return find_first(driver, selectors, timeout=timeout, **kwargs)
+    except TimeoutException:
+        return None
+
+
+def click_first(driver, selectors, *, timeout: float = 4) -> bool:
+    """Klik op het eerste klikbare element van de selectors; False als er geen verschijnt."""
+    element = find_first_or_none(driver, selectors, timeout=timeout)
+    if element is None:
+        return False
+    try:
+        element.click()
+    except Exception:
+        # JS fallback voor overlays/rare state
+        try:
+            driver.execute_script("arguments[0].click();", element)
+        except Exception:
+            return False
+    return True
@@ -0,0 +1,431 @@
+"""
+Declaratieve login flows met één gedeelde executor.
+
+Een flow is een lijst `FlowStep`'s (selectors, actie, timeout, optioneel,
+overslaan-als/-met). `run_flow` voert ze uit met één wachtlus: per tick één
+gebundelde selector-probe (element_finder), een stop-predicaat (bv. al op
+het portaal) en, voor flows die erom vragen (check_manual), om de seconde
+een MFA/captcha-probe (page_state). Elke
+verbetering aan wachten, typen of proben geldt zo meteen voor alle flows, en
+een nieuw portaal is vooral data.
+
+Acties:
+- ACTION_TYPE: veld invullen met `values[step.value]` (clear_and_type_verified)
+- ACTION_CLICK: klikken (met JS fallback)
+- ACTION_WAIT: wachten tot `step.until(driver)` waar is
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+
+from dotenv import load_dotenv
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from src.auto_login.browser_session import clear_service_site_data, open_url_for_service
+from src.auto_login.cookie_vault import restore_session
+from src.auto_login.element_finder import DEFAULT_POLL, learned_order, record_learned_win, resolve_first
+from src.auto_login.input_utils import clear_and_type_verified
+from src.auto_login.microsoft_account_switch import (
+    MS_EMAIL_SELECTORS,
+    MS_PASSWORD_SELECTORS,
+    prepare_microsoft_login_for_email,
+    wait_for_microsoft_credential_step,
+)
+from src.auto_login.page_state import manual_intervention_detected, permission_denied
+from src.core.credentials_manager import get_credential, get_data_dir
+from src.core.login_jobs import record_job_event, run_pending_job_actions
+from src.core.security_utils import canonical_service_url, hinted_service_url, url_on_host
+from src.core.shutdown import shutdown_event
+
+logger = logging.getLogger(__name__)
+
+ACTION_TYPE = "type"
+ACTION_CLICK = "click"
+ACTION_WAIT = "wait"
+
+FLOW_COMPLETED = "completed"
+FLOW_MANUAL = "manual"
+FLOW_STOPPED = "stopped"
+FLOW_FAILED = "failed"
+
+# Interval (seconden) tussen twee MFA/captcha-probes tijdens het wachten.
+_MANUAL_CHECK_INTERVAL = 1.0
+
+
+class FlowStep:
+    """Eén stap van een login flow."""
+
+    def __init__(
+        self,
+        name: str,
+        selectors: list | None = None,
+        *,
+        action: str = ACTION_CLICK,
+        value: str | None = None,
+        timeout: float = 30,
+        optional: bool = False,
+        skip_if_present: list | None = None,
+        skip_with: str | None = None,
+        keep_if_equal: bool = False,
+        visible: bool = True,
+        enabled: bool = True,
+        learn_key: str | None = None,
+        event: str | None = None,
+        until: Callable | None = None,
+    ) -> None:
+        self.name = name
+        self.selectors = list(selectors or [])
+        self.action = action
+        # Sleutel in de `values` van run_flow (bv. "email", "password").
+        self.value = value
+        self.timeout = timeout
+        # Optionele stap: na de timeout gewoon verder.
+        self.optional = optional
+        # Verschijnt geen van de eigen selectors maar wel een van deze
+        # elementen, dan wordt de stap overgeslagen.
+        self.skip_if_present = list(skip_if_present or [])
+        # Naam van een eerdere stap: werd die overgeslagen, dan deze ook (bv.
+        # "volgende" na een overgeslagen e-mailstap, waar dezelfde knop ook op
+        # de wachtwoordpagina staat).
+        self.skip_with = skip_with
+        # Niet opnieuw typen als het veld al de verwachte waarde bevat (bv. door
+        # login_hint); een andere waarde (ander account) wordt wel overschreven.
+        self.keep_if_equal = keep_if_equal
+        self.visible = visible
+        self.enabled = enabled
+        # Selector-voorrang leren onder deze sleutel (selector_stats): "<service>:<stapnaam>".
+        self.learn_key = learn_key
+        # Job-event na een geslaagde stap (standaard FLOW_STEP met de stapnaam).
+        self.event = event
+        self.until = until
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "action": self.action,
+            "selectors": [value for _, value in self.selectors],
+            "timeout": self.timeout,
+            "optional": self.optional,
+        }
+
+
+class FlowResult:
+    """Uitkomst van run_flow."""
+
+    def __init__(self, status: str, step: str | None = None, reason: str | None = None) -> None:
+        self.status = status
+        # Stap waar de flow stopte (of de laatste uitgevoerde stap).
+        self.step = step
+        # Bij FLOW_STOPPED: wat het stop-predicaat teruggaf.
+        self.reason = reason
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (FLOW_COMPLETED, FLOW_STOPPED)
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "step": self.step, "reason": self.reason}
+
+
+def _click(driver, element) -> bool:
+    try:
+        element.click()
+        return True
+    except Exception:
+        # JS fallback voor overlays/rare state
+        try:
+            driver.execute_script("arguments[0].click();", element)
+            return True
+        except Exception:
+            return False
+
+
+def _perform(driver, step: FlowStep, element, *, service: str | None, values: dict) -> bool:
+    if step.action == ACTION_CLICK:
+        return _click(driver, element)
+    if step.action == ACTION_TYPE:
+        value = values.get(step.value) or ""
+        if step.keep_if_equal:
+            current = (element.get_attribute("value") or "").strip().lower()
+            if current and current == value.strip().lower():
+                return True
+        clear_and_type_verified(driver, element, value, service=service)
+        return True
+    return False
+
+
+def _log_step(service: str | None, event: str, detail: str) -> None:
+    logger.info("%s %s %s", event, service or "", detail)
+    record_job_event(event, detail)
+
+
+def run_flow(
+    driver,
+    steps: list[FlowStep],
+    *,
+    service: str | None = None,
+    values: dict | None = None,
+    stop_when: Callable | None = None,
+    check_manual: bool = False,
+) -> FlowResult:
+    """
+    Voer de stappen na elkaar uit. `stop_when(driver)` wordt elke tick
+    opgeroepen; geeft het een waarde terug, dan stopt de flow met
+    FLOW_STOPPED (bv. "authenticated" of "microsoft"). Met check_manual geeft
+    een MFA/captcha-scherm FLOW_MANUAL; een verplichte stap die niet
+    verschijnt geeft FLOW_FAILED.
+    """
+    values = values or {}
+    last_manual_check = time.monotonic()
+    skipped: set[str] = set()
+
+    for step in steps:
+        if step.skip_with and step.skip_with in skipped:
+            skipped.add(step.name)
+            _log_step(service, "FLOW_STEP_SKIPPED", step.name)
+            continue
+        learn_key = step.learn_key
+        selectors = learned_order(learn_key, step.selectors)
+        # Eigen selectors eerst: skip_if_present telt enkel als geen ervan matcht.
+        candidates = selectors + step.skip_if_present
+        deadline = time.monotonic() + max(0.0, float(step.timeout))
+
+        while True:
+            if shutdown_event.is_set():
+                return FlowResult(FLOW_FAILED, step.name, "shutdown")
+            # Acties van andere threads (bv. venster focussen) op deze driver.
+            run_pending_job_actions()
+
+            if stop_when is not None:
+                reason = stop_when(driver)
+                if reason:
+                    _log_step(service, "FLOW_STOPPED", f"{step.name}: {reason}")
+                    return FlowResult(FLOW_STOPPED, step.name, reason)
+
+            if step.action == ACTION_WAIT:
+                try:
+                    if step.until is None or step.until(driver):
+                        _log_step(service, step.event or "FLOW_STEP", step.name)
+                        break
+                except Exception:
+                    pass
+            else:
+                found = resolve_first(driver, candidates, visible=step.visible, enabled=step.enabled)
+                if found is not None:
+                    index, element = found
+                    if index >= len(selectors):
+                        skipped.add(step.name)
+                        _log_step(service, "FLOW_STEP_SKIPPED", step.name)
+                        break
+                    if _perform(driver, step, element, service=service, values=values):
+                        record_learned_win(learn_key, selectors[index])
+                        _log_step(service, step.event or "FLOW_STEP", step.name)
+                        break
+
+            now = time.monotonic()
+            if check_manual and now - last_manual_check >= _MANUAL_CHECK_INTERVAL:
+                last_manual_check = now
+                if manual_intervention_detected(driver):
+                    _log_step(service, "FLOW_MANUAL_INTERVENTION", step.name)
+                    return FlowResult(FLOW_MANUAL, step.name)
+
+            remaining = deadline - now
+            if remaining <= 0:
+                if step.optional:
+                    break
+                if check_manual and manual_intervention_detected(driver):
+                    _log_step(service, "FLOW_MANUAL_INTERVENTION", step.name)
+                    return FlowResult(FLOW_MANUAL, step.name)
+                _log_step(service, "FLOW_STEP_TIMEOUT", step.name)
+                return FlowResult(FLOW_FAILED, step.name)
+            shutdown_event.wait(min(DEFAULT_POLL, remaining))
+
+    return FlowResult(FLOW_COMPLETED, steps[-1].name if steps else None)
+
+
+def url_contains(*fragments: str) -> Callable:
+    """Predicaat voor ACTION_WAIT/stop_when: huidige URL bevat een van de fragmenten."""
+    fragments = tuple(f.lower() for f in fragments)
+
+    def _predicate(driver) -> bool:
+        try:
+            current = (driver.current_url or "").lower()
+        except Exception:
+            return False
+        return any(f in current for f in fragments)
+
+    return _predicate
+
+
+def host_reached(*hosts: str, reason: str = "authenticated") -> Callable:
+    """
+    stop_when: geeft `reason` zodra de host van de huidige URL een van de
+    hosts is (of een subdomein ervan). login.microsoftonline.com telt dus niet
+    als "microsoft.com".
+    """
+    def _predicate(driver) -> str | None:
+        try:
+            current = driver.current_url
+        except Exception:
+            return None
+        return reason if url_on_host(current, *hosts) else None
+
+    return _predicate
+
+
+# --- Gedeelde stapdefinities -------------------------------------------------
+
+MS_SUBMIT_SELECTORS = [(By.ID, "idSIButton9")]
+MS_STAY_SIGNED_IN_NO_SELECTORS = [(By.ID, "idBtn_Back")]
+
+# Hoe lang na het aanmelden op het portaal gewacht wordt.
+_PORTAL_TIMEOUT = 60
+
+
+def microsoft_login_steps(*, wait_for_portal: bool = False) -> list[FlowStep]:
+    """
+    Microsoft e-mail -> volgende -> wachtwoord -> aanmelden -> "Blijf
+    aangemeld?" (Nee). Met login_hint staat het wachtwoordveld er meteen en
+    worden de e-mailstappen overgeslagen. Met wait_for_portal volgt een
+    wachtstap die enkel via stop_when (host_reached) eindigt.
+    """
+    steps = [
+        FlowStep(
+            "email",
+            MS_EMAIL_SELECTORS,
+            action=ACTION_TYPE,
+            value="email",
+            keep_if_equal=True,
+            skip_if_present=MS_PASSWORD_SELECTORS,
+        ),
+        FlowStep("email_next", MS_SUBMIT_SELECTORS, skip_with="email"),
+        FlowStep("password", MS_PASSWORD_SELECTORS, action=ACTION_TYPE, value="password"),
+        FlowStep("sign_in", MS_SUBMIT_SELECTORS),
+        FlowStep("stay_signed_in", MS_STAY_SIGNED_IN_NO_SELECTORS, timeout=15, optional=True),
+    ]
+    if wait_for_portal:
+        steps.append(
+            FlowStep("portal", action=ACTION_WAIT, until=lambda _driver: False, timeout=_PORTAL_TIMEOUT, optional=True)
+        )
+    return steps
+
+
+def run_microsoft_login(
+    driver,
+    *,
+    service: str,
+    email: str,
+    password: str,
+    portal_hosts: tuple[str, ...] = (),
+) -> FlowResult:
+    """
+    De gedeelde Microsoft-credentialflow met MFA-detectie. Met portal_hosts
+    stopt de flow (FLOW_STOPPED) zodra een van die hosts geladen is, ook
+    midden in een optionele stap zoals "Blijf aangemeld?".
+    """
+    return run_flow(
+        driver,
+        microsoft_login_steps(wait_for_portal=bool(portal_hosts)),
+        service=service,
+        values={"email": email, "password": password},
+        stop_when=host_reached(*portal_hosts) if portal_hosts else None,
+        check_manual=True,
+    )
+
+
+# --- Microsoft admin portals ---------------------------------------------------
+
+# Service -> portal-host. Een nieuw Microsoft-portaal is enkel een regel hier
+# (plus de canonieke URL in security_utils).
+MICROSOFT_PORTAL_HOSTS = {
+    "microsoft_admin": "admin.microsoft.com",
+    "intune_admin": "intune.microsoft.com",
+    "azure_admin": "portal.azure.com",
+}
+
+
+def get_credential_or_fail(service: str, field: str) -> str:
+    """Haal een credential op uit de encrypted opslag; RuntimeError als het veld leeg is."""
+    data_dir = get_data_dir()
+    value = get_credential(service, field, data_dir, data_dir / "credentials.json")
+    if not value or value.strip() == "":
+        raise RuntimeError(
+            f"Credentials ontbreken: {field} voor {service} is niet ingevuld.\n"
+            "Ga naar de web interface (http://127.0.0.1:5000/credentials) om je credentials in te stellen."
+        )
+    return value
+
+
+def login_microsoft_portal(service: str, portal_host: str | None = None) -> None:
+    """
+    Log in op een Microsoft admin portaal (MICROSOFT_PORTAL_HOSTS): cookie-kluis,
+    entry-URL met login_hint, account-switch indien nodig en daarna de gedeelde
+    Microsoft-credentialflow tot het portaal geladen is.
+
+    E-mail en wachtwoord komen uit de encrypted credentials (web interface >
+    Credentials). In .env staat per portaal enkel de URL ter referentie
+    (MS_ADMIN_URL, INTUNE_ADMIN_URL, AZURE_ADMIN_URL); wachtwoorden nooit.
+    """
+    load_dotenv()
+
+    portal_host = portal_host or MICROSOFT_PORTAL_HOSTS[service]
+    label = service.replace("_", " ").title()
+    admin_url = canonical_service_url(service)
+    email = get_credential_or_fail(service, "email")
+    password = get_credential_or_fail(service, "password")
+    # Met AUTO_LOGIN_MICROSOFT_LOGIN_HINT=1 en een portaal dat login_hint doorgeeft toont
+    # Microsoft meteen de wachtwoordstap; anders typt de flow het e-mailadres.
+    entry_url = hinted_service_url(service, email)
+
+    # Eerst about:blank: bewaarde cookies (kluis) staan er dan vóór de eerste navigatie.
+    driver = open_url_for_service(service, "about:blank", new_tab=True, account_id=email)
+    if restore_session(driver, service, email, admin_url):
+        print(f"{label} sessie hersteld uit de cookie-kluis.")
+        return
+
+    driver.get(entry_url)
+
+    # Fast path: als het e-mail- of wachtwoordveld al klaarstaat, meteen typen.
+    _, field_input = wait_for_microsoft_credential_step(driver, timeout=1.0, desired_email=email)
+    if not field_input:
+        # Microsoft site-data wissen (enkel op een hergebruikt profiel) en opnieuw laden.
+        if clear_service_site_data(driver, service):
+            driver.get(entry_url)
+        try:
+            prepare_microsoft_login_for_email(driver, email, timeout=20, start_url=entry_url)
+        except TimeoutException:
+            # Geen loginveld: mogelijk al op het portaal met het juiste account.
+            if url_on_host(driver.current_url, portal_host) and not permission_denied(driver):
+                print(f"{label} lijkt al ingelogd met actief account.")
+                return
+        _, field_input = wait_for_microsoft_credential_step(driver, timeout=30)
+    if not field_input:
+        raise RuntimeError("Kon Microsoft e-mail veld niet vinden (loginfmt/i0116).")
+
+    # E-mail -> wachtwoord -> aanmelden -> "Blijf aangemeld?" (Nee) -> wachten op het portaal.
+    result = run_microsoft_login(
+        driver,
+        service=service,
+        email=email,
+        password=password,
+        portal_hosts=(portal_host,),
+    )
+    if result.status == FLOW_MANUAL:
+        print(f"{label} wacht op handmatige verificatie (2FA) in deze tab.")
+        return
+    if result.status == FLOW_FAILED:
+        raise RuntimeError(f"Microsoft login bleef hangen bij stap '{result.step}'.")
+
+    # Navigeer na succesvolle auth naar het portaal, zodat we niet op
+    # login.microsoftonline.com blijven hangen.
+    try:
+        if not url_on_host(driver.current_url, portal_host):
+            driver.get(admin_url)
+    except Exception:
+        pass
+
+    print(f"{label} login uitgevoerd in een herbruikbare incognito browser-sessie.")
+    print("Als er 2FA vereist is, vul die nu handmatig in.")
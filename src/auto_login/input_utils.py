@@ -1,12 +1,31 @@
 """
 Helpers voor stabielere input in login flows.
+
+Typstrategieën (per service instelbaar):
+- human: karakter per karakter met willekeurige pauzes (standaard)
+- burst: één send_keys met de volledige tekst
+- cdp:   Chrome DevTools Input.insertText (één "plak"-actie)
+
+AUTO_LOGIN_TYPING_STRATEGY zet de standaard, AUTO_LOGIN_TYPING_STRATEGIES
+overschrijft per service, bv. "easy4u=burst,azure_admin=cdp".
 """
+import logging
 import os
 import random
 import time
 
 from selenium.webdriver.common.keys import Keys
 
+from src.core.env_utils import parse_strategy_map
+from src.core.login_jobs import current_job
+
+logger = logging.getLogger(__name__)
+
+TYPING_HUMAN = "human"
+TYPING_BURST = "burst"
+TYPING_CDP = "cdp"
+TYPING_STRATEGIES = {TYPING_HUMAN, TYPING_BURST, TYPING_CDP}
+
 
 def _get_float_env(name: str, default: float) -> float:
     try:
@@ -39,10 +58,72 @@ def clear_and_human_type(element, text: str, min_delay: float | None = None, max
             time.sleep(random.uniform(0.12, 0.35))
 
 
-def clear_and_type_verified(driver, element, text: str, min_delay: float | None = None, max_delay: float | None = None) -> None:
+def typing_strategy(service: str | None = None) -> str:
+    """
+    Typstrategie voor een service. Zonder service wordt de service van de
+    lopende login-job gebruikt.
+    """
+    if service is None:
+        job = current_job()
+        service = job.service if job is not None else None
+    if service:
+        per_service = parse_strategy_map(os.environ.get("AUTO_LOGIN_TYPING_STRATEGIES"), TYPING_STRATEGIES)
+        if service in per_service:
+            return per_service[service]
+    default = (os.environ.get("AUTO_LOGIN_TYPING_STRATEGY") or "").strip().lower()
+    return default if default in TYPING_STRATEGIES else TYPING_HUMAN
+
+
+def _cdp_insert_text(element, text: str) -> None:
+    driver = element.parent
+    element.clear()
+    driver.execute_script("arguments[0].focus();", element)
+    driver.execute_cdp_cmd("Input.insertText", {"text": text})
+
+
+def clear_and_type(
+    element,
+    text: str,
+    *,
+    service: str | None = None,
+    strategy: str | None = None,
+    min_delay: float | None = None,
+    max_delay: float | None = None,
+) -> None:
+    """
+    Vul een input in volgens de typstrategie van de service (zie module docstring).
+    """
+    text = str(text or "")
+    strategy = strategy or typing_strategy(service)
+    if strategy == TYPING_CDP:
+        try:
+            _cdp_insert_text(element, text)
+            return
+        except Exception as e:
+            # Geen CDP (bv. andere driver): val terug op burst.
+            logger.debug("Input.insertText niet beschikbaar: %s", e)
+            strategy = TYPING_BURST
+    if strategy == TYPING_BURST:
+        element.clear()
+        element.send_keys(text)
+        return
+    clear_and_human_type(element, text, min_delay=min_delay, max_delay=max_delay)
+
+
+def clear_and_type_verified(
+    driver,
+    element,
+    text: str,
+    min_delay: float | None = None,
+    max_delay: float | None = None,
+    *,
+    service: str | None = None,
+    strategy: str | None = None,
+) -> None:
     """
     Vul een input in en controleer of de browser de waarde echt heeft aangenomen.
-    Sommige moderne loginformulieren negeren .clear() of losse send_keys events.
+    Sommige moderne loginformulieren negeren .clear() of losse send_keys events;
+    dan wordt de waarde via de native JS setter gezet.
     """
     text = str(text or "")
 
@@ -55,7 +136,14 @@ def clear_and_type_verified(driver, element, text: str, min_delay: float | None
         element.click()
         element.send_keys(Keys.CONTROL, "a")
         element.send_keys(Keys.BACKSPACE)
-        clear_and_human_type(element, text, min_delay=min_delay, max_delay=max_delay)
+        clear_and_type(
+            element,
+            text,
+            service=service,
+            strategy=strategy,
+            min_delay=min_delay,
+            max_delay=max_delay,
+        )
     except Exception:
         pass
 
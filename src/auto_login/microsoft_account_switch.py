@@ -1,44 +1,127 @@
 """
 Helpers om Microsoft login account-keuze te forceren in gedeelde browser-sessies.
+
+`prepare_microsoft_login_for_email` is een kleine state machine: per tick
+bepaalt één JS-probe in welke toestand de Microsoft loginpagina zit en wordt
+precies één overgang uitgevoerd, tot het e-mailveld klaarstaat:
+
+    afgemeld/logout        -> terug naar start_url
+    "Sign out & switch"    -> klikken (leidt naar de logoutpagina)
+    account-picker         -> "Use another account" (of desnoods de juiste tegel)
+    e-mailveld klaar       -> klaar
+    wachtwoordveld klaar   -> klaar, maar enkel voor het gewenste account
+                              (e-mail al meegegeven via login_hint)
+    wachtwoord ander account -> terug / "Use another account"
 """
+import logging
 import time
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from src.core.shutdown import shutdown_event
+from src.auto_login.element_finder import find_first_or_none
+from src.auto_login.page_state import SIGNED_OUT_INDICATORS, VISIBLE_JS
+
+logger = logging.getLogger(__name__)
+
+MS_STATE_EMAIL_READY = "email_ready"
+MS_STATE_PASSWORD_READY = "password_ready"
+MS_STATE_WRONG_ACCOUNT = "wrong_account"
+MS_STATE_SIGNED_OUT = "signed_out"
+MS_STATE_SIGN_OUT_SWITCH = "sign_out_switch"
+MS_STATE_ACCOUNT_PICKER = "account_picker"
+MS_STATE_LOADING = "loading"
+
+MS_EMAIL_SELECTORS = [
+    (By.NAME, "loginfmt"),
+    (By.ID, "i0116"),
+    (By.CSS_SELECTOR, "input[type='email']"),
+]
+MS_PASSWORD_SELECTORS = [
+    (By.NAME, "passwd"),
+    (By.ID, "i0118"),
+]
+
+_POLL = 0.25  # sneller respons zonder "bot-instant" te zijn
+# Dezelfde actie in dezelfde toestand pas na deze tijd herhalen (pagina laat soms op zich wachten).
+_ACTION_COOLDOWN = 1.5
+
+_STATE_SCRIPT = VISIBLE_JS + """
+const [desiredEmail, signedOutTokens] = arguments;
+const visible = isVisible;
+const textOf = (el) => ((el.innerText || el.textContent || '') + '').trim().toLowerCase();
+const url = (location.href || '').toLowerCase();
+
+const email = Array.from(document.querySelectorAll("input[name='loginfmt'], #i0116, input[type='email']"))
+    .find((el) => !el.disabled && visible(el));
+if (email) return ['email_ready', url, email];
+const password = Array.from(document.querySelectorAll("input[name='passwd'], #i0118"))
+    .find((el) => !el.disabled && visible(el));
+const clickables = Array.from(document.querySelectorAll("a, button, [role='button'], [role='link'], div.table, #otherTile"))
+    .filter(visible);
+if (password) {
+    if (!desiredEmail) return ['password_ready', url, password];
+    // Wachtwoordstap van welk account? Enkel het gewenste account is "klaar".
+    const identity = Array.from(document.querySelectorAll("#displayName, [data-bind*='displayName']"))
+        .map(textOf).find((t) => t.length > 0) || '';
+    if (identity === desiredEmail) return ['password_ready', url, password];
+    if (!identity) return ['loading', url, null];
+    const back = Array.from(document.querySelectorAll("#idBackButton, [data-bind*='backButton']")).find(visible)
+        || clickables.find((el) => {
+            const t = textOf(el);
+            return t.includes('another account') || t.includes('ander account');
+        });
+    return ['wrong_account', url, back || null];
+}
+
+const bodyText = ((document.body && document.body.innerText) || '').toLowerCase();
+if (url.includes('logout') || signedOutTokens.some((t) => bodyText.includes(t))) {
+    return ['signed_out', url, null];
+}
+
+const switchLink = clickables.find((el) => {
+    const t = textOf(el);
+    return t.includes('sign out & switch') || (t.includes('afmelden') && t.includes('wissel'));
+});
+if (switchLink) return ['sign_out_switch', url, switchLink];
+
+const other = document.getElementById('otherTile') || clickables.find((el) => {
+    const t = textOf(el);
+    return t.includes('use another account') || t.includes('ander account');
+});
+if (other && visible(other)) return ['account_picker', url, other];
+if (desiredEmail) {
+    // Geen "ander account": desnoods de tegel van het gewenste account (kleinste match).
+    const tiles = clickables.filter((el) => textOf(el).includes(desiredEmail));
+    tiles.sort((a, b) => textOf(a).length - textOf(b).length);
+    if (tiles.length) return ['account_picker', url, tiles[0]];
+}
+return ['loading', url, null];
+"""
+
+
+def probe_microsoft_login_state(driver, desired_email: str = "") -> tuple[str, str, object]:
+    """Eén probe: (toestand, url, element voor de overgang of None)."""
+    try:
+        result = driver.execute_script(_STATE_SCRIPT, (desired_email or "").strip().lower(), SIGNED_OUT_INDICATORS)
+        if result:
+            return result[0], result[1] or "", result[2]
+    except Exception as exc:
+        logger.debug("Microsoft state-probe mislukt: %s", exc)
+    return MS_STATE_LOADING, "", None
 
 
-def _click_first_clickable(driver, selectors, timeout=4) -> bool:
-    for by, selector in selectors:
+def _click(driver, element) -> bool:
+    try:
+        element.click()
+        return True
+    except Exception:
+        # JS fallback voor overlays/rare state
         try:
-            el = WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((by, selector)))
-            el.click()
+            driver.execute_script("arguments[0].click();", element)
             return True
         except Exception:
-            # JS fallback voor overlays/rare state
-            try:
-                el = _find_visible(driver, [(by, selector)])
-                if el:
-                    driver.execute_script("arguments[0].click();", el)
-                    return True
-            except Exception:
-                pass
-            continue
-    return False
-
-
-def _find_visible(driver, selectors):
-    for by, selector in selectors:
-        try:
-            elements = driver.find_elements(by, selector)
-            for el in elements:
-                if el.is_displayed() and el.is_enabled():
-                    return el
-        except Exception:
-            continue
-    return None
+            return False
 
 
 def get_microsoft_email_input(driver, timeout: float = 1.2):
@@ -46,102 +129,82 @@ def get_microsoft_email_input(driver, timeout: float = 1.2):
     Snelle check of Microsoft e-mailveld al beschikbaar is.
     Retourneert element of None.
     """
-    deadline = time.time() + max(0.2, float(timeout))
-    selectors = [
-        (By.NAME, "loginfmt"),
-        (By.ID, "i0116"),
-        (By.CSS_SELECTOR, "input[type='email']"),
-    ]
-    while time.time() < deadline and not shutdown_event.is_set():
-        el = _find_visible(driver, selectors)
-        if el:
-            return el
-        time.sleep(0.1)
-    return None
+    return find_first_or_none(driver, MS_EMAIL_SELECTORS, timeout=max(0.2, float(timeout)), poll=0.1)
+
+
+def wait_for_microsoft_credential_step(driver, timeout: float = 30, desired_email: str = ""):
+    """
+    Wacht op het e-mail- of (bij een login_hint) meteen het wachtwoordveld.
+    Retourneert ("email" | "password", element) of (None, None). Met
+    desired_email telt een wachtwoordstap van een ander account niet.
+    """
+    element = find_first_or_none(
+        driver,
+        MS_EMAIL_SELECTORS + MS_PASSWORD_SELECTORS,
+        timeout=max(0.2, float(timeout)),
+        poll=0.1,
+    )
+    if element is None:
+        return None, None
+    try:
+        is_password = (element.get_attribute("type") or "").lower() == "password"
+    except Exception:
+        is_password = False
+    if is_password and desired_email:
+        if probe_microsoft_login_state(driver, desired_email)[0] != MS_STATE_PASSWORD_READY:
+            return None, None
+    return ("password" if is_password else "email"), element
 
 
 def prepare_microsoft_login_for_email(driver, desired_email: str, timeout: int = 30, start_url: str | None = None) -> None:
     """
     Zorg dat loginflow niet stil een eerder account hergebruikt.
-    - Klik indien aanwezig op "Sign out & switch"
+    - Klik indien aanwezig op "Sign out & switch" (enkel met start_url)
     - Kies "Use another account" op account-picker
+    - Ga terug bij de wachtwoordstap van een ander account
+    Keert terug zodra het e-mailveld of het wachtwoordveld van desired_email
+    klaarstaat; anders TimeoutException.
     """
     deadline = time.time() + timeout
-    poll = 0.25  # sneller respons zonder "bot-instant" te zijn
-    login_input_selectors = [
-        (By.NAME, "loginfmt"),
-        (By.ID, "i0116"),
-        (By.CSS_SELECTOR, "input[type='email']"),
-    ]
+    last_action: tuple[str, str] | None = None
+    last_action_at = 0.0
 
     while time.time() < deadline and not shutdown_event.is_set():
-        # Als we op een logout bevestigingspagina zitten, terug naar start.
-        try:
-            url = (driver.current_url or "").lower()
-            page = (driver.page_source or "").lower()
-        except Exception:
-            url, page = "", ""
-
-        if start_url and ("logout" in url or "signed out of your account" in page):
-            try:
-                driver.get(start_url)
-            except Exception:
-                pass
-            time.sleep(0.3)
-
-        # Als loginveld beschikbaar is, zijn we klaar.
-        if _find_visible(driver, login_input_selectors):
+        state, url, element = probe_microsoft_login_state(driver, desired_email)
+        if state in (MS_STATE_EMAIL_READY, MS_STATE_PASSWORD_READY):
             return
 
-        # 1) Als we op een pagina zitten met "Sign out & switch", forceer die.
-        # Alleen doen als we een start_url hebben om terug naartoe te gaan.
-        if start_url:
-            did_signout = _click_first_clickable(
-                driver,
-                [
-                    (By.XPATH, "//*[normalize-space()='Sign out & switch']"),
-                    (By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sign out & switch')]"),
-                    (By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sign out & switch')]"),
-                    (By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'afmelden') and contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'wissel')]"),
-                    (By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'afmelden') and contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'wissel')]"),
-                ],
-                timeout=1,
-            )
-            if did_signout:
-                time.sleep(0.3)
+        action = (state, url)
+        cooling_down = action == last_action and time.time() - last_action_at < _ACTION_COOLDOWN
+        if not cooling_down:
+            acted = False
+            if state == MS_STATE_SIGNED_OUT and start_url:
+                # Logout bevestigingspagina: terug naar start.
                 try:
                     driver.get(start_url)
+                    acted = True
                 except Exception:
                     pass
-                time.sleep(0.3)
-
-        # 2) Op account picker: kies expliciet "Use another account".
-        _click_first_clickable(
-            driver,
-            [
-                (By.XPATH, "//*[contains(normalize-space(),'Use another account')]"),
-                (By.XPATH, "//div[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'use another account')]"),
-                (By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'use another account')]"),
-                (By.XPATH, "//div[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'ander account')]"),
-                (By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'ander account')]"),
-            ],
-            timeout=1,
-        )
-
-        # 3) Soms toont MS een tegel met reeds gekende accounts; klik desnoods gewenste mail.
-        if desired_email:
-            _click_first_clickable(
-                driver,
-                [
-                    (
-                        By.XPATH,
-                        f"//*[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{desired_email.lower()}')]",
-                    ),
-                ],
-                timeout=1,
-            )
-
-        time.sleep(poll)
+            elif state == MS_STATE_SIGN_OUT_SWITCH and start_url:
+                # Alleen afmelden als we een start_url hebben om terug naartoe te gaan.
+                acted = _click(driver, element)
+            elif state == MS_STATE_ACCOUNT_PICKER:
+                acted = _click(driver, element)
+            elif state == MS_STATE_WRONG_ACCOUNT:
+                # Wachtwoordstap van een eerder gebruikt account: terug naar de e-mailstap.
+                if element is not None:
+                    acted = _click(driver, element)
+                elif start_url:
+                    try:
+                        driver.get(start_url)
+                        acted = True
+                    except Exception:
+                        pass
+            if acted:
+                logger.debug("Microsoft account-switch: %s", state)
+                last_action, last_action_at = action, time.time()
+
+        shutdown_event.wait(_POLL)
 
     if shutdown_event.is_set():
         raise TimeoutException("Microsoft login afgebroken door applicatie shutdown.")
@@ -0,0 +1,168 @@
+"""
+Compacte page-state probe voor login flows.
+
+In plaats van bij elke poll `driver.page_source` (vaak honderden KB) over de
+WebDriver-verbinding te halen en in Python te doorzoeken, draait één klein
+JS-functie in de browser. Die geeft enkel een handvol vlaggen terug
+(loginveld, wachtwoordveld, MFA, captcha, afgemeld, geen rechten), zodat een
+poll maar enkele bytes kost. MFA/captcha wordt herkend aan specifieke
+DOM-elementen en URL-paden, niet aan losse woorden in de paginatekst.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# DOM-markers van MFA/verificatieschermen (Microsoft en Google). Bewust geen
+# vrije tekst: een portaal dat "MFA" of "permissions" vermeldt, is geen
+# verificatiescherm.
+MANUAL_SELECTORS = (
+    "#idDiv_SAOTCAS_Title, #idDiv_SAOTCC_Title, #idTxtBx_SAOTCC_OTC, #idDiv_SAASDS_Title, "
+    "#idRichContext_DisplaySign, input[name='otc'], "
+    "#totpPin, input[name='totpPin'], input[name='idvPin'], #idvPreregisteredPhonePin"
+)
+# URL-paden van verificatiestappen; de Google-wachtwoordstap (/challenge/pwd) hoort er niet bij.
+MANUAL_URL_MARKERS = [
+    "/challenge/totp",
+    "/challenge/ipp",
+    "/challenge/az",
+    "/challenge/sk",
+    "/challenge/selection",
+    "/challenge/iap",
+    "/proofup",
+    "mysignins.microsoft.com/register",
+]
+CAPTCHA_SELECTORS = (
+    "iframe[src*='recaptcha'], iframe[src*='hcaptcha'], .g-recaptcha, #captcha, #captchaimg"
+)
+# reCAPTCHA v3 / invisible: verborgen iframes en de badge rechtsonder vragen niets aan de gebruiker.
+CAPTCHA_IGNORE_SELECTOR = ".grecaptcha-badge, [data-size='invisible']"
+# Een echte uitdaging (checkbox, afbeeldingen) is minstens zo groot.
+CAPTCHA_MIN_SIZE = 30
+
+BOT_WARNING_INDICATORS = [
+    "unusual traffic",
+    "ongebruikelijk verkeer",
+    "ik ben geen robot",
+    "verify you are human",
+]
+
+SIGNED_OUT_INDICATORS = ["signed out of your account"]
+
+# Volledige zinnen, niet het losse woord "permission".
+PERMISSION_DENIED_INDICATORS = [
+    "you don't have permission",
+    "you do not have permission",
+    "you don't have access",
+    "je hebt geen toestemming",
+    "u hebt geen toestemming",
+    "je hebt geen toegang",
+    "u hebt geen toegang",
+]
+
+LOGIN_FIELD_SELECTOR = (
+    "input[name='loginfmt'], #i0116, input[type='email'], "
+    "input#identifierId, input[name='identifier']"
+)
+
+# Gedeelde JS-zichtbaarheidscheck, zo streng als Selenium's is_displayed():
+# geen display:none/visibility:hidden, geen opacity 0 (ook niet via een ouder),
+# een echte afmeting en minstens deels binnen het document. Verborgen
+# lokvelden (off-screen, 0x0, transparant) tellen zo niet als zichtbaar.
+VISIBLE_JS = """
+const isVisible = (el) => {
+    if (!el || el.getClientRects().length === 0) return false;
+    const style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.display === 'none') return false;
+    for (let node = el; node instanceof Element; node = node.parentElement) {
+        if (window.getComputedStyle(node).opacity === '0') return false;
+    }
+    const rect = el.getBoundingClientRect();
+    if (rect.width <= 0 || rect.height <= 0) return false;
+    const doc = document.documentElement;
+    const left = rect.left + window.scrollX;
+    const top = rect.top + window.scrollY;
+    return left + rect.width > 0 && top + rect.height > 0
+        && left < Math.max(doc.scrollWidth, doc.clientWidth)
+        && top < Math.max(doc.scrollHeight, doc.clientHeight);
+};
+"""
+
+_PROBE_SCRIPT = VISIBLE_JS + """
+const [manualSelector, manualUrlMarkers, captchaSelector, captchaIgnore, captchaMinSize,
+       botTokens, signedOutTokens, deniedTokens, loginSelector] = arguments;
+const body = document.body;
+const text = ((document.title || '') + ' ' + ((body && body.innerText) || '')).toLowerCase();
+const url = (location.href || '').toLowerCase();
+const hasText = (tokens) => tokens.some((t) => text.includes(t));
+const visible = (selector) => Array.from(document.querySelectorAll(selector)).some(
+    (el) => !el.disabled && isVisible(el)
+);
+const captcha = Array.from(document.querySelectorAll(captchaSelector)).some((el) => {
+    if (el.closest(captchaIgnore)) return false;
+    if (!isVisible(el)) return false;
+    const rect = el.getBoundingClientRect();
+    return rect.width >= captchaMinSize && rect.height >= captchaMinSize;
+});
+return {
+    url: location.href,
+    ready: document.readyState,
+    login_field: visible(loginSelector),
+    password_field: visible("input[type='password']"),
+    bot_warning: captcha || hasText(botTokens),
+    manual: captcha || visible(manualSelector) || manualUrlMarkers.some((m) => url.includes(m)),
+    signed_out: hasText(signedOutTokens),
+    permission_denied: hasText(deniedTokens),
+};
+"""
+
+_EMPTY_STATE = {
+    "url": "",
+    "ready": "",
+    "login_field": False,
+    "password_field": False,
+    "bot_warning": False,
+    "manual": False,
+    "signed_out": False,
+    "permission_denied": False,
+}
+
+
+def probe_page_state(driver) -> dict:
+    """
+    Classificeer de huidige pagina met één JS-aanroep.
+    Bij een fout (bv. pagina wisselt net) komt een lege state terug.
+    """
+    try:
+        state = driver.execute_script(
+            _PROBE_SCRIPT,
+            MANUAL_SELECTORS,
+            MANUAL_URL_MARKERS,
+            CAPTCHA_SELECTORS,
+            CAPTCHA_IGNORE_SELECTOR,
+            CAPTCHA_MIN_SIZE,
+            BOT_WARNING_INDICATORS,
+            SIGNED_OUT_INDICATORS,
+            PERMISSION_DENIED_INDICATORS,
+            LOGIN_FIELD_SELECTOR,
+        )
+    except Exception as exc:
+        logger.debug("Page-state probe mislukt: %s", exc)
+        state = None
+    if not isinstance(state, dict):
+        return dict(_EMPTY_STATE)
+    return {**_EMPTY_STATE, **state}
+
+
+def manual_intervention_detected(driver) -> bool:
+    """True als een MFA-, captcha- of verificatiescherm zichtbaar is."""
+    return bool(probe_page_state(driver)["manual"])
+
+
+def bot_warning_detected(driver) -> bool:
+    """True als de pagina een bot/captcha-waarschuwing toont."""
+    return bool(probe_page_state(driver)["bot_warning"])
+
+
+def permission_denied(driver) -> bool:
+    """True als de pagina meldt dat het account geen rechten heeft."""
+    return bool(probe_page_state(driver)["permission_denied"])
@@ -0,0 +1,210 @@
+"""
+Opruimen van geïsoleerde Chrome-profielen tijdens het draaien van de tool.
+
+Elke geharde login krijgt een eigen map onder chrome_user_data_isolated/.
+In plaats van die allemaal bij het afsluiten in één keer te wissen, houdt een
+achtergrondthread bij welke profielen nog in gebruik zijn en verwijdert hij
+een map zodra de driver gesloten is of de Chrome erachter verdwenen is.
+Mappen die (op Windows) nog gelocked zijn, worden later opnieuw geprobeerd met
+oplopende wachttijd. Bij de start worden achtergebleven mappen van een
+gecrashte vorige run en de prullenbak van de vorige shutdown opgeruimd.
+
+Configuratie:
+- AUTO_LOGIN_PERSIST_PROFILE=1 laat profielen staan (zelfde vlag als bij exit)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from src.auto_login.browser_cleanup import trash_dir
+from src.core.credentials_manager import get_data_dir
+from src.core.env_utils import is_truthy
+from src.core.shutdown import shutdown_event, start_thread
+
+logger = logging.getLogger(__name__)
+
+ISOLATED_PROFILES_DIRNAME = "chrome_user_data_isolated"
+
+_TICK_SECONDS = 2.0
+_RETRY_BASE_SECONDS = 1.0
+_RETRY_MAX_SECONDS = 60.0
+_MAX_ATTEMPTS = 10
+# Aantal opeenvolgende negatieve probes voor een profiel als verlaten geldt.
+_MISSES_BEFORE_RELEASE = 2
+
+# Mappen van na de start van dit proces zijn nooit "achtergebleven".
+_PROCESS_STARTED_AT = time.time()
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread: threading.Thread | None = None
+# Profielen in gebruik: pad -> [probe, aantal gemiste probes].
+_tracked: dict[Path, list] = {}
+# Te wissen profielen: pad -> [poging, tijdstip volgende poging].
+_pending: dict[Path, list] = {}
+
+
+def _janitor_enabled() -> bool:
+    return not is_truthy(os.environ.get("AUTO_LOGIN_PERSIST_PROFILE"))
+
+
+def isolated_profiles_root() -> Path:
+    return Path(get_data_dir()) / ISOLATED_PROFILES_DIRNAME
+
+
+def track_profile(path: str | Path, probe: Callable[[], bool]) -> None:
+    """
+    Volg een geïsoleerd profiel. `probe` geeft False zodra de browser die
+    het profiel gebruikt weg is; de map wordt dan gewist.
+    """
+    with _lock:
+        _tracked[Path(path)] = [probe, 0]
+    start_profile_janitor()
+
+
+def release_profile(path: str | Path | None) -> None:
+    """Het profiel is niet meer in gebruik (driver gesloten): zo snel mogelijk wissen."""
+    if path is None:
+        return
+    path = Path(path)
+    with _lock:
+        _tracked.pop(path, None)
+        _pending.setdefault(path, [0, time.monotonic()])
+    start_profile_janitor()
+    _wake.set()
+
+
+def _profile_in_use(path: Path) -> bool:
+    """Gebruikt een (andere) Chrome dit profiel nog? Kijkt naar Chrome's eigen profiel-lock."""
+    if sys.platform == "win32":
+        lock_file = path / "lockfile"
+        try:
+            # Chrome houdt dit bestand exclusief open; lukt verwijderen, dan draait er niets meer.
+            lock_file.unlink()
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return True
+        return False
+
+    lock_link = path / "SingletonLock"
+    if not lock_link.is_symlink():
+        return False
+    try:
+        # Doel is "<hostname>-<pid>".
+        pid = int(os.readlink(lock_link).rsplit("-", 1)[1])
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except Exception:
+        # Onbekend formaat of geen rechten: voorzichtig blijven.
+        return True
+
+
+def _sweep_leftovers() -> int:
+    """Plan het wissen van achtergebleven profielen en prullenbak van een vorige run."""
+    found = 0
+    now = time.monotonic()
+    trash = trash_dir()
+    if trash.is_dir():
+        with _lock:
+            for entry in trash.iterdir():
+                if entry not in _pending and not _profile_in_use(entry):
+                    _pending[entry] = [0, now]
+                    found += 1
+
+    root = isolated_profiles_root()
+    if not root.is_dir():
+        return found
+    with _lock:
+        for kind_dir in root.iterdir():
+            if not kind_dir.is_dir():
+                continue
+            for profile_dir in kind_dir.iterdir():
+                if profile_dir in _tracked or profile_dir in _pending or not profile_dir.is_dir():
+                    continue
+                try:
+                    if profile_dir.stat().st_mtime >= _PROCESS_STARTED_AT:
+                        continue
+                except OSError:
+                    continue
+                if _profile_in_use(profile_dir):
+                    continue
+                _pending[profile_dir] = [0, now]
+                found += 1
+    if found:
+        logger.info("PROFILE_SWEEP %d achtergebleven profiel(en)", found)
+    return found
+
+
+def _check_tracked() -> None:
+    with _lock:
+        tracked = list(_tracked.items())
+    for path, entry in tracked:
+        try:
+            alive = bool(entry[0]())
+        except Exception:
+            alive = False
+        with _lock:
+            if _tracked.get(path) is not entry:
+                continue
+            entry[1] = 0 if alive else entry[1] + 1
+            if entry[1] >= _MISSES_BEFORE_RELEASE:
+                del _tracked[path]
+                _pending.setdefault(path, [0, time.monotonic()])
+
+
+def _delete_due() -> None:
+    now = time.monotonic()
+    with _lock:
+        due = [(path, entry) for path, entry in _pending.items() if entry[1] <= now]
+    for path, entry in due:
+        try:
+            shutil.rmtree(path)
+            done = True
+        except FileNotFoundError:
+            done = True
+        except Exception as exc:
+            # Meestal een bestand dat Chrome nog even vasthoudt tijdens het afsluiten.
+            done = False
+            error = exc
+        with _lock:
+            if done:
+                _pending.pop(path, None)
+                continue
+            entry[0] += 1
+            if entry[0] >= _MAX_ATTEMPTS:
+                _pending.pop(path, None)
+                logger.warning("Kon profiel %s niet wissen na %d pogingen: %s", path, entry[0], error)
+                continue
+            delay = min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * 2 ** (entry[0] - 1))
+            entry[1] = time.monotonic() + delay
+
+
+def _janitor_loop() -> None:
+    _sweep_leftovers()
+    while not shutdown_event.is_set():
+        _check_tracked()
+        _delete_due()
+        _wake.wait(timeout=_TICK_SECONDS)
+        _wake.clear()
+
+
+def start_profile_janitor() -> None:
+    """Start (eenmalig) de opruimthread; die ruimt eerst achtergebleven profielen op."""
+    global _thread
+    if not _janitor_enabled() or shutdown_event.is_set():
+        return
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_janitor_loop, daemon=True, name="profile-janitor")
+        start_thread(_thread)
@@ -0,0 +1,151 @@
+"""
+Resource-policy per service tijdens de loginnavigatie.
+
+Loginpagina's van Microsoft, Google en Smartschool laden fonts, achtergrond-
+afbeeldingen, telemetrie en analytics die de geautomatiseerde flow niet nodig
+heeft. Zolang een login-job loopt worden die via CDP `Network.setBlockedURLs`
+geblokkeerd; zodra de job op de gebruiker wacht (MFA/captcha) of afloopt,
+wordt de blokkade opgeheven zodat het portaal normaal rendert. Opnieuw
+laden gebeurt enkel als het huidige document effectief geblokkeerde
+resources mist.
+
+Daarnaast bepaalt deze module de pageLoadStrategy: "eager" voor de geharde
+admin-flows (de flow wacht zelf op de velden die hij nodig heeft, niet op het
+volledige load-event), "normal" voor al de rest.
+
+Configuratie:
+- AUTO_LOGIN_DISABLE_RESOURCE_BLOCKING=1 schakelt het blokkeren uit
+- AUTO_LOGIN_PAGE_LOAD_STRATEGY: normal | eager | none (overschrijft beide standaarden)
+- AUTO_LOGIN_PAGE_LOAD_STRATEGIES: per service, bv. "google_admin=normal"
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+
+from src.core.env_utils import is_truthy, parse_strategy_map
+from src.core.login_jobs import JOB_SUCCEEDED, add_job_settle_callback
+
+logger = logging.getLogger(__name__)
+
+PAGE_LOAD_STRATEGIES = {"normal", "eager", "none"}
+_DEFAULT_PAGE_LOAD_STRATEGY = "normal"
+# Geharde admin-flows: wachten zelf op hun velden, dus niet op het volledige load-event.
+_EAGER_SERVICES = {"microsoft_admin", "intune_admin", "azure_admin", "google_admin"}
+
+_FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf"]
+_ANALYTICS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*clarity.ms*",
+    "*browser.events.data.microsoft.com*",
+    "*browser.events.data.msn.com*",
+    "*js.monitor.azure.com*",
+    "*dc.services.visualstudio.com*",
+]
+# Tenant-branding (grote achtergrondfoto's) op de Microsoft loginpagina.
+_MICROSOFT_BRANDING = ["*aadcdn.msftauthimages.net*", "*aadcdn.msauthimages.net*"]
+_IMAGES = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp"]
+
+_MICROSOFT_POLICY = _FONTS + _ANALYTICS + _MICROSOFT_BRANDING
+
+SERVICE_BLOCKED_URLS: dict[str, list[str]] = {
+    "microsoft_admin": _MICROSOFT_POLICY,
+    "intune_admin": _MICROSOFT_POLICY,
+    "azure_admin": _MICROSOFT_POLICY,
+    # Google kan naar Microsoft SSO doorsturen; geen afbeeldingen blokkeren (captcha's).
+    "google_admin": _MICROSOFT_POLICY,
+    "smartschool": _FONTS + _ANALYTICS + _MICROSOFT_BRANDING + _IMAGES,
+    "smartschool_admin": _FONTS + _ANALYTICS + _MICROSOFT_BRANDING + _IMAGES,
+    # Geen easy4u: die loopt in de gedeelde sessie, waar een blokkade ook de
+    # tabs van andere logins zou raken.
+}
+
+
+def page_load_strategy(service: str | None = None) -> str:
+    """pageLoadStrategy voor een nieuwe driver (per service overschrijfbaar)."""
+    if service:
+        per_service = parse_strategy_map(os.environ.get("AUTO_LOGIN_PAGE_LOAD_STRATEGIES"), PAGE_LOAD_STRATEGIES)
+        if service in per_service:
+            return per_service[service]
+    default = (os.environ.get("AUTO_LOGIN_PAGE_LOAD_STRATEGY") or "").strip().lower()
+    if default in PAGE_LOAD_STRATEGIES:
+        return default
+    return "eager" if service in _EAGER_SERVICES else _DEFAULT_PAGE_LOAD_STRATEGY
+
+
+def _pattern_regex(pattern: str) -> str:
+    """Network.setBlockedURLs-patroon ("*" als wildcard) als JS-regex."""
+    return "^" + ".*".join(re.escape(part) for part in pattern.split("*")) + "$"
+
+
+# Mist het huidige document (geladen sinds de blokkade) een resource die onder de patronen valt?
+_BLOCKED_ON_DOCUMENT_SCRIPT = """
+const patterns = arguments[0].map((p) => new RegExp(p, "i"));
+const since = arguments[1];
+const checkFonts = arguments[2];
+if (performance.timeOrigin < since) return false;
+const urls = [];
+document.querySelectorAll("img").forEach((img) => {
+  if (img.complete && img.naturalWidth === 0) urls.push(img.currentSrc || img.src);
+});
+document.querySelectorAll("script[src], link[href], iframe[src]").forEach((el) => urls.push(el.src || el.href));
+if (urls.some((url) => url && patterns.some((re) => re.test(url)))) return true;
+if (!checkFonts || !document.fonts) return false;
+let failed = false;
+document.fonts.forEach((font) => { if (font.status === "error") failed = true; });
+return failed;
+"""
+
+
+def _blocked_on_current_document(driver, patterns: list[str], since: float) -> bool:
+    try:
+        return bool(driver.execute_script(
+            _BLOCKED_ON_DOCUMENT_SCRIPT,
+            [_pattern_regex(p) for p in patterns],
+            since * 1000,
+            any(p in _FONTS for p in patterns),
+        ))
+    except Exception:
+        return False
+
+
+def lift_resource_policy(driver, *, reload: bool = False) -> None:
+    """Hef de blokkade op; met reload wordt de huidige pagina volledig opnieuw geladen."""
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+        if reload:
+            driver.refresh()
+    except Exception as exc:
+        logger.debug("Kon resource-blokkade niet opheffen: %s", exc)
+
+
+def apply_resource_policy(driver, service: str | None) -> bool:
+    """
+    Blokkeer overbodige resources voor deze service tot de login-job klaar
+    is. Enkel binnen een login-job (anders zou de blokkade nooit opgeheven
+    worden); geeft True als de policy actief is.
+    """
+    patterns = SERVICE_BLOCKED_URLS.get(service or "")
+    if not patterns or is_truthy(os.environ.get("AUTO_LOGIN_DISABLE_RESOURCE_BLOCKING")):
+        return False
+
+    blocked_since = time.time()
+
+    def _lift(state: str) -> None:
+        # Na een geslaagde login enkel herladen als het portaal effectief resources mist.
+        reload = state == JOB_SUCCEEDED and _blocked_on_current_document(driver, patterns, blocked_since)
+        lift_resource_policy(driver, reload=reload)
+
+    if not add_job_settle_callback(_lift):
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        return True
+    except Exception as exc:
+        logger.debug("CDP resource-blokkade niet beschikbaar: %s", exc)
+        return False
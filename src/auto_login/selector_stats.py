@@ -0,0 +1,173 @@
+"""
+Geleerde selector-volgorde per (service, veld).
+
+Elke flow heeft een vaste lijst fallback-selectors. Hier wordt bijgehouden
+welke selector effectief won; volgende runs geven die voorrang. Alle
+kandidaten worden per poll in één JS-aanroep geëvalueerd, dus de volgorde
+bepaalt enkel welke selector wint als er meerdere matchen, niet de snelheid.
+Promotie gebeurt daarom enkel binnen een aaneengesloten groep even specifieke
+selectors: generieke fallbacks (enkel tag/type, bv. "form input[type='text']")
+blijven staan waar de code ze zet en kunnen een specifieke selector nooit
+permanent verdringen. Scores nemen
+exponentieel af (halfwaardetijd AUTO_LOGIN_SELECTOR_HALF_LIFE_DAYS, standaard
+14 dagen), zodat na een redesign van een portaal de nieuwe winnaar vanzelf
+weer bovenaan komt zonder codewijziging.
+
+Opslag: selector_stats.json in de datamap (atomisch weggeschreven).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+
+from src.core.credentials_manager import get_data_dir, write_json_atomic
+from src.core.shutdown import register_shutdown_callback
+
+logger = logging.getLogger(__name__)
+
+_STATS_FILENAME = "selector_stats.json"
+_DEFAULT_HALF_LIFE_DAYS = 14.0
+# Scores onder deze drempel worden vergeten.
+_MIN_SCORE = 0.05
+# Minimaal aantal seconden tussen twee schrijfacties; de rest gebeurt bij shutdown.
+_SAVE_INTERVAL = 5.0
+
+
+def _half_life_seconds() -> float:
+    try:
+        days = float(os.environ.get("AUTO_LOGIN_SELECTOR_HALF_LIFE_DAYS", "").strip())
+        if days > 0:
+            return days * 86400
+    except Exception:
+        pass
+    return _DEFAULT_HALF_LIFE_DAYS * 86400
+
+
+# CSS die enkel op tag/type selecteert (bv. "input[type='password']", "form input").
+_GENERIC_CSS = re.compile(r"[a-z\s>]*(\[type=['\"]?[\w-]+['\"]?\][a-z\s>]*)*", re.IGNORECASE)
+
+
+def selector_id(by: str, value: str) -> str:
+    return f"{by}={value}"
+
+
+def selector_is_generic(by: str, value: str) -> bool:
+    """Generieke fallback: selecteert enkel op tag/type, niet op id, naam, label of tekst."""
+    if by == By.TAG_NAME:
+        return True
+    return by == By.CSS_SELECTOR and bool(_GENERIC_CSS.fullmatch(value.strip()))
+
+
+class SelectorStats:
+    """Winst-scores per (service, veld, selector) met tijdsgebonden decay."""
+
+    def __init__(self, stats_file: Path) -> None:
+        self.stats_file = Path(stats_file)
+        self._lock = threading.Lock()
+        self._data: dict[str, dict[str, dict]] | None = None
+        self._dirty = False
+        self._last_save = 0.0
+
+    def _load_locked(self) -> dict[str, dict[str, dict]]:
+        if self._data is None:
+            try:
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._data = data if isinstance(data, dict) else {}
+            except FileNotFoundError:
+                self._data = {}
+            except Exception as exc:
+                logger.warning("Selector-statistieken onleesbaar, opnieuw beginnen: %s", exc)
+                self._data = {}
+        return self._data
+
+    @staticmethod
+    def _decayed(entry: dict, now: float, half_life: float) -> float:
+        age = max(0.0, now - float(entry.get("updated", now)))
+        return float(entry.get("score", 0.0)) * 0.5 ** (age / half_life)
+
+    def order(self, key: str, selectors: list) -> list:
+        """
+        Sorteer selectors op (vervallen) score, maar enkel binnen aaneengesloten
+        groepen van even specifieke selectors; bij gelijke stand blijft de
+        codevolgorde.
+        """
+        now, half_life = time.time(), _half_life_seconds()
+        with self._lock:
+            entries = self._load_locked().get(key) or {}
+            if not entries:
+                return list(selectors)
+            scores = {sid: self._decayed(entry, now, half_life) for sid, entry in entries.items()}
+        ordered: list = []
+        group: list = []
+        for selector in selectors:
+            if group and selector_is_generic(*selector) != selector_is_generic(*group[0]):
+                ordered += self._sorted_group(group, scores)
+                group = []
+            group.append(selector)
+        return ordered + self._sorted_group(group, scores)
+
+    @staticmethod
+    def _sorted_group(group: list, scores: dict[str, float]) -> list:
+        indexed = list(enumerate(group))
+        indexed.sort(key=lambda item: (-scores.get(selector_id(*item[1]), 0.0), item[0]))
+        return [selector for _, selector in indexed]
+
+    def record_win(self, key: str, by: str, value: str) -> None:
+        """Tel een winst voor deze selector; andere selectors van dezelfde sleutel vervallen enkel."""
+        now, half_life = time.time(), _half_life_seconds()
+        sid = selector_id(by, value)
+        with self._lock:
+            entries = self._load_locked().setdefault(key, {})
+            for other_id, entry in list(entries.items()):
+                score = self._decayed(entry, now, half_life)
+                if score < _MIN_SCORE and other_id != sid:
+                    del entries[other_id]
+                else:
+                    entries[other_id] = {"score": score, "updated": now}
+            current = entries.get(sid, {"score": 0.0})
+            entries[sid] = {"score": float(current["score"]) + 1.0, "updated": now}
+            self._dirty = True
+            if now - self._last_save >= _SAVE_INTERVAL:
+                self._save_locked()
+
+    def _save_locked(self) -> None:
+        if not self._dirty or self._data is None:
+            return
+        try:
+            write_json_atomic(self.stats_file, self._data)
+            self._dirty = False
+            self._last_save = time.time()
+        except Exception as exc:
+            logger.warning("Kon selector-statistieken niet bewaren: %s", exc)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+
+_stats: SelectorStats | None = None
+_stats_lock = threading.Lock()
+
+
+def get_selector_stats() -> SelectorStats:
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = SelectorStats(Path(get_data_dir()) / _STATS_FILENAME)
+        return _stats
+
+
+def _flush_selector_stats() -> None:
+    if _stats is not None:
+        _stats.flush()
+
+
+register_shutdown_callback("selector_stats", _flush_selector_stats)
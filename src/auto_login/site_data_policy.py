@@ -0,0 +1,124 @@
+"""
+Site-data policy per service: welke origins vóór een login gewist worden, en wanneer.
+
+Microsoft-logins wissen de Microsoft site-data (cookies + storage) om te
+voorkomen dat een eerder account stil hergebruikt wordt. Dat heeft enkel zin
+op een profiel dat al eerder gebruikt is (gedeelde sessie, vast
+accountprofiel); een vers geïsoleerd profiel of browser context heeft niets
+te wissen en wordt overgeslagen.
+
+Per service ligt ook vast wanneer er gewist wordt: vóór de eerste navigatie
+(de sessie opent meteen schoon, geen extra herlaadbeurt) of pas op vraag van
+de flow (bv. als het loginveld niet meteen klaarstaat).
+
+Alle origins worden in één keer gewist: de `Storage.clearDataForOrigin`
+commando's gaan samen over één CDP-websocket naar het tabblad en de
+antwoorden worden daarna opgehaald, in plaats van zes opeenvolgende
+WebDriver-aanroepen. Lukt dat niet (geen debuggerAddress, fout van Chrome),
+dan valt het terug op `execute_cdp_cmd` per origin.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+import websocket
+
+logger = logging.getLogger(__name__)
+
+MICROSOFT_ORIGINS = [
+    "https://login.microsoftonline.com",
+    "https://microsoftonline.com",
+    "https://microsoft.com",
+    "https://admin.microsoft.com",
+    "https://office.com",
+    "https://live.com",
+]
+
+CLEAR_BEFORE_NAVIGATION = "before_navigation"
+CLEAR_ON_DEMAND = "on_demand"
+
+# Services die via Microsoft inloggen (rechtstreeks of via SSO): (wanneer, origins).
+SERVICE_SITE_DATA_POLICY: dict[str, tuple[str, list[str]]] = {
+    "microsoft_admin": (CLEAR_ON_DEMAND, MICROSOFT_ORIGINS),
+    "intune_admin": (CLEAR_ON_DEMAND, MICROSOFT_ORIGINS),
+    "azure_admin": (CLEAR_ON_DEMAND, MICROSOFT_ORIGINS),
+    "google_admin": (CLEAR_ON_DEMAND, MICROSOFT_ORIGINS),
+    "smartschool": (CLEAR_BEFORE_NAVIGATION, MICROSOFT_ORIGINS),
+}
+
+_CONNECT_TIMEOUT = 2.0
+_REPLY_TIMEOUT = 5.0
+
+
+def _page_ws_url(driver) -> str | None:
+    """CDP-websocket van het huidige tabblad (chromedriver gebruikt het target-id als window handle)."""
+    try:
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        return f"ws://{address}/devtools/page/{driver.current_window_handle}"
+    except Exception:
+        return None
+
+
+def _clear_batched(driver, origins: list[str]) -> list[str]:
+    """Verstuur alle clears samen over één websocket; geeft de origins terug die niet lukten."""
+    url = _page_ws_url(driver)
+    if not url:
+        return list(origins)
+    try:
+        ws = websocket.create_connection(url, timeout=_CONNECT_TIMEOUT, suppress_origin=True)
+    except Exception as exc:
+        logger.debug("Kon CDP-websocket niet openen: %s", exc)
+        return list(origins)
+    pending = {message_id: origin for message_id, origin in enumerate(origins, start=1)}
+    failed: list[str] = []
+    try:
+        ws.settimeout(_REPLY_TIMEOUT)
+        for message_id, origin in pending.items():
+            ws.send(json.dumps({
+                "id": message_id,
+                "method": "Storage.clearDataForOrigin",
+                "params": {"origin": origin, "storageTypes": "all"},
+            }))
+        while pending:
+            reply = json.loads(ws.recv())
+            origin = pending.pop(reply.get("id"), None)
+            if origin is not None and "error" in reply:
+                failed.append(origin)
+    except Exception as exc:
+        logger.debug("Gebundeld wissen van site-data onvolledig: %s", exc)
+        failed.extend(pending.values())
+    finally:
+        try:
+            ws.close()
+        except Exception:
+            pass
+    return failed
+
+
+def clear_site_data(driver, origins: list[str]) -> None:
+    """Wis cookies + storage van de origins (gebundeld, met fallback per origin)."""
+    for origin in _clear_batched(driver, origins) if origins else []:
+        try:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        except Exception:
+            continue
+
+
+def apply_site_data_policy(
+    driver,
+    service: str | None,
+    *,
+    fresh_profile: bool,
+    moment: str = CLEAR_ON_DEMAND,
+) -> bool:
+    """
+    Wis de site-data die de policy voor deze service op dit moment
+    voorschrijft; nooit op een vers profiel. True als er gewist werd (de flow
+    moet dan eventueel opnieuw navigeren).
+    """
+    policy = SERVICE_SITE_DATA_POLICY.get(service or "")
+    if not policy or fresh_profile or policy[0] != moment:
+        return False
+    clear_site_data(driver, policy[1])
+    return True
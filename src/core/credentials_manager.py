@@ -6,9 +6,12 @@ import sys
 import json
 import base64
 import ctypes
+import hashlib
+import threading
 from pathlib import Path
 from cryptography.fernet import Fernet
 from src.core.security_utils import normalize_service_url
+from src.core.shutdown import register_shutdown_callback
 
 
 def get_data_dir() -> Path:
@@ -16,7 +19,14 @@ def get_data_dir() -> Path:
     Directory voor credentials en server-bestanden (persistent).
     Standaard altijd buiten de projectmap in een gebruikersspecifieke datamap.
     Bestaande bestanden uit de oude projectlocatie worden automatisch gemigreerd.
+    AUTOLOGIN_DATA_DIR wijst een aparte datamap aan (bv. voor de benchmark).
     """
+    override = os.environ.get("AUTOLOGIN_DATA_DIR", "").strip()
+    if override:
+        data_dir = Path(override)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        return data_dir
+
     if os.environ.get("AUTOLOGIN_USE_PROJECT_DATA_DIR", "").strip().lower() in {"1", "true", "yes", "on"}:
         project_dir = Path(__file__).parent
         project_dir.mkdir(parents=True, exist_ok=True)
@@ -192,6 +202,14 @@ def get_or_create_windows_dpapi_key(key_file: Path, legacy_key_file: Path | None
     return key
 
 
+def _primary_key_file() -> Path:
+    """Vaste locatie van de key file (DPAPI-blob op Windows, raw key elders)."""
+    if os.name == "nt":
+        appdata_dir = Path(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")))
+        return appdata_dir / "SintMaartenCampusAutologin" / ".credentials_key.dpapi"
+    return Path.home() / ".config" / "sintmaartencampus-autologin" / ".credentials_key"
+
+
 def get_encryption_key(scripts_dir: Path) -> bytes:
     """
     Haal de encryptie key op. Gebruikt een master password of genereert een key file.
@@ -215,10 +233,9 @@ def get_encryption_key(scripts_dir: Path) -> bytes:
         # Gebruik key file - plaats in veilige locatie
         if os.name == "nt":  # Windows
             # Gebruik AppData\Local en bind de sleutel aan de Windows gebruiker via DPAPI.
-            appdata_dir = Path(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")))
-            secure_dir = appdata_dir / "SintMaartenCampusAutologin"
+            key_file = _primary_key_file()
+            secure_dir = key_file.parent
             secure_dir.mkdir(exist_ok=True, mode=0o700)
-            key_file = secure_dir / ".credentials_key.dpapi"
             old_key_file = secure_dir / ".credentials_key"
             legacy_project_key_file = scripts_dir / ".credentials_key"
             if key_file.exists():
@@ -230,9 +247,8 @@ def get_encryption_key(scripts_dir: Path) -> bytes:
             return get_or_create_windows_dpapi_key(key_file)
         else:  # Unix/Linux
             # Gebruik .config directory in home
-            config_dir = Path.home() / ".config" / "sintmaartencampus-autologin"
-            config_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
-            key_file = config_dir / ".credentials_key"
+            key_file = _primary_key_file()
+            key_file.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
             # Fallback naar oude locatie voor backward compatibility
             old_key_file = scripts_dir / ".credentials_key"
         
@@ -266,13 +282,83 @@ def get_encryption_key(scripts_dir: Path) -> bytes:
             return get_or_create_key(key_file)
 
 
+class FernetKeyProvider:
+    """
+    Houdt de opgebouwde Fernet-instantie in het geheugen.
+
+    Key-afleiding (PBKDF2 met 100.000 iteraties of DPAPI + file reads) gebeurt
+    enkel opnieuw als de master password env var of de key file (mtime/grootte)
+    wijzigt. Bij shutdown wordt de cache gewist.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._fernet: Fernet | None = None
+        self._fingerprint: tuple | None = None
+
+    @staticmethod
+    def _fingerprint_for() -> tuple | None:
+        master_password = os.environ.get("CREDENTIALS_MASTER_PASSWORD")
+        if master_password:
+            # Geen plaintext wachtwoord bijhouden, enkel een digest om wijzigingen te zien.
+            return ("env", hashlib.sha256(master_password.encode()).hexdigest())
+        key_file = _primary_key_file()
+        try:
+            st = key_file.stat()
+        except OSError:
+            # Key file bestaat (nog) niet of is legacy fallback: niet cachen.
+            return None
+        return ("file", str(key_file), st.st_mtime_ns, st.st_size)
+
+    def fingerprint(self) -> tuple | None:
+        """Vingerafdruk van de huidige sleutel (None: onbekend, bv. legacy key file)."""
+        return self._fingerprint_for()
+
+    def get_fernet(self, scripts_dir: Path) -> Fernet:
+        fingerprint = self._fingerprint_for()
+        with self._lock:
+            if self._fernet is not None and fingerprint is not None and fingerprint == self._fingerprint:
+                return self._fernet
+
+            fernet = Fernet(get_encryption_key(scripts_dir))
+            # Opnieuw bepalen: get_encryption_key kan de key file net aangemaakt of gemigreerd hebben.
+            self._fingerprint = self._fingerprint_for()
+            self._fernet = fernet if self._fingerprint is not None else None
+            return fernet
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fernet = None
+            self._fingerprint = None
+
+
+_key_provider = FernetKeyProvider()
+
+
+def get_fernet(scripts_dir: Path) -> Fernet:
+    """Geef de (gecachte) Fernet-instantie voor encryptie/decryptie."""
+    return _key_provider.get_fernet(scripts_dir)
+
+
+def key_fingerprint() -> tuple | None:
+    """Vingerafdruk van de sleutel die get_fernet nu gebruikt."""
+    return _key_provider.fingerprint()
+
+
+def clear_key_cache() -> None:
+    """Wis de in-memory sleutel, bv. na key-migratie of bij afsluiten."""
+    _key_provider.clear()
+
+
+register_shutdown_callback("credentials_key_cache", clear_key_cache)
+
+
 def encrypt_credentials(credentials: dict, scripts_dir: Path) -> dict:
     """
     Encrypt credentials dictionary. Alleen wachtwoorden worden geëncrypteerd.
     Werkt ook voor RDP servers (waar password direct in dict staat).
     """
-    key = get_encryption_key(scripts_dir)
-    fernet = Fernet(key)
+    fernet = get_fernet(scripts_dir)
     
     encrypted = {}
     for service, creds in credentials.items():
@@ -296,8 +382,7 @@ def encrypt_password(password: str, scripts_dir: Path) -> str:
     if not password:
         return ""
     
-    key = get_encryption_key(scripts_dir)
-    fernet = Fernet(key)
+    fernet = get_fernet(scripts_dir)
     encrypted_value = fernet.encrypt(password.encode())
     return base64.b64encode(encrypted_value).decode()
 
@@ -310,8 +395,7 @@ def decrypt_password(encrypted_password: str, scripts_dir: Path) -> str:
         return ""
     
     try:
-        key = get_encryption_key(scripts_dir)
-        fernet = Fernet(key)
+        fernet = get_fernet(scripts_dir)
         encrypted_bytes = base64.b64decode(encrypted_password.encode())
         decrypted_value = fernet.decrypt(encrypted_bytes)
         return decrypted_value.decode()
@@ -324,8 +408,7 @@ def decrypt_credentials(encrypted_credentials: dict, scripts_dir: Path) -> dict:
     Decrypt credentials dictionary.
     """
     try:
-        key = get_encryption_key(scripts_dir)
-        fernet = Fernet(key)
+        fernet = get_fernet(scripts_dir)
         
         decrypted = {}
         for service, creds in encrypted_credentials.items():
@@ -350,52 +433,346 @@ def decrypt_credentials(encrypted_credentials: dict, scripts_dir: Path) -> dict:
         return {}
 
 
-def load_encrypted_credentials(credentials_file: Path, scripts_dir: Path) -> dict:
+def _secure_file_permissions(path: Path) -> None:
+    """Zet bestandspermissies zodat alleen de eigenaar kan lezen/schrijven."""
+    if os.name != "nt":  # Unix/Linux
+        os.chmod(path, 0o600)
+    else:  # Windows
+        try:
+            import stat
+            # Alleen eigenaar kan lezen/schrijven
+            os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+        except Exception:
+            pass  # Als het niet lukt, ga door
+
+
+def write_json_atomic(path: Path, data) -> None:
     """
-    Laad en decrypt credentials uit bestand.
+    Schrijf JSON atomair: eerst naar een tijdelijk bestand in dezelfde map,
+    fsync, en dan rename over het doelbestand. Een crash halverwege laat het
+    oude bestand dus intact.
     """
-    if not credentials_file.exists():
-        return {}
-    
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        with open(credentials_file, "r", encoding="utf-8") as f:
-            encrypted_data = json.load(f)
-        
-        return decrypt_credentials(encrypted_data, scripts_dir)
-    except Exception as e:
-        print(f"Fout bij laden credentials: {e}")
-        return {}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        _secure_file_permissions(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+    if os.name != "nt":
+        # Zorg dat ook de rename zelf op schijf staat.
+        try:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+def _reuse_or_encrypt(plaintext: str, previous: tuple[str, str, tuple | None] | None, scripts_dir: Path) -> str:
+    """
+    Hergebruik de bestaande ciphertext als het wachtwoord niet gewijzigd is.
+    `previous` is (plaintext, ciphertext, sleutel-vingerafdruk) zoals laatst
+    geladen/opgeslagen; na een sleutelwissel wordt opnieuw geëncrypteerd.
+    """
+    if previous is not None and previous[0] == plaintext and previous[1]:
+        fingerprint = previous[2]
+        if fingerprint is not None and fingerprint == key_fingerprint():
+            return previous[1]
+    return encrypt_password(plaintext, scripts_dir)
+
+
+class CredentialStore:
+    """
+    In-memory cache van credentials.json met write-through opslag.
+
+    Het bestand wordt enkel opnieuw ingelezen als mtime/grootte wijzigt.
+    Wachtwoorden worden pas gedecrypt wanneer ze effectief gevraagd worden
+    en daarna per veld gecachet.
+    """
+
+    def __init__(self, credentials_file: Path, scripts_dir: Path) -> None:
+        self.credentials_file = Path(credentials_file)
+        self.scripts_dir = Path(scripts_dir)
+        self._lock = threading.RLock()
+        self._stamp: tuple[int, int] | None = None
+        self._raw: dict = {}
+        self._plain: dict[tuple[str, str], str] = {}
+        # (service, veld) -> vingerafdruk van de sleutel waarmee _plain gedecrypt/geëncrypteerd werd.
+        self._plain_keys: dict[tuple[str, str], tuple | None] = {}
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.credentials_file.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh_locked(self) -> None:
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        raw: dict = {}
+        if stamp is not None:
+            try:
+                with open(self.credentials_file, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                if not isinstance(raw, dict):
+                    raw = {}
+            except Exception as e:
+                print(f"Fout bij laden credentials: {e}")
+                raw = {}
+        self._raw = raw
+        self._plain = {}
+        self._plain_keys = {}
+        self._stamp = stamp
+
+    def _decrypt_field_locked(self, service: str, field: str, value) -> str:
+        cache_key = (service, field)
+        if cache_key not in self._plain:
+            self._plain[cache_key] = decrypt_password(value, self.scripts_dir)
+            self._plain_keys[cache_key] = key_fingerprint()
+        return self._plain[cache_key]
+
+    def get(self, service: str, field: str) -> str:
+        """Geef één veld terug; enkel dat veld wordt (indien nodig) gedecrypt."""
+        with self._lock:
+            self._refresh_locked()
+            creds = self._raw.get(service)
+            if not isinstance(creds, dict):
+                return ""
+            value = creds.get(field, "")
+            if field == "password" and value:
+                return self._decrypt_field_locked(service, field, value)
+            return value
+
+    def has_service(self, service: str) -> bool:
+        with self._lock:
+            self._refresh_locked()
+            return isinstance(self._raw.get(service), dict)
+
+    def get_all(self) -> dict:
+        """Geef een gedecrypte kopie van alle credentials terug."""
+        with self._lock:
+            self._refresh_locked()
+            decrypted = {}
+            for service, creds in self._raw.items():
+                if not isinstance(creds, dict):
+                    continue
+                decrypted[service] = {}
+                for field, value in creds.items():
+                    if field == "password" and value:
+                        decrypted[service][field] = self._decrypt_field_locked(service, field, value)
+                    else:
+                        decrypted[service][field] = value
+            return decrypted
+
+    def save(self, credentials: dict) -> bool:
+        """Encrypt en schrijf credentials atomair weg; cache blijft in sync."""
+        with self._lock:
+            try:
+                self._refresh_locked()
+                encrypted = {}
+                for service, creds in credentials.items():
+                    encrypted[service] = {}
+                    previous_creds = self._raw.get(service) if isinstance(self._raw.get(service), dict) else {}
+                    for field, value in creds.items():
+                        if field == "password" and value:
+                            previous = None
+                            if (service, field) in self._plain and previous_creds.get(field):
+                                previous = (
+                                    self._plain[(service, field)],
+                                    previous_creds[field],
+                                    self._plain_keys.get((service, field)),
+                                )
+                            encrypted[service][field] = _reuse_or_encrypt(value, previous, self.scripts_dir)
+                        else:
+                            encrypted[service][field] = value
+                write_json_atomic(self.credentials_file, encrypted)
+                _secure_file_permissions(self.credentials_file)
+            except Exception as e:
+                print(f"Fout bij opslaan credentials: {e}")
+                self._stamp = None
+                return False
+
+            self._raw = encrypted
+            self._plain = {
+                (service, field): value
+                for service, creds in credentials.items()
+                for field, value in creds.items()
+                if field == "password" and value
+            }
+            fingerprint = key_fingerprint()
+            self._plain_keys = {cache_key: fingerprint for cache_key in self._plain}
+            self._stamp = self._file_stamp()
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._raw = {}
+            self._plain = {}
+            self._plain_keys = {}
+            self._stamp = None
+
+
+class EncryptedServerStore:
+    """
+    Gedeelde opslag voor server-lijsten (rdp_servers.json / ssh_servers.json).
+
+    Bij opslaan worden enkel servers waarvan het wachtwoord gewijzigd is
+    opnieuw geëncrypteerd; voor de rest wordt de bestaande ciphertext
+    hergebruikt. Schrijven gebeurt atomair via write_json_atomic.
+    """
+
+    def __init__(self, servers_file: Path, scripts_dir: Path, label: str) -> None:
+        self.servers_file = Path(servers_file)
+        self.scripts_dir = Path(scripts_dir)
+        self.label = label
+        self._lock = threading.RLock()
+        self._stamp: tuple[int, int] | None = None
+        self._servers: list[dict] = []
+        # (id, host, port) -> (plaintext, ciphertext, sleutel-vingerafdruk)
+        self._ciphertexts: dict[tuple, tuple[str, str, tuple | None]] = {}
+
+    @staticmethod
+    def _entry_key(server: dict) -> tuple:
+        return (server.get("id"), server.get("host"), server.get("port"))
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.servers_file.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh_locked(self) -> None:
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        servers: list[dict] = []
+        ciphertexts: dict[tuple, tuple[str, str, tuple | None]] = {}
+        if stamp is not None:
+            try:
+                with open(self.servers_file, "r", encoding="utf-8") as f:
+                    encrypted_data = json.load(f)
+                for server in encrypted_data:
+                    decrypted_server = server.copy()
+                    if server.get("password"):
+                        decrypted_server["password"] = decrypt_password(server["password"], self.scripts_dir)
+                        ciphertexts[self._entry_key(server)] = (
+                            decrypted_server["password"],
+                            server["password"],
+                            key_fingerprint(),
+                        )
+                    servers.append(decrypted_server)
+            except Exception as e:
+                print(f"Fout bij laden {self.label}: {e}")
+                servers, ciphertexts = [], {}
+        self._servers = servers
+        self._ciphertexts = ciphertexts
+        self._stamp = stamp
+
+    def load(self) -> list[dict]:
+        """Geef een gedecrypte kopie van alle servers terug."""
+        with self._lock:
+            self._refresh_locked()
+            return [server.copy() for server in self._servers]
+
+    def save(self, servers: list[dict]) -> bool:
+        """Encrypt gewijzigde wachtwoorden en schrijf de lijst atomair weg."""
+        with self._lock:
+            try:
+                self._refresh_locked()
+                encrypted_servers = []
+                ciphertexts: dict[tuple, tuple[str, str, tuple | None]] = {}
+                for server in servers:
+                    encrypted_server = server.copy()
+                    if server.get("password"):
+                        key = self._entry_key(server)
+                        encrypted_server["password"] = _reuse_or_encrypt(
+                            server["password"], self._ciphertexts.get(key), self.scripts_dir
+                        )
+                        ciphertexts[key] = (server["password"], encrypted_server["password"], key_fingerprint())
+                    encrypted_servers.append(encrypted_server)
+
+                write_json_atomic(self.servers_file, encrypted_servers)
+            except Exception as e:
+                print(f"Fout bij opslaan {self.label}: {e}")
+                self._stamp = None
+                return False
+
+            self._servers = [server.copy() for server in servers]
+            self._ciphertexts = ciphertexts
+            self._stamp = self._file_stamp()
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._servers = []
+            self._ciphertexts = {}
+            self._stamp = None
+
+
+_stores_lock = threading.Lock()
+_stores: dict[str, CredentialStore] = {}
+_server_stores: dict[str, EncryptedServerStore] = {}
+
+
+def get_credential_store(credentials_file: Path, scripts_dir: Path) -> CredentialStore:
+    """Geef de gedeelde CredentialStore voor dit credentials-bestand."""
+    key = str(Path(credentials_file).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = CredentialStore(credentials_file, scripts_dir)
+            _stores[key] = store
+        return store
+
+
+def get_server_store(servers_file: Path, scripts_dir: Path, label: str = "servers") -> EncryptedServerStore:
+    """Geef de gedeelde EncryptedServerStore voor dit servers-bestand."""
+    key = str(Path(servers_file).resolve())
+    with _stores_lock:
+        store = _server_stores.get(key)
+        if store is None:
+            store = EncryptedServerStore(servers_file, scripts_dir, label)
+            _server_stores[key] = store
+        return store
+
+
+def _clear_credential_stores() -> None:
+    with _stores_lock:
+        stores = list(_stores.values()) + list(_server_stores.values())
+    for store in stores:
+        store.clear()
+
+
+register_shutdown_callback("credential_store", _clear_credential_stores)
+
+
+def load_encrypted_credentials(credentials_file: Path, scripts_dir: Path) -> dict:
+    """
+    Laad en decrypt credentials uit bestand (via de gedeelde CredentialStore).
+    """
+    return get_credential_store(credentials_file, scripts_dir).get_all()
 
 
 def save_encrypted_credentials(credentials: dict, credentials_file: Path, scripts_dir: Path) -> bool:
     """
     Encrypt en sla credentials op in bestand met beveiligde permissies.
     """
-    try:
-        encrypted = encrypt_credentials(credentials, scripts_dir)
-        
-        with open(credentials_file, "w", encoding="utf-8") as f:
-            json.dump(encrypted, f, indent=2, ensure_ascii=False)
-        
-        # Zet bestandspermissies (alleen eigenaar kan lezen)
-        if os.name != "nt":  # Unix/Linux
-            os.chmod(credentials_file, 0o600)
-        else:  # Windows
-            # Op Windows: zet bestand attributen (hidden + read-only voor anderen)
-            try:
-                import stat
-                # Alleen eigenaar kan lezen/schrijven
-                os.chmod(credentials_file, stat.S_IREAD | stat.S_IWRITE)
-                # Maak bestand hidden (optioneel, kan worden uitgeschakeld)
-                # import ctypes
-                # ctypes.windll.kernel32.SetFileAttributesW(str(credentials_file), 2)  # FILE_ATTRIBUTE_HIDDEN
-            except Exception:
-                pass  # Als het niet lukt, ga door
-        
-        return True
-    except Exception as e:
-        print(f"Fout bij opslaan credentials: {e}")
-        return False
+    return get_credential_store(credentials_file, scripts_dir).save(credentials)
 
 
 def sync_to_env(credentials: dict, env_file: Path, scripts_dir: Path) -> bool:
@@ -455,7 +832,4 @@ def get_credential(service: str, field: str, scripts_dir: Path, credentials_file
     Haal een specifieke credential op uit encrypted storage.
     Dit is de veilige manier om credentials te lezen.
     """
-    credentials = load_encrypted_credentials(credentials_file, scripts_dir)
-    if service in credentials:
-        return credentials[service].get(field, "")
-    return ""
+    return get_credential_store(credentials_file, scripts_dir).get(service, field)
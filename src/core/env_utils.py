@@ -0,0 +1,35 @@
+"""
+Gedeelde parsers voor AUTO_LOGIN_* omgevingsvariabelen.
+"""
+import os
+
+
+def is_truthy(value: str | None) -> bool:
+    """True voor "1", "true", "yes" of "on" (hoofdletterongevoelig)."""
+    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def get_int_env(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip())
+    except Exception:
+        return default
+
+
+def parse_csv_set(value: str | None) -> set[str]:
+    """"a, b,,c" -> {"a", "b", "c"}."""
+    return {p.strip() for p in str(value or "").split(",") if p.strip()}
+
+
+def parse_strategy_map(value: str | None, allowed: set[str]) -> dict[str, str]:
+    """
+    "service=strategie,..." -> {service: strategie}. Items zonder "=" of met
+    een strategie buiten `allowed` worden genegeerd.
+    """
+    mapping = {}
+    for item in (value or "").split(","):
+        service, sep, strategy = item.partition("=")
+        strategy = strategy.strip().lower()
+        if sep and service.strip() and strategy in allowed:
+            mapping[service.strip()] = strategy
+    return mapping
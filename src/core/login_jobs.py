@@ -0,0 +1,486 @@
+"""
+Login jobs: registry en begrensde worker pool voor auto-logins.
+
+Elke login krijgt een job id. De registry houdt per job de statusovergangen
+en flow-events bij (SESSION_CREATED, FLOW_GOOGLE, GOOGLE_PASSWORD_FILLED, ...)
+zodat de UI kan opvragen of een login nog bezig is, klaar is of wacht op de
+gebruiker (MFA/captcha). Batch-jobs lopen via een vaste set worker threads
+(geregistreerd bij de centrale shutdown) zodat "alles openen" niet onbeperkt
+veel Chrome-instanties tegelijk opstart; Chrome-starts worden gespreid.
+
+Logins zijn single-flight per (service, account): een tweede aanvraag voor
+een login die nog loopt (of op MFA wacht in een open browser) krijgt de
+bestaande job terug in plaats van een extra Chrome die met dezelfde account
+concurreert.
+"""
+from __future__ import annotations
+
+import ctypes
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from uuid import uuid4
+
+from src.core.shutdown import register_shutdown_callback, shutdown_event, start_thread
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_MANUAL = "manual"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+ACTIVE_STATES = {JOB_QUEUED, JOB_RUNNING}
+
+# Flow-events die betekenen dat de login op de gebruiker wacht.
+_MANUAL_EVENTS = {"FLOW_MANUAL_INTERVENTION"}
+_MAX_EVENTS_PER_JOB = 50
+_MAX_FINISHED_JOBS = 200
+
+# Ruwe schatting van het geheugengebruik van één geïsoleerde Chrome-sessie.
+_CHROME_MEMORY_BYTES = 600 * 1024 * 1024
+_MAX_WORKERS = 4
+_DEFAULT_LAUNCH_STAGGER = 1.5
+
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+_version = 0
+_context = threading.local()
+_jobs: dict[str, "LoginJob"] = {}
+_queue: "queue.Queue[LoginJob | None]" = queue.Queue()
+_workers: list[threading.Thread] = []
+_last_launch = 0.0
+_launch_lock = threading.Lock()
+
+
+class LoginJob:
+    """Eén login-uitvoering voor een service."""
+
+    def __init__(self, service: str, login_func: Callable[[], None], account_id: str = "") -> None:
+        self.id = uuid4().hex
+        self.service = service
+        self.account_id = account_id
+        self.login_func = login_func
+        self.state = JOB_QUEUED
+        self.error = ""
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.events: list[dict] = []
+        self.version = 0
+        # Browser (en tabblad) van deze login, om het venster te kunnen focussen.
+        self.driver = None
+        self.window_handle: str | None = None
+        # Status van het venster na afloop: JOB_MANUAL (wacht nog), JOB_SUCCEEDED
+        # (portaal bereikt) of None (venster weg). Zonder probe: open = manual.
+        self.window_probe: Callable[[], str | None] | None = None
+        # WebDriver-acties van andere threads (bv. focussen), uitgevoerd door de job-thread.
+        self.pending_actions: list[Callable[[], None]] = []
+        # Opruimacties voor zodra de login "klaar" is voor de gebruiker (manual of einde).
+        self.settle_callbacks: list[Callable[[str], None]] = []
+
+    @property
+    def active(self) -> bool:
+        """True zolang de loginfunctie nog loopt (ook als die op MFA wacht)."""
+        return self.finished_at is None
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.service, self.account_id.strip().lower()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "service": self.service,
+            "state": self.state,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": list(self.events),
+            "version": self.version,
+        }
+
+
+def _touch_locked(job: LoginJob) -> None:
+    global _version
+    _version += 1
+    job.version = _version
+    _changed.notify_all()
+
+
+def _set_state(job: LoginJob, state: str, error: str = "") -> None:
+    with _lock:
+        job.state = state
+        if error:
+            job.error = error
+        if state == JOB_RUNNING:
+            job.started_at = time.time()
+        elif state not in ACTIVE_STATES and state != JOB_MANUAL:
+            job.finished_at = time.time()
+            job.driver = None
+        job.events.append({"event": f"STATE_{state.upper()}", "detail": error, "at": time.time()})
+        del job.events[:-_MAX_EVENTS_PER_JOB]
+        _touch_locked(job)
+
+
+def current_job() -> LoginJob | None:
+    """De job die in de huidige thread loopt (of None buiten een login-job)."""
+    return getattr(_context, "job", None)
+
+
+def add_job_settle_callback(callback: Callable[[str], None]) -> bool:
+    """
+    Registreer een actie die één keer draait zodra de job van de huidige
+    thread op de gebruiker wacht of afloopt; krijgt de jobstatus mee.
+    False buiten een login-job (dan draait de callback nooit).
+    """
+    job = current_job()
+    if job is None:
+        return False
+    with _lock:
+        job.settle_callbacks.append(callback)
+    return True
+
+
+def _settle(job: LoginJob) -> None:
+    with _lock:
+        callbacks = list(job.settle_callbacks)
+        job.settle_callbacks.clear()
+        state = job.state
+    for callback in callbacks:
+        try:
+            callback(state)
+        except Exception as exc:
+            logger.debug("Settle-callback voor %s faalde: %s", job.service, exc)
+
+
+def record_job_event(event: str, detail: str = "") -> None:
+    """Koppel een flow-event aan de job van de huidige thread (no-op erbuiten)."""
+    job = current_job()
+    if job is None:
+        return
+    with _lock:
+        job.events.append({"event": event, "detail": detail, "at": time.time()})
+        del job.events[:-_MAX_EVENTS_PER_JOB]
+        became_manual = event in _MANUAL_EVENTS and job.state == JOB_RUNNING
+        if became_manual:
+            job.state = JOB_MANUAL
+        _touch_locked(job)
+    if became_manual:
+        _settle(job)
+
+
+def attach_job_driver(
+    driver,
+    window_handle: str | None = None,
+    window_probe: Callable[[], str | None] | None = None,
+) -> None:
+    """Onthoud de browser van de job in de huidige thread (no-op erbuiten)."""
+    job = current_job()
+    if job is None:
+        return
+    with _lock:
+        job.driver = driver
+        job.window_handle = window_handle
+        job.window_probe = window_probe
+
+
+def run_on_job_thread(job: LoginJob, action: Callable[[], None]) -> None:
+    """
+    Voer een WebDriver-actie voor de browser van een job uit. Zolang de
+    loginfunctie loopt, gebruikt de job-thread die driver: de actie wordt dan
+    aan die thread doorgegeven (volgende flow-tick of einde van de login).
+    Anders draait ze meteen.
+    """
+    with _lock:
+        if job.started_at is not None and job.finished_at is None:
+            job.pending_actions.append(action)
+            return
+    _run_action(job, action)
+
+
+def run_pending_job_actions() -> None:
+    """Voer de doorgegeven acties uit voor de job van de huidige thread (no-op erbuiten)."""
+    job = current_job()
+    if job is None:
+        return
+    with _lock:
+        actions = list(job.pending_actions)
+        job.pending_actions.clear()
+    for action in actions:
+        _run_action(job, action)
+
+
+def _run_action(job: LoginJob, action: Callable[[], None]) -> None:
+    try:
+        action()
+    except Exception as exc:
+        logger.debug("Actie voor %s faalde: %s", job.service, exc)
+
+
+def driver_in_use(driver) -> bool:
+    """
+    True als een lopende login-job deze browser gebruikt, of als een job in
+    MANUAL nog op de gebruiker wacht (MFA) in deze browser.
+    """
+    if driver is None:
+        return False
+    with _lock:
+        jobs = [job for job in _jobs.values() if job.driver is driver]
+    if any(job.active for job in jobs):
+        return True
+    # Wachtende MFA-sessies blijven in gebruik zolang het venster nog op de
+    # verificatie staat. (Buiten de lock: de probe is een WebDriver-aanroep.)
+    for job in [job for job in jobs if job.state == JOB_MANUAL]:
+        state = _window_state(job)
+        if state == JOB_MANUAL:
+            return True
+        if state == JOB_SUCCEEDED:
+            _set_state(job, JOB_SUCCEEDED)
+    return False
+
+
+def _window_state(job: LoginJob) -> str | None:
+    try:
+        if job.window_probe is not None:
+            return job.window_probe()
+        return JOB_MANUAL if job.driver.window_handles else None
+    except Exception:
+        return None
+
+
+def _available_memory_bytes() -> int | None:
+    if os.name == "nt":
+        class _MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        try:
+            status = _MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(_MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+        except Exception:
+            return None
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def max_parallel_logins() -> int:
+    """
+    Aantal logins dat tegelijk mag lopen: AUTO_LOGIN_MAX_PARALLEL_LOGINS of
+    afgeleid van CPU-kernen en vrij geheugen (1..4).
+    """
+    try:
+        configured = int(os.environ.get("AUTO_LOGIN_MAX_PARALLEL_LOGINS", "").strip())
+        return max(1, min(configured, _MAX_WORKERS * 2))
+    except Exception:
+        pass
+
+    by_cpu = max(1, (os.cpu_count() or 2) // 2)
+    available = _available_memory_bytes()
+    by_memory = max(1, available // _CHROME_MEMORY_BYTES) if available else _MAX_WORKERS
+    return max(1, min(by_cpu, by_memory, _MAX_WORKERS))
+
+
+def _launch_stagger() -> float:
+    try:
+        return max(0.0, float(os.environ.get("AUTO_LOGIN_LAUNCH_STAGGER", "").strip()))
+    except Exception:
+        return _DEFAULT_LAUNCH_STAGGER
+
+
+def _wait_for_launch_slot() -> None:
+    """Spreid Chrome-starts: minstens AUTO_LOGIN_LAUNCH_STAGGER seconden ertussen."""
+    global _last_launch
+    with _launch_lock:
+        delay = _last_launch + _launch_stagger() - time.monotonic()
+        if delay > 0:
+            shutdown_event.wait(delay)
+        _last_launch = time.monotonic()
+
+
+def _run_job(job: LoginJob, *, stagger: bool = True) -> None:
+    if stagger:
+        _wait_for_launch_slot()
+    if shutdown_event.is_set():
+        _set_state(job, JOB_FAILED, "Applicatie wordt afgesloten")
+        return
+
+    _context.job = job
+    _set_state(job, JOB_RUNNING)
+    try:
+        job.login_func()
+    except Exception as exc:
+        logger.exception("Login voor %s is mislukt", job.service)
+        print(f"LOGIN_FAILED {job.service}")
+        _set_state(job, JOB_FAILED, str(exc))
+    else:
+        # Flow is afgelopen; wacht de browser nog op MFA/captcha, dan blijft de job "manual".
+        if job.state == JOB_MANUAL:
+            with _lock:
+                job.finished_at = time.time()
+                _touch_locked(job)
+        else:
+            _set_state(job, JOB_SUCCEEDED)
+    finally:
+        run_pending_job_actions()
+        _settle(job)
+        _context.job = None
+
+
+def _worker_loop() -> None:
+    while not shutdown_event.is_set():
+        try:
+            job = _queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if job is None:
+            break
+        try:
+            _run_job(job)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers() -> None:
+    with _lock:
+        alive = [t for t in _workers if t.is_alive()]
+        _workers[:] = alive
+        for index in range(len(alive), max_parallel_logins()):
+            thread = threading.Thread(target=_worker_loop, daemon=True, name=f"login-worker-{index + 1}")
+            _workers.append(thread)
+            start_thread(thread)
+
+
+def _find_inflight_locked(key: tuple[str, str]) -> LoginJob | None:
+    for job in _jobs.values():
+        if job.active and job.key == key:
+            return job
+    return None
+
+
+def _claim_job(service: str, login_func: Callable[[], None], account_id: str) -> tuple[LoginJob, bool]:
+    """
+    Geef (job, nieuw) terug: een lopende job voor dezelfde service/account,
+    of een nieuw geregistreerde job.
+    """
+    key = (service, account_id.strip().lower())
+    with _lock:
+        waiting = [
+            job for job in _jobs.values()
+            if job.key == key and job.state == JOB_MANUAL and job.driver is not None
+            and job.finished_at is not None
+        ]
+    # Login-functie is klaar maar de browser wacht nog op MFA: hergebruik zolang het
+    # venster nog op de verificatie staat. Is het portaal intussen geladen, dan is de
+    # job geslaagd en start een nieuwe klik een nieuwe login.
+    # (Buiten de lock: de probe is een WebDriver-aanroep.)
+    for job in sorted(waiting, key=lambda job: job.created_at, reverse=True):
+        state = _window_state(job)
+        if state == JOB_MANUAL:
+            return job, False
+        if state == JOB_SUCCEEDED:
+            _set_state(job, JOB_SUCCEEDED)
+
+    with _lock:
+        existing = _find_inflight_locked(key)
+        if existing is not None:
+            return existing, False
+        job = LoginJob(service, login_func, account_id)
+        _prune_finished_locked()
+        _jobs[job.id] = job
+        job.events.append({"event": "STATE_QUEUED", "detail": "", "at": job.created_at})
+        _touch_locked(job)
+    return job, True
+
+
+def _prune_finished_locked() -> None:
+    finished = [job for job in _jobs.values() if job.finished_at is not None]
+    if len(finished) <= _MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda job: job.finished_at or 0)
+    for job in finished[: len(finished) - _MAX_FINISHED_JOBS]:
+        _jobs.pop(job.id, None)
+
+
+def start_login_job(service: str, login_func: Callable[[], None], account_id: str = "") -> tuple[LoginJob, bool]:
+    """
+    Start één login meteen in een eigen (geregistreerde) thread en volg hem
+    in de registry. Gebruikt voor losse klikken, die niet achter een batch
+    in de wachtrij mogen belanden. Loopt er al een login voor dezelfde
+    service/account, dan wordt die job teruggegeven (nieuw=False).
+    """
+    job, created = _claim_job(service, login_func, account_id)
+    if created:
+        thread = threading.Thread(target=_run_job, args=(job,), kwargs={"stagger": False}, daemon=True, name=f"login-{service}")
+        start_thread(thread)
+    return job, created
+
+
+def submit_login(service: str, login_func: Callable[[], None], account_id: str = "") -> tuple[LoginJob, bool]:
+    """Plan een login in op de begrensde worker pool; (job, nieuw) zoals start_login_job."""
+    job, created = _claim_job(service, login_func, account_id)
+    if created:
+        _ensure_workers()
+        _queue.put(job)
+    return job, created
+
+
+def submit_batch(logins: dict[str, tuple[Callable[[], None], str]]) -> dict[str, str]:
+    """Plan meerdere logins in ({service: (func, account_id)}); geeft {service: job_id} terug."""
+    return {service: submit_login(service, func, account_id)[0].id for service, (func, account_id) in logins.items()}
+
+
+def get_job(job_id: str) -> LoginJob | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs(since: int = 0) -> tuple[int, list[dict]]:
+    """Geef (huidige versie, jobs gewijzigd na `since`) terug."""
+    with _lock:
+        jobs = [job.to_dict() for job in _jobs.values() if job.version > since]
+        return _version, sorted(jobs, key=lambda job: job["created_at"])
+
+
+def wait_for_jobs(since: int = 0, timeout: float = 0.0) -> tuple[int, list[dict]]:
+    """
+    Long-poll: wacht tot er iets wijzigt na versie `since` (of tot timeout)
+    en geef dan (versie, gewijzigde jobs) terug.
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    with _lock:
+        while _version <= since and not shutdown_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _changed.wait(min(remaining, 0.5))
+    return list_jobs(since)
+
+
+def _stop_workers() -> None:
+    with _lock:
+        count = len(_workers)
+    for _ in range(count):
+        _queue.put(None)
+
+
+register_shutdown_callback("login_workers", _stop_workers)
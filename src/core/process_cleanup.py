@@ -2,22 +2,25 @@
 Windows process cleanup for the desktop app.
 
 This is intentionally scoped to processes that belong to this application:
-- children of the current process;
-- known app executables by image name during installer/uninstaller runs;
-- browser helper processes whose command line contains the app data/profile path.
+children of the current process. Browser processes started by the tool are
+closed via their registered PID's (process_tracker, browser_cleanup).
 """
 from __future__ import annotations
 
 import os
 import subprocess
 import sys
-from pathlib import Path
+import threading
 
+# Bewust losgekoppelde helperprocessen (bv. de profiel-opruimer) die de app mogen overleven.
+_detached_lock = threading.Lock()
+_detached_pids: set[int] = set()
 
-APP_PROCESS_NAMES = {
-    "SintMaartenCampusAutologin.exe",
-    "chromedriver.exe",
-}
+
+def register_detached_pid(pid: int) -> None:
+    """Sluit een kindproces (en zijn kinderen) uit van kill_child_process_tree."""
+    with _detached_lock:
+        _detached_pids.add(int(pid))
 
 
 def _run_powershell(script: str) -> None:
@@ -40,12 +43,16 @@ def kill_child_process_tree(pid: int | None = None) -> None:
     if sys.platform != "win32":
         return
     pid = int(pid or os.getpid())
+    with _detached_lock:
+        keep = ",".join(str(p) for p in sorted(_detached_pids))
     script = rf"""
 $root = {pid}
+$keep = @({keep})
 $all = Get-CimInstance Win32_Process | Select-Object ProcessId,ParentProcessId,Name,CommandLine
 $children = @()
 function Add-Children([int]$parent) {{
   foreach ($p in $all | Where-Object {{ $_.ParentProcessId -eq $parent }}) {{
+    if ($keep -contains [int]$p.ProcessId) {{ continue }}
     Add-Children ([int]$p.ProcessId)
     $script:children += $p
   }}
@@ -57,37 +64,3 @@ foreach ($p in $children) {{
 """
     _run_powershell(script)
 
-
-def cleanup_tool_processes() -> None:
-    """
-    Best-effort cleanup for processes that can keep app/profile directories locked.
-    """
-    if sys.platform != "win32":
-        return
-
-    local_appdata = Path(os.environ.get("LOCALAPPDATA", "")) / "SintMaartenCampusAutologin"
-    program_files = Path(os.environ.get("ProgramFiles", r"C:\Program Files")) / "SintMaartenCampusAutologin"
-    current_pid = os.getpid()
-
-    names = ",".join(f"'{name.lower()}'" for name in APP_PROCESS_NAMES)
-    appdata_token = str(local_appdata).replace("'", "''").lower()
-    program_token = str(program_files).replace("'", "''").lower()
-
-    script = rf"""
-$currentPid = {current_pid}
-$names = @({names})
-$appDataToken = '{appdata_token}'
-$programToken = '{program_token}'
-$procs = Get-CimInstance Win32_Process | Select-Object ProcessId,ParentProcessId,Name,CommandLine
-foreach ($p in $procs) {{
-  $name = [string]$p.Name
-  $cmd = ([string]$p.CommandLine).ToLowerInvariant()
-  $nameLower = $name.ToLowerInvariant()
-  $matchesName = $names -contains $nameLower
-  $matchesToolPath = ($cmd -and (($appDataToken -and $cmd.Contains($appDataToken)) -or ($programToken -and $cmd.Contains($programToken))))
-  if ($p.ProcessId -ne $currentPid -and ($matchesName -or $matchesToolPath)) {{
-    try {{ Stop-Process -Id $p.ProcessId -Force -ErrorAction SilentlyContinue }} catch {{}}
-  }}
-}}
-"""
-    _run_powershell(script)
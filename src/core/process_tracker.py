@@ -0,0 +1,224 @@
+"""
+Bijhouden en opruimen van door de tool gestarte processen (chromedriver/Chrome).
+
+De PID's worden bij het starten geregistreerd, zodat opruimen geen scan van
+alle processen op de machine nodig heeft:
+- Linux: één doorloop van /proc voor de procesboom, daarna rechtstreeks signalen;
+- Windows: één `taskkill /T /F` met alle PID's tegelijk;
+- elders: enkel de geregistreerde PID's zelf.
+
+Bij het registreren wordt de starttijd van het proces bewaard (Linux: /proc,
+Windows: GetProcessTimes). Een PID die intussen aan een ander proces is
+toegekend, wordt zo nooit gesloten.
+"""
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+_lock = threading.Lock()
+# Geregistreerde wortels van procesbomen: pid -> (label, starttijd of None).
+_tracked: dict[int, tuple[str, int | None]] = {}
+
+# Maximum aantal PID's per taskkill-aanroep (lengte van de commandoregel).
+_TASKKILL_BATCH = 64
+
+
+def _read_stat(pid: int) -> list[str] | None:
+    """Linux: velden van /proc/<pid>/stat na "(comm)" (index 0 = state, 1 = ppid)."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    # "pid (comm) state ppid ..."; comm kan spaties/haakjes bevatten.
+    return stat.rpartition(")")[2].split()
+
+
+def _windows_creation_time(pid: int) -> int | None:
+    """Windows: aanmaaktijd van het proces (FILETIME) via GetProcessTimes, None als het weg is."""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    process_query_limited_information = 0x1000
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        return None
+    try:
+        creation = ctypes.c_ulonglong()
+        exit_time = ctypes.c_ulonglong()
+        kernel_time = ctypes.c_ulonglong()
+        user_time = ctypes.c_ulonglong()
+        ok = kernel32.GetProcessTimes(
+            handle,
+            ctypes.byref(creation),
+            ctypes.byref(exit_time),
+            ctypes.byref(kernel_time),
+            ctypes.byref(user_time),
+        )
+        # Een afgesloten proces met nog open handles heeft een exit-tijd.
+        if not ok or exit_time.value:
+            return None
+        return creation.value
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _start_time(pid: int) -> int | None:
+    """Vingerafdruk van het proces achter de PID (starttijd), None als onbekend of weg."""
+    if sys.platform == "win32":
+        try:
+            return _windows_creation_time(pid)
+        except Exception:
+            return None
+    fields = _read_stat(pid) if sys.platform.startswith("linux") else None
+    try:
+        return int(fields[19]) if fields else None
+    except (IndexError, ValueError):
+        return None
+
+
+def _same_process(pid: int, started: int | None) -> bool:
+    return started is None or _start_time(pid) == started
+
+
+def track_process(pid: int | None, label: str = "") -> None:
+    """Registreer een proces waarvan de volledige boom bij opruimen gesloten moet worden."""
+    if not pid:
+        return
+    with _lock:
+        _tracked[int(pid)] = (label, _start_time(int(pid)))
+
+
+def untrack_process(pid: int | None) -> bool:
+    """Vergeet een PID; True als hij geregistreerd was en nog hetzelfde proces is."""
+    if not pid:
+        return False
+    with _lock:
+        entry = _tracked.pop(int(pid), None)
+    return entry is not None and _same_process(int(pid), entry[1])
+
+
+def tracked_processes() -> dict[int, str]:
+    with _lock:
+        return {pid: label for pid, (label, _) in _tracked.items()}
+
+
+def _proc_table() -> dict[int, int]:
+    """Linux: pid -> ppid voor alle processen, in één doorloop van /proc."""
+    table: dict[int, int] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return table
+    for name in entries:
+        if not name.isdigit():
+            continue
+        fields = _read_stat(int(name))
+        try:
+            table[int(name)] = int(fields[1])
+        except (TypeError, IndexError, ValueError):
+            continue
+    return table
+
+
+def _descendants(roots: list[int], table: dict[int, int]) -> list[int]:
+    """Alle nakomelingen van de wortels (diepste eerst), gevolgd door de wortels zelf."""
+    children: dict[int, list[int]] = {}
+    for pid, ppid in table.items():
+        children.setdefault(ppid, []).append(pid)
+    ordered: list[int] = []
+    seen: set[int] = set()
+
+    def _walk(pid: int) -> None:
+        for child in children.get(pid, []):
+            if child not in seen:
+                seen.add(child)
+                _walk(child)
+                ordered.append(child)
+
+    for root in roots:
+        _walk(root)
+    ordered.extend(pid for pid in roots if pid not in seen)
+    return ordered
+
+
+def find_processes_by_cmdline(needles: list[str]) -> list[int]:
+    """Linux: PID's waarvan de commandoregel een van de needles bevat (hoofdletterongevoelig)."""
+    needles = [n.lower() for n in needles if n]
+    if not needles or not sys.platform.startswith("linux"):
+        return []
+    current = os.getpid()
+    found = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit() or int(name) == current:
+            continue
+        try:
+            raw = Path(f"/proc/{name}/cmdline").read_bytes()
+        except OSError:
+            continue
+        cmd = raw.replace(b"\0", b" ").decode("utf-8", "replace").lower()
+        if any(needle in cmd for needle in needles):
+            found.append(int(name))
+    return found
+
+
+def kill_process_trees(pids: list[int]) -> int:
+    """Sluit de procesbomen van de opgegeven PID's geforceerd; geeft het aantal signalen/PID's terug."""
+    pids = sorted({int(p) for p in pids if p and int(p) != os.getpid()})
+    if not pids:
+        return 0
+
+    if sys.platform == "win32":
+        for start in range(0, len(pids), _TASKKILL_BATCH):
+            command = ["taskkill", "/F", "/T"]
+            for pid in pids[start:start + _TASKKILL_BATCH]:
+                command += ["/PID", str(pid)]
+            try:
+                subprocess.run(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=False,
+                    creationflags=subprocess.CREATE_NO_WINDOW,
+                )
+            except Exception:
+                pass
+        return len(pids)
+
+    targets = _descendants(pids, _proc_table()) if sys.platform.startswith("linux") else pids
+    killed = 0
+    for pid in targets:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except Exception:
+            # Al weg of niet van ons.
+            continue
+    return killed
+
+
+def kill_tracked_processes_checked() -> tuple[int, bool]:
+    """
+    Sluit alle geregistreerde procesbomen en vergeet ze. Geeft (aantal,
+    wezen mogelijk) terug: dat laatste als er niets geregistreerd was (bv.
+    na een crash van een vorige run) of een geregistreerde wortel niet meer
+    hetzelfde proces is; zijn kinderen kunnen dan los rondhangen.
+    """
+    with _lock:
+        tracked = dict(_tracked)
+        _tracked.clear()
+    # Een hergebruikte PID (ander proces, andere starttijd) wordt overgeslagen.
+    pids = [pid for pid, (_, started) in tracked.items() if _same_process(pid, started)]
+    return kill_process_trees(pids), not tracked or len(pids) < len(tracked)
+
+
+def kill_tracked_processes() -> int:
+    """Sluit alle geregistreerde procesbomen en vergeet ze."""
+    return kill_tracked_processes_checked()[0]
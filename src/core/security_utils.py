@@ -1,9 +1,12 @@
 """
 Security utilities voor input validatie en sanitization.
 """
+import os
 import re
 import html
-from urllib.parse import urlparse
+from urllib.parse import quote, urlencode, urlparse
+
+from src.core.env_utils import is_truthy
 
 
 CANONICAL_SERVICE_URLS = {
@@ -18,6 +21,36 @@ CANONICAL_SERVICE_URLS = {
 LOCKED_URL_SERVICES = set(CANONICAL_SERVICE_URLS)
 
 
+def _microsoft_login_hint_url(base_url: str, account: str) -> str:
+    # Best effort: de portalen sturen door naar login.microsoftonline.com met hun eigen
+    # authorize-URL; enkel als het portaal login_hint meeneemt staat de e-mail al ingevuld.
+    # Anders typt de flow het e-mailveld zoals zonder hint.
+    return f"{base_url}/?login_hint={quote(account)}"
+
+
+def _google_identifier_url(base_url: str, account: str) -> str:
+    # Google vult de identifier in via Email= en gaat meteen naar de wachtwoordstap.
+    query = urlencode({"continue": f"{base_url}/", "Email": account, "service": "CPanel"})
+    return f"https://accounts.google.com/ServiceLogin?{query}"
+
+
+# Optionele entry-URL's die het opgeslagen account al meegeven aan de IdP.
+HINTED_ENTRY_URL_BUILDERS = {
+    "microsoft_admin": _microsoft_login_hint_url,
+    "intune_admin": _microsoft_login_hint_url,
+    "azure_admin": _microsoft_login_hint_url,
+    "google_admin": _google_identifier_url,
+}
+
+
+# Builders die niet gegarandeerd werken staan enkel aan met deze opt-in variabele.
+LOGIN_HINT_OPT_IN_ENV = {
+    "microsoft_admin": "AUTO_LOGIN_MICROSOFT_LOGIN_HINT",
+    "intune_admin": "AUTO_LOGIN_MICROSOFT_LOGIN_HINT",
+    "azure_admin": "AUTO_LOGIN_MICROSOFT_LOGIN_HINT",
+}
+
+
 def sanitize_string(value: str, max_length: int = 1000) -> str:
     """
     Sanitize een string input om XSS te voorkomen.
@@ -180,6 +213,46 @@ def canonical_service_url(service: str) -> str:
     return CANONICAL_SERVICE_URLS.get(service, "")
 
 
+def hinted_service_url(service: str, account: str | None) -> str:
+    """
+    Entry-URL voor een login met het opgeslagen account als hint (login_hint /
+    identifier). Best effort: de IdP kan de hint negeren, de flow vult het
+    e-mailveld dan zelf in. Valt terug op de canonieke URL zonder builder,
+    zonder geldig e-mailadres, met AUTO_LOGIN_DISABLE_LOGIN_HINT=1 of als de
+    opt-in uit LOGIN_HINT_OPT_IN_ENV (Microsoft-portalen:
+    AUTO_LOGIN_MICROSOFT_LOGIN_HINT=1) niet aan staat.
+    """
+    base_url = canonical_service_url(service)
+    builder = HINTED_ENTRY_URL_BUILDERS.get(service)
+    if not base_url or not builder or not account or not validate_email(account.strip()):
+        return base_url
+    if is_truthy(os.environ.get("AUTO_LOGIN_DISABLE_LOGIN_HINT")):
+        return base_url
+    opt_in = LOGIN_HINT_OPT_IN_ENV.get(service)
+    if opt_in and not is_truthy(os.environ.get(opt_in)):
+        return base_url
+    return builder(base_url.rstrip("/"), account.strip())
+
+
+def url_on_host(url: str | None, *hosts: str) -> bool:
+    """
+    True als de host van de URL een van de hosts is (of een subdomein ervan).
+    Enkel de geparste hostnaam telt: een loginpagina met de portal-URL in haar
+    query (continue=, redirect_uri=) valt er dus niet onder.
+    """
+    try:
+        current = (urlparse(url or "").hostname or "").lower()
+    except ValueError:
+        return False
+    if not current:
+        return False
+    for host in hosts:
+        host = host.lower().strip(".")
+        if current == host or current.endswith("." + host):
+            return True
+    return False
+
+
 def is_service_url_locked(service: str) -> bool:
     """Bepaal of de URL voor deze service niet vrij instelbaar mag zijn."""
     return service in LOCKED_URL_SERVICES
@@ -6,7 +6,6 @@ Alle methodes retourneren dezelfde structuur als de Flask API (dict).
 import json
 import logging
 import sys
-import threading
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -27,6 +26,11 @@ from src.web.web_interface import (
     _redact_credentials_for_response,
     _redact_servers_for_response,
     _get_saved_server_by_id,
+    close_browser_session,
+    get_jobs_since,
+    list_browser_sessions,
+    start_login_batch_for_services,
+    start_login_for_service,
 )
 from src.core.security_utils import (
     sanitize_string,
@@ -40,7 +44,6 @@ from src.core.security_utils import (
     normalize_service_url,
     preserve_existing_secret,
 )
-from src.core.shutdown import shutdown_event, start_thread
 
 logger = logging.getLogger(__name__)
 
@@ -310,41 +313,22 @@ class DesktopAPI:
             return {"success": False, "error": str(e)}
 
     def login(self, service):
-        if shutdown_event.is_set():
-            return {"success": False, "error": "Applicatie wordt afgesloten"}
-        valid = ["smartschool", "smartschool_admin", "microsoft_admin", "intune_admin", "azure_admin", "google_admin", "easy4u"]
-        if service not in valid:
-            return {"success": False, "error": "Onbekende service"}
-        try:
-            from src.auto_login.auto_smartschool_login import login_smartschool_via_microsoft, login_smartschool_admin_via_microsoft
-            from src.auto_login.auto_microsoft_admin_login import login_microsoft_admin
-            from src.auto_login.auto_intune_admin_login import login_intune_admin
-            from src.auto_login.auto_azure_admin_login import login_azure_admin
-            from src.auto_login.auto_google_admin_login import login_google_admin
-            from src.auto_login.auto_easy4u_login import login_easy4u
-            funcs = {
-                "smartschool": login_smartschool_via_microsoft,
-                "smartschool_admin": login_smartschool_admin_via_microsoft,
-                "microsoft_admin": login_microsoft_admin,
-                "intune_admin": login_intune_admin,
-                "azure_admin": login_azure_admin,
-                "google_admin": login_google_admin,
-                "easy4u": login_easy4u,
-            }
-            login_func = funcs[service]
+        response, _status = start_login_for_service(service)
+        return response
 
-            def _run_login_with_logging():
-                try:
-                    login_func()
-                except Exception:
-                    logger.exception("Login voor %s is mislukt", service)
-                    print(f"LOGIN_FAILED {service}")
+    def login_batch(self, services):
+        response, _status = start_login_batch_for_services(services)
+        return response
 
-            thread = threading.Thread(target=_run_login_with_logging, daemon=True, name=f"login-{service}")
-            start_thread(thread)
-            return {"success": True, "message": f"{service} login gestart"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+    def get_jobs(self, since=0, timeout=0):
+        return get_jobs_since(since, timeout)
+
+    def list_sessions(self):
+        return list_browser_sessions()
+
+    def close_session(self, session_id):
+        response, _status = close_browser_session(session_id)
+        return response
 
     def run_utility(self, utility):
         valid = ["clean_credentials", "migrate_key", "security_test", "clean_servers", "clear_browser_data"]
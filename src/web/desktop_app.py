@@ -89,7 +89,8 @@ class ManagedFlaskServer:
 
     def serve(self):
         """Start Flask server until shutdown is requested."""
-        self.server = make_server("127.0.0.1", self.port, app)
+        # Threaded: /api/jobs long-polls mogen andere requests niet blokkeren.
+        self.server = make_server("127.0.0.1", self.port, app, threaded=True)
         self.server.timeout = 0.5
         register_shutdown_callback("flask_server", self.shutdown)
         while not shutdown_event.is_set():
@@ -127,8 +128,42 @@ def _register_window_shutdown(window):
         pass
 
 
+def _start_browser_background_tasks():
+    """Bepaal chromedriver vooraf, ruim oude profielen op en start (optioneel) de warme Chrome-pool."""
+    try:
+        from src.auto_login.chromedriver_resolver import start_chromedriver_resolver
+        start_chromedriver_resolver()
+    except Exception as e:
+        try:
+            print(f"Kon chromedriver niet vooraf bepalen: {e}")
+        except Exception:
+            pass
+
+    try:
+        # Ruimt ook geïsoleerde profielen van een gecrashte vorige run op.
+        from src.auto_login.profile_janitor import start_profile_janitor
+        start_profile_janitor()
+    except Exception as e:
+        try:
+            print(f"Kon profiel-opruiming niet starten: {e}")
+        except Exception:
+            pass
+
+    if os.environ.get("AUTO_LOGIN_WARM_POOL_AT_STARTUP", "").lower() not in ("1", "true", "yes", "on"):
+        return
+    try:
+        from src.auto_login.browser_session import start_driver_pool
+        start_driver_pool()
+    except Exception as e:
+        try:
+            print(f"Kon warme browser-pool niet starten: {e}")
+        except Exception:
+            pass
+
+
 def main():
     """Start de desktop applicatie."""
+    _start_browser_background_tasks()
     use_standalone = os.environ.get("STANDALONE", "").lower() in ("1", "true", "yes")
     if "--standalone" in sys.argv:
         use_standalone = True
@@ -1,9 +1,7 @@
 import os
 import sys
-import json
 import html
 import logging
-import threading
 import secrets
 from pathlib import Path
 from flask import Flask, render_template, jsonify, request, session, has_request_context
@@ -22,15 +20,18 @@ from src.auto_login.auto_intune_admin_login import login_intune_admin
 from src.auto_login.auto_azure_admin_login import login_azure_admin
 from src.auto_login.auto_google_admin_login import login_google_admin
 from src.auto_login.auto_easy4u_login import login_easy4u
+from src.auto_login.browser_session import close_session, focus_driver_window, list_sessions, max_sessions
 
 # Import credentials manager
 from src.core.credentials_manager import (
+    get_credential_store,
     get_data_dir,
-    load_encrypted_credentials,
+    get_server_store,
     save_encrypted_credentials,
     sync_to_env,
 )
-from src.core.shutdown import shutdown_application, shutdown_event, start_thread
+from src.core.login_jobs import max_parallel_logins, run_on_job_thread, start_login_job, submit_batch, wait_for_jobs
+from src.core.shutdown import shutdown_application, shutdown_event
 
 # Import security utilities
 from src.core.security_utils import (
@@ -61,6 +62,7 @@ RDP_SERVERS_FILE = DATA_DIR / "rdp_servers.json"
 SSH_SERVERS_FILE = DATA_DIR / "ssh_servers.json"
 CREDENTIALS_FILE = DATA_DIR / "credentials.json"
 ENV_FILE = DATA_DIR / ".env"
+JOBS_MAX_POLL_TIMEOUT = 25.0
 
 # Laad .env
 load_dotenv()
@@ -218,117 +220,27 @@ def _get_saved_server_by_id(servers: list[dict], server_id: int) -> dict | None:
 
 def load_rdp_servers():
     """Laad RDP servers uit encrypted JSON bestand."""
-    if not RDP_SERVERS_FILE.exists():
-        return []
-    
-    try:
-        with open(RDP_SERVERS_FILE, "r", encoding="utf-8") as f:
-            encrypted_data = json.load(f)
-        
-        # Decrypt wachtwoorden
-        from src.core.credentials_manager import decrypt_password
-        
-        decrypted_servers = []
-        for server in encrypted_data:
-            decrypted_server = server.copy()
-            if "password" in server and server["password"]:
-                # Decrypt wachtwoord
-                decrypted_server["password"] = decrypt_password(server["password"], SCRIPTS_DIR)
-            decrypted_servers.append(decrypted_server)
-        
-        return decrypted_servers
-    except Exception as e:
-        print(f"Fout bij laden RDP servers: {e}")
-        return []
+    return get_server_store(RDP_SERVERS_FILE, SCRIPTS_DIR, "RDP servers").load()
 
 
 def save_rdp_servers(servers):
-    """Encrypt en sla RDP servers op in JSON bestand."""
-    try:
-        from src.core.credentials_manager import encrypt_password
-        
-        # Encrypt wachtwoorden
-        encrypted_servers = []
-        for server in servers:
-            encrypted_server = server.copy()
-            if "password" in server and server["password"]:
-                # Encrypt wachtwoord
-                encrypted_server["password"] = encrypt_password(server["password"], SCRIPTS_DIR)
-            encrypted_servers.append(encrypted_server)
-        
-        with open(RDP_SERVERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(encrypted_servers, f, indent=2, ensure_ascii=False)
-        
-        # Zet bestandspermissies (alleen eigenaar kan lezen)
-        if os.name != "nt":  # Unix/Linux
-            os.chmod(RDP_SERVERS_FILE, 0o600)
-        
-        return True
-    except Exception as e:
-        print(f"Fout bij opslaan RDP servers: {e}")
-        return False
+    """Encrypt (enkel gewijzigde wachtwoorden) en sla RDP servers atomair op."""
+    return get_server_store(RDP_SERVERS_FILE, SCRIPTS_DIR, "RDP servers").save(servers)
 
 
 def load_ssh_servers():
     """Laad SSH servers uit encrypted JSON bestand."""
-    if not SSH_SERVERS_FILE.exists():
-        return []
-    
-    try:
-        with open(SSH_SERVERS_FILE, "r", encoding="utf-8") as f:
-            encrypted_data = json.load(f)
-        
-        # Decrypt wachtwoorden
-        from src.core.credentials_manager import decrypt_password
-        
-        decrypted_servers = []
-        for server in encrypted_data:
-            decrypted_server = server.copy()
-            if "password" in server and server["password"]:
-                try:
-                    # Decrypt wachtwoord
-                    decrypted_server["password"] = decrypt_password(server["password"], SCRIPTS_DIR)
-                except Exception:
-                    # Als decryptie faalt, laat leeg
-                    decrypted_server["password"] = ""
-            decrypted_servers.append(decrypted_server)
-        
-        return decrypted_servers
-    except Exception as e:
-        print(f"Fout bij laden SSH servers: {e}")
-        return []
+    return get_server_store(SSH_SERVERS_FILE, SCRIPTS_DIR, "SSH servers").load()
 
 
 def save_ssh_servers(servers):
-    """Encrypt en sla SSH servers op in JSON bestand."""
-    try:
-        from src.core.credentials_manager import encrypt_password
-        
-        # Encrypt wachtwoorden
-        encrypted_servers = []
-        for server in servers:
-            encrypted_server = server.copy()
-            if "password" in server and server["password"]:
-                # Encrypt wachtwoord
-                encrypted_server["password"] = encrypt_password(server["password"], SCRIPTS_DIR)
-            encrypted_servers.append(encrypted_server)
-        
-        with open(SSH_SERVERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(encrypted_servers, f, indent=2, ensure_ascii=False)
-        
-        # Zet bestandspermissies (alleen eigenaar kan lezen)
-        if os.name != "nt":  # Unix/Linux
-            os.chmod(SSH_SERVERS_FILE, 0o600)
-        
-        return True
-    except Exception as e:
-        print(f"Fout bij opslaan SSH servers: {e}")
-        return False
+    """Encrypt (enkel gewijzigde wachtwoorden) en sla SSH servers atomair op."""
+    return get_server_store(SSH_SERVERS_FILE, SCRIPTS_DIR, "SSH servers").save(servers)
 
 
 def load_credentials():
-    """Laad credentials uit encrypted JSON bestand."""
-    return load_encrypted_credentials(CREDENTIALS_FILE, SCRIPTS_DIR)
+    """Laad credentials uit de gedeelde (gecachte) CredentialStore."""
+    return get_credential_store(CREDENTIALS_FILE, SCRIPTS_DIR).get_all()
 
 
 def save_credentials(creds):
@@ -543,77 +455,186 @@ def documentation():
     return render_template("documentation.html", documentation_html=html_content)
 
 
-@app.route("/api/login/<service>", methods=["POST"])
-def start_login(service):
-    """Start een login module voor een specifieke service."""
-    if shutdown_event.is_set():
-        return jsonify({"success": False, "error": "Applicatie wordt afgesloten"}), 503
-    # Valideer service naam
-    if not validate_service_name(service):
-        return jsonify({"success": False, "error": "Onbekende service"}), 400
-    
-    login_functions = {
-        "smartschool": login_smartschool_via_microsoft,
-        "smartschool_admin": login_smartschool_admin_via_microsoft,
-        "microsoft_admin": login_microsoft_admin,
-        "intune_admin": login_intune_admin,
-        "azure_admin": login_azure_admin,
-        "google_admin": login_google_admin,
-        "easy4u": login_easy4u,
-    }
+LOGIN_FUNCTIONS = {
+    "smartschool": login_smartschool_via_microsoft,
+    "smartschool_admin": login_smartschool_admin_via_microsoft,
+    "microsoft_admin": login_microsoft_admin,
+    "intune_admin": login_intune_admin,
+    "azure_admin": login_azure_admin,
+    "google_admin": login_google_admin,
+    "easy4u": login_easy4u,
+}
+
+LOGIN_REQUIRED_FIELDS = {
+    "smartschool": ["password"],
+    "smartschool_admin": ["password"],
+    "microsoft_admin": ["url", "email", "password"],
+    "intune_admin": ["url", "email", "password"],
+    "azure_admin": ["url", "email", "password"],
+    "google_admin": ["url", "email", "password"],
+    "easy4u": ["url", "email", "password"],
+}
+
+
+def _login_credentials_error(service: str) -> str | None:
+    """Controleer of de credentials voor een login zijn ingevuld; geef foutmelding of None."""
+    # Enkel de velden van deze service worden gedecrypt.
+    store = get_credential_store(CREDENTIALS_FILE, SCRIPTS_DIR)
+
+    if not store.has_service(service):
+        return f"Credentials voor {service} zijn nog niet ingevuld. Ga naar de Credentials pagina om deze in te stellen."
 
-    # Check of credentials zijn ingevuld
-    credentials = load_credentials()
-    
-    required_fields = {
-        "smartschool": ["password"],
-        "smartschool_admin": ["password"],
-        "microsoft_admin": ["url", "email", "password"],
-        "intune_admin": ["url", "email", "password"],
-        "azure_admin": ["url", "email", "password"],
-        "google_admin": ["url", "email", "password"],
-        "easy4u": ["url", "email", "password"],
-    }
-    
-    if service not in credentials:
-        return jsonify({
-            "success": False,
-            "error": f"Credentials voor {service} zijn nog niet ingevuld. Ga naar de Credentials pagina om deze in te stellen."
-        }), 400
-    
-    service_creds = credentials[service]
     missing_fields = []
-    
-    for field in required_fields.get(service, []):
-        if not service_creds.get(field) or service_creds.get(field).strip() == "":
+    for field in LOGIN_REQUIRED_FIELDS.get(service, []):
+        value = store.get(service, field)
+        if not value or value.strip() == "":
             missing_fields.append(field)
     if service in {"smartschool", "smartschool_admin"}:
-        if not (service_creds.get("username") or service_creds.get("email")):
+        if not (store.get(service, "username") or store.get(service, "email")):
             missing_fields.append("username/email")
-    
+
     if missing_fields:
-        return jsonify({
-            "success": False,
-            "error": f"De volgende velden zijn niet ingevuld: {', '.join(missing_fields)}. Ga naar de Credentials pagina om deze in te stellen."
-        }), 400
+        return f"De volgende velden zijn niet ingevuld: {', '.join(missing_fields)}. Ga naar de Credentials pagina om deze in te stellen."
+    return None
 
-    try:
-        # Start de login functie in een aparte thread (niet-blocking)
-        login_func = login_functions[service]
 
-        def _run_login_with_logging():
-            try:
-                login_func()
-            except Exception:
-                logger.exception("Login voor %s is mislukt", service)
-                print(f"LOGIN_FAILED {service}")
+def _login_account_id(service: str) -> str:
+    """Account waarmee een service inlogt (sleutel voor single-flight logins)."""
+    store = get_credential_store(CREDENTIALS_FILE, SCRIPTS_DIR)
+    return store.get(service, "username") or store.get(service, "email") or ""
 
-        thread = threading.Thread(target=_run_login_with_logging, daemon=True, name=f"login-{service}")
-        start_thread(thread)
-        
-        return jsonify({"success": True, "message": f"{service} login gestart"})
+
+def start_login_for_service(service) -> tuple[dict, int]:
+    """
+    Start één login, of koppel aan de lopende login voor dezelfde
+    service/account (en focus dat venster). Gedeeld door Flask en DesktopAPI.
+    """
+    if shutdown_event.is_set():
+        return {"success": False, "error": "Applicatie wordt afgesloten"}, 503
+    # Valideer service naam
+    if not isinstance(service, str) or not validate_service_name(service):
+        return {"success": False, "error": "Onbekende service"}, 400
+
+    # Check of credentials zijn ingevuld
+    error = _login_credentials_error(service)
+    if error:
+        return {"success": False, "error": error}, 400
+
+    try:
+        # Start de login als gevolgde job in een aparte thread (niet-blocking)
+        job, created = start_login_job(service, LOGIN_FUNCTIONS[service], _login_account_id(service))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return {"success": False, "error": str(e)}, 500
+
+    if created:
+        return {"success": True, "message": f"{service} login gestart", "job_id": job.id}, 200
+    # Loopt de login nog, dan focust de job-thread zelf (die gebruikt de driver).
+    driver, window_handle = job.driver, job.window_handle
+    run_on_job_thread(job, lambda: focus_driver_window(driver, window_handle))
+    return {"success": True, "message": f"{service} login loopt al", "job_id": job.id, "attached": True}, 200
+
+
+@app.route("/api/login/<service>", methods=["POST"])
+def start_login(service):
+    """Start een login module voor een specifieke service."""
+    response, status = start_login_for_service(service)
+    return jsonify(response), status
+
+
+def start_login_batch_for_services(services) -> tuple[dict, int]:
+    """
+    Plan logins voor meerdere services in op de begrensde worker pool.
+    Gedeeld door de Flask route en DesktopAPI; geeft (response, status) terug.
+    """
+    if shutdown_event.is_set():
+        return {"success": False, "error": "Applicatie wordt afgesloten"}, 503
+    if not isinstance(services, list) or not services:
+        return {"success": False, "error": "Geef een lijst van services op"}, 400
+
+    errors = {}
+    logins = {}
+    for service in dict.fromkeys(services):
+        if not isinstance(service, str) or not validate_service_name(service):
+            errors[str(service)] = "Onbekende service"
+            continue
+        error = _login_credentials_error(service)
+        if error:
+            errors[service] = error
+            continue
+        logins[service] = (LOGIN_FUNCTIONS[service], _login_account_id(service))
+
+    if not logins:
+        return {"success": False, "error": "Geen enkele login kon gestart worden", "errors": errors}, 400
+
+    jobs = submit_batch(logins)
+    return {
+        "success": True,
+        "message": f"{len(jobs)} login(s) gestart",
+        "jobs": jobs,
+        "errors": errors,
+        "max_parallel": max_parallel_logins(),
+    }, 200
+
+
+def _parse_jobs_poll_args(since, timeout) -> tuple[int, float]:
+    try:
+        since = max(0, int(since or 0))
+    except (TypeError, ValueError):
+        since = 0
+    try:
+        timeout = float(timeout or 0)
+    except (TypeError, ValueError):
+        timeout = 0.0
+    return since, min(max(timeout, 0.0), JOBS_MAX_POLL_TIMEOUT)
+
+
+def get_jobs_since(since=0, timeout=0) -> dict:
+    """Long-poll op de login-job registry (gedeeld door Flask en DesktopAPI)."""
+    since, timeout = _parse_jobs_poll_args(since, timeout)
+    version, jobs = wait_for_jobs(since, timeout)
+    return {"success": True, "version": version, "jobs": jobs}
+
+
+@app.route("/api/jobs", methods=["GET"])
+def get_jobs():
+    """Status van login-jobs; met ?since=<versie>&timeout=<s> als long-poll."""
+    return jsonify(get_jobs_since(request.args.get("since"), request.args.get("timeout")))
+
+
+def list_browser_sessions() -> dict:
+    """Open browsersessies voor de UI (gedeeld door Flask en DesktopAPI)."""
+    return {"success": True, "sessions": list_sessions(), "max_sessions": max_sessions()}
+
+
+def close_browser_session(session_id) -> tuple[dict, int]:
+    if not isinstance(session_id, str) or not session_id.isalnum():
+        return {"success": False, "error": "Ongeldige sessie"}, 400
+    if not close_session(session_id):
+        return {"success": False, "error": "Sessie niet gevonden"}, 404
+    return {"success": True, "message": "Browsersessie gesloten"}, 200
+
+
+@app.route("/api/sessions", methods=["GET"])
+def get_browser_sessions():
+    """Lijst van open browsersessies."""
+    return jsonify(list_browser_sessions())
+
+
+@app.route("/api/sessions/<session_id>/close", methods=["POST"])
+def close_browser_session_route(session_id):
+    """Sluit één browsersessie."""
+    response, status = close_browser_session(session_id)
+    return jsonify(response), status
+
+
+@app.route("/api/login/batch", methods=["POST"])
+def start_login_batch():
+    """Start logins voor meerdere services tegelijk (begrensd parallel)."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Ongeldige input"}), 400
+    response, status = start_login_batch_for_services(data.get("services"))
+    return jsonify(response), status
 
 
 @app.route("/api/rdp/connect", methods=["POST"])
@@ -1000,7 +1021,7 @@ if __name__ == "__main__":
     debug_mode = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
     port = int(os.environ.get("FLASK_PORT", "5000"))
 
-    server = make_server("127.0.0.1", port, app)
+    server = make_server("127.0.0.1", port, app, threaded=True)
     server.timeout = 0.5
     try:
         while not shutdown_event.is_set():
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests draaien vanuit de repo-root: `src.*` importeerbaar maken.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from src.core.credentials_manager import CredentialStore, decrypt_password, write_json_atomic
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Master password: geen key file in de home-map van wie de tests draait.
+    monkeypatch.setenv("CREDENTIALS_MASTER_PASSWORD", "test-sleutel-1")
+    return CredentialStore(tmp_path / "credentials.json", tmp_path)
+
+
+def _ciphertext(store, service="google_admin"):
+    return json.loads(store.credentials_file.read_text(encoding="utf-8"))[service]["password"]
+
+
+def test_write_json_atomic_writes_and_replaces(tmp_path):
+    path = tmp_path / "data.json"
+    write_json_atomic(path, {"a": 1})
+    write_json_atomic(path, {"b": "é"})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"b": "é"}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_write_json_atomic_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / "data.json"
+    write_json_atomic(path, {"a": 1})
+    with pytest.raises(TypeError):
+        write_json_atomic(path, {"a": object()})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_save_reuses_ciphertext_for_unchanged_password(store):
+    credentials = {"google_admin": {"email": "user@school.be", "password": "geheim"}}
+    assert store.save(credentials)
+    first = _ciphertext(store)
+    assert first != "geheim"
+
+    assert store.save(credentials)
+    assert _ciphertext(store) == first
+
+    assert store.save({"google_admin": {"email": "user@school.be", "password": "nieuw"}})
+    assert _ciphertext(store) != first
+    assert store.get("google_admin", "password") == "nieuw"
+
+
+def test_save_reuses_ciphertext_after_reload(store, tmp_path):
+    credentials = {"google_admin": {"email": "user@school.be", "password": "geheim"}}
+    assert store.save(credentials)
+    first = _ciphertext(store)
+
+    reloaded = CredentialStore(store.credentials_file, tmp_path)
+    assert reloaded.get("google_admin", "password") == "geheim"
+    assert reloaded.save(credentials)
+    assert _ciphertext(reloaded) == first
+
+
+def test_save_reencrypts_after_key_change(store, tmp_path, monkeypatch):
+    credentials = {"google_admin": {"email": "user@school.be", "password": "geheim"}}
+    assert store.save(credentials)
+    first = _ciphertext(store)
+
+    monkeypatch.setenv("CREDENTIALS_MASTER_PASSWORD", "test-sleutel-2")
+    assert store.save(credentials)
+    second = _ciphertext(store)
+    assert second != first
+    assert decrypt_password(second, tmp_path) == "geheim"
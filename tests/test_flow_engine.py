@@ -0,0 +1,130 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.webdriver.common.by import By  # noqa: E402
+
+from src.auto_login import flow_engine  # noqa: E402
+from src.auto_login.flow_engine import (  # noqa: E402
+    ACTION_WAIT,
+    FLOW_COMPLETED,
+    FLOW_FAILED,
+    FLOW_STOPPED,
+    FlowStep,
+    run_flow,
+)
+
+EMAIL = (By.ID, "email")
+NEXT = (By.ID, "next")
+PASSWORD = (By.ID, "password")
+SIGN_IN = (By.ID, "signin")
+
+
+class FakeElement:
+    def __init__(self, driver, selector):
+        self.driver = driver
+        self.selector = selector
+
+    def click(self):
+        self.driver.clicked.append(self.selector)
+
+
+class FakeDriver:
+    """Een "pagina" als set van aanwezige selectors."""
+
+    def __init__(self, *present):
+        self.present = set(present)
+        self.clicked = []
+        self.current_url = "https://login.example.com/"
+
+
+@pytest.fixture(autouse=True)
+def fake_resolver(monkeypatch):
+    def resolve_first(driver, selectors, *, visible=True, enabled=True):
+        for index, selector in enumerate(selectors):
+            if selector in driver.present:
+                return index, FakeElement(driver, selector)
+        return None
+
+    monkeypatch.setattr(flow_engine, "resolve_first", resolve_first)
+
+
+def _login_steps(timeout=0):
+    return [
+        FlowStep("email", [EMAIL], timeout=timeout, skip_if_present=[PASSWORD]),
+        FlowStep("email_next", [NEXT], timeout=timeout, skip_with="email"),
+        FlowStep("password", [PASSWORD], timeout=timeout),
+        FlowStep("sign_in", [SIGN_IN, NEXT], timeout=timeout),
+    ]
+
+
+def test_runs_steps_in_order():
+    driver = FakeDriver(EMAIL, NEXT, PASSWORD, SIGN_IN)
+    result = run_flow(driver, _login_steps())
+    assert result.status == FLOW_COMPLETED
+    assert result.step == "sign_in"
+    assert driver.clicked == [EMAIL, NEXT, PASSWORD, SIGN_IN]
+
+
+def test_skip_if_present_skips_step_and_skip_with_follows():
+    # Wachtwoordpagina meteen (bv. login_hint): e-mail én "volgende" overslaan,
+    # ook al staat dezelfde knop op deze pagina.
+    driver = FakeDriver(NEXT, PASSWORD)
+    result = run_flow(driver, _login_steps())
+    assert result.status == FLOW_COMPLETED
+    assert driver.clicked == [PASSWORD, NEXT]
+
+
+def test_own_selector_wins_over_skip_if_present():
+    # Verborgen wachtwoord-decoy naast het e-mailveld: de stap loopt gewoon.
+    driver = FakeDriver(EMAIL, NEXT, PASSWORD, SIGN_IN)
+    run_flow(driver, _login_steps()[:2])
+    assert driver.clicked == [EMAIL, NEXT]
+
+
+def test_stop_when_ends_flow_with_reason():
+    driver = FakeDriver(EMAIL)
+    driver.current_url = "https://portal.example.com/home"
+    result = run_flow(
+        driver,
+        _login_steps(),
+        stop_when=flow_engine.host_reached("portal.example.com"),
+    )
+    assert result.status == FLOW_STOPPED
+    assert result.ok
+    assert result.step == "email"
+    assert result.reason == "authenticated"
+    assert driver.clicked == []
+
+
+def test_optional_step_times_out_and_flow_continues():
+    driver = FakeDriver(SIGN_IN)
+    steps = [
+        FlowStep("stay_signed_in", [(By.ID, "kmsi")], timeout=0, optional=True),
+        FlowStep("sign_in", [SIGN_IN], timeout=0),
+    ]
+    result = run_flow(driver, steps)
+    assert result.status == FLOW_COMPLETED
+    assert driver.clicked == [SIGN_IN]
+
+
+def test_required_step_timeout_fails_flow():
+    driver = FakeDriver()
+    steps = [
+        FlowStep("email", [EMAIL], timeout=0),
+        FlowStep("sign_in", [SIGN_IN], timeout=0),
+    ]
+    result = run_flow(driver, steps)
+    assert result.status == FLOW_FAILED
+    assert result.step == "email"
+    assert not result.ok
+
+
+def test_wait_step_uses_until_predicate():
+    driver = FakeDriver()
+    driver.current_url = "https://easy4u.example.com/admin/"
+    steps = [FlowStep("admin", action=ACTION_WAIT, timeout=0, until=lambda d: "/login" not in d.current_url)]
+    assert run_flow(driver, steps).status == FLOW_COMPLETED
+
+    driver.current_url = "https://easy4u.example.com/login"
+    assert run_flow(driver, steps).status == FLOW_FAILED
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from src.core import login_jobs
+from src.core.login_jobs import JOB_SUCCEEDED, get_job, list_jobs, start_login_job, wait_for_jobs
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    with login_jobs._lock:
+        login_jobs._jobs.clear()
+    yield
+    with login_jobs._lock:
+        login_jobs._jobs.clear()
+
+
+def _wait_until_finished(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not job.active
+
+
+def test_same_service_and_account_share_one_job():
+    release = threading.Event()
+    calls = []
+
+    def login():
+        calls.append(1)
+        release.wait(5)
+
+    job, created = start_login_job("google_admin", login, "User@School.be")
+    try:
+        again, created_again = start_login_job("google_admin", login, " user@school.be")
+        other, created_other = start_login_job("google_admin", login, "ander@school.be")
+        assert created and not created_again and created_other
+        assert again is job
+        assert other is not job
+    finally:
+        release.set()
+    _wait_until_finished(job)
+    _wait_until_finished(other)
+    assert get_job(job.id).state == JOB_SUCCEEDED
+    assert len(calls) == 2
+
+    # Na afloop start een nieuwe klik een nieuwe login.
+    new_job, created_new = start_login_job("google_admin", lambda: None, "user@school.be")
+    assert created_new and new_job is not job
+    _wait_until_finished(new_job)
+
+
+def test_wait_for_jobs_times_out_without_changes():
+    version, _ = list_jobs()
+    started = time.monotonic()
+    new_version, jobs = wait_for_jobs(version, timeout=0.3)
+    assert time.monotonic() - started >= 0.25
+    assert new_version == version
+    assert jobs == []
+
+
+def test_wait_for_jobs_returns_early_on_change():
+    version, _ = list_jobs()
+    timer = threading.Timer(0.1, lambda: start_login_job("easy4u", lambda: None))
+    timer.start()
+    started = time.monotonic()
+    try:
+        new_version, jobs = wait_for_jobs(version, timeout=5)
+    finally:
+        timer.join()
+    assert time.monotonic() - started < 4
+    assert new_version > version
+    assert [job["service"] for job in jobs] == ["easy4u"]
+    _wait_until_finished(get_job(jobs[0]["id"]))
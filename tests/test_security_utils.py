@@ -0,0 +1,53 @@
+from urllib.parse import parse_qs, urlparse
+
+from src.core.security_utils import hinted_service_url, url_on_host
+
+
+def test_url_on_host_matches_host_and_subdomains():
+    assert url_on_host("https://admin.microsoft.com/#/home", "admin.microsoft.com")
+    assert url_on_host("https://eu.portal.azure.com/", "portal.azure.com")
+    assert url_on_host("https://ADMIN.Google.com/ac/home", "admin.google.com")
+
+
+def test_url_on_host_ignores_lookalikes_and_query():
+    assert not url_on_host("https://evil-microsoft.com/", "microsoft.com")
+    assert not url_on_host(
+        "https://login.microsoftonline.com/?redirect_uri=https://admin.microsoft.com/",
+        "admin.microsoft.com",
+    )
+    assert not url_on_host("", "admin.microsoft.com")
+    assert not url_on_host(None, "admin.microsoft.com")
+    assert not url_on_host("http://[::1", "admin.microsoft.com")
+
+
+def test_hinted_service_url_google_passes_identifier(monkeypatch):
+    monkeypatch.delenv("AUTO_LOGIN_DISABLE_LOGIN_HINT", raising=False)
+    url = hinted_service_url("google_admin", " user@school.be ")
+    parsed = urlparse(url)
+    assert parsed.hostname == "accounts.google.com"
+    query = parse_qs(parsed.query)
+    assert query["Email"] == ["user@school.be"]
+    assert query["continue"] == ["https://admin.google.com/"]
+
+
+def test_hinted_service_url_microsoft_is_opt_in(monkeypatch):
+    monkeypatch.delenv("AUTO_LOGIN_DISABLE_LOGIN_HINT", raising=False)
+    monkeypatch.delenv("AUTO_LOGIN_MICROSOFT_LOGIN_HINT", raising=False)
+    assert hinted_service_url("intune_admin", "user@school.be") == "https://intune.microsoft.com"
+
+    monkeypatch.setenv("AUTO_LOGIN_MICROSOFT_LOGIN_HINT", "1")
+    assert hinted_service_url("intune_admin", "user@school.be") == (
+        "https://intune.microsoft.com/?login_hint=user%40school.be"
+    )
+
+
+def test_hinted_service_url_falls_back_to_canonical_url(monkeypatch):
+    monkeypatch.setenv("AUTO_LOGIN_MICROSOFT_LOGIN_HINT", "1")
+    assert hinted_service_url("azure_admin", None) == "https://portal.azure.com"
+    assert hinted_service_url("azure_admin", "geen-email") == "https://portal.azure.com"
+    assert hinted_service_url("easy4u", "user@school.be") == "https://easy4u.nl/admin/"
+    assert hinted_service_url("onbekend", "user@school.be") == ""
+
+    monkeypatch.setenv("AUTO_LOGIN_DISABLE_LOGIN_HINT", "yes")
+    assert hinted_service_url("azure_admin", "user@school.be") == "https://portal.azure.com"
+    assert hinted_service_url("google_admin", "user@school.be") == "https://admin.google.com"